@@ -1,7 +1,14 @@
+import argparse
+import glob
+import json
+import os
 import sys
+import numpy as np
 import pandas as pd
 import depurador_bases  # usamos las funciones de resumen por ANI
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
 from pathlib import Path
 
 # ============================
@@ -13,47 +20,64 @@ COL_SUBESTADO = "Sub-Estado"
 COL_ANI = "ANI/Teléfono"
 COL_FECHA = "Inicio"  # o FECHAHORA, INICIO, etc.
 
-def leer_ticket(ruta: Path) -> pd.DataFrame:
+# "Familias" de intentos que se analizan (columna del resumen, etiqueta)
+FAMILIAS = [
+    ("intentos_unallocated", "UNALLOCATED"),
+    ("intentos_answering_machine", "ANSWERING MACHINE"),
+    ("intentos_no_answer", "NO ANSWER"),
+    ("intentos_rejected", "REJECTED"),
+]
+
+# Cortes que se prueban para ver impacto
+CORTES = [1, 2, 3, 4, 5, 6, 8, 10]
+
+EXTENSIONES_TICKET = (".xls", ".xlsx", ".xlsm", ".xlsb", ".csv", ".txt")
+
+def leer_ticket(
+    ruta: Path,
+    ventana: depurador_bases.VentanaFechas | None = None,
+) -> pd.DataFrame:
     """
     Lee el ticket de Neotel. Soporta xls/xlsx/csv.
-    Ajustá si tu formato es fijo.
+    Con `ventana`, las filas fuera de rango se descartan al leer.
     """
-    nombre = ruta.name.lower()
-
-    if nombre.endswith((".xlsx", ".xlsm", ".xlsb", ".xls")):
-        df = pd.read_excel(ruta)
-    elif nombre.endswith((".csv", ".txt")):
-        df = pd.read_csv(ruta, sep=None, engine="python", encoding="latin1")
-    else:
-        raise ValueError(f"Formato no soportado: {nombre}")
-
-    return df
+    return depurador_bases.leer_ticket(ruta, ventana=ventana)
 
-def analizar_umbral_uno(resumen: pd.DataFrame, col: str, etiqueta: str) -> None:
+def analizar_umbral_uno(
+    curvas: pd.DataFrame,
+    col: str,
+    etiqueta: str,
+    cortes: list[int] = CORTES,
+    completa: bool = False,
+) -> None:
     """
     Muestra cómo se distribuye la cantidad de intentos por ANI para una columna
     (por ejemplo: intentos_unallocated, intentos_answering_machine, etc.).
+    Todo sale de la curva de supervivencia ya calculada (curvas_supervivencia).
     """
     print("\n" + "=" * 60)
     print(f"Distribución de {etiqueta} por ANI ({col})")
     print("=" * 60)
 
-    vc = resumen[col].value_counts().sort_index()
+    sobreviven = curvas[col].to_numpy()
+    exactos = sobreviven - np.r_[sobreviven[1:], 0]
+    vc = pd.Series(exactos, index=curvas.index, name="count")
+    vc.index.name = col
     print("\nCantidad de ANI según N° de intentos:")
-    print(vc.to_string())
+    print(vc[vc > 0].to_string())
 
-    total_ani = len(resumen)
+    total_ani = int(sobreviven[0])
     print(f"\nTotal de ANI: {total_ani}")
 
-    # Probamos distintos cortes para ver impacto
-    for t in [1, 2, 3, 4, 5, 6, 8, 10]:
-        cant = (resumen[col] >= t).sum()
+    # Cortes pedidos (o la curva entera)
+    umbrales = list(curvas.index[1:]) if completa else cortes
+    curva = curvas[[col, f"{col}_pct"]].reindex(umbrales, fill_value=0)
+    for t, (cant, pct) in curva.iterrows():
         if cant == 0:
             continue
-        pct = cant * 100.0 / total_ani
-        print(f"ANI con {etiqueta} >= {t}: {cant} ({pct:.1f}%)")
+        print(f"ANI con {etiqueta} >= {t}: {int(cant)} ({pct:.1f}%)")
 
-def analizar_curva_contacto(df: pd.DataFrame) -> None:
+def analizar_curva_contacto(df: pd.DataFrame, cortes: list[int] = CORTES) -> None:
     """
     Analiza en qué intento se logra el primer ANSWER-AGENT por ANI.
     Esto sirve para definir hasta qué intento conviene insistir.
@@ -62,37 +86,25 @@ def analizar_curva_contacto(df: pd.DataFrame) -> None:
     print("Curva de contactación: intento del primer AGENT")
     print("=" * 60)
 
-    df = df.copy()
-
-    df["__estado_norm"] = (
-        df[COL_ESTADO].astype(str).str.strip().str.lower().str.replace(" ", "")
-    )
-    df["__subestado_norm"] = (
-        df[COL_SUBESTADO].fillna("").astype(str).str.strip().str.lower()
+    contacto = depurador_bases.primer_contacto_por_ani(
+        df,
+        col_estado=COL_ESTADO,
+        col_subestado=COL_SUBESTADO,
+        col_ani=COL_ANI,
+        col_fecha=COL_FECHA,
     )
 
-    df[COL_FECHA] = pd.to_datetime(df[COL_FECHA], errors="coerce")
-    df = df.dropna(subset=[COL_FECHA])
-
-    # Ordenamos por ANI + fecha
-    df = df.sort_values([COL_ANI, COL_FECHA])
+    # ¿En qué intento se logró por primera vez?
+    imprimir_curva_contacto(contacto["primer_intento_agent"], cortes)
 
-    # Calculamos número de intento dentro de cada ANI
-    df["__intento_n"] = df.groupby(COL_ANI).cumcount() + 1
+def imprimir_curva_contacto(primer_intento: pd.Series, cortes: list[int] = CORTES) -> None:
+    """Distribución y cortes del intento del primer AGENT (vacío = nunca atendió)."""
+    primer_intento = primer_intento.dropna().astype(int)
 
-    # Filtramos sólo filas donde realmente hubo ANSWER-AGENT
-    mask_answer_agent = (
-        (df["__estado_norm"] == "answer")
-        & (df["__subestado_norm"].str.contains("agent"))
-    )
-    df_aa = df[mask_answer_agent]
-
-    if df_aa.empty:
+    if primer_intento.empty:
         print("No se encontraron registros con AGENT.")
         return
 
-    # ¿En qué intento se logró por primera vez?
-    primer_intento = df_aa.groupby(COL_ANI)["__intento_n"].min()
     dist = primer_intento.value_counts().sort_index()
 
     print("\nIntento en que se logra el primer AGENT:")
@@ -101,23 +113,401 @@ def analizar_curva_contacto(df: pd.DataFrame) -> None:
     total_contactados = len(primer_intento)
     print(f"\nTotal de ANI que llegaron a AGENT al menos una vez: {total_contactados}")
 
-    for t in [1, 2, 3, 4, 5, 6, 8, 10]:
+    for t in cortes:
         cant = (primer_intento <= t).sum()
         pct = cant * 100.0 / total_contactados
         print(f"ANI que atienden en intento ≤ {t}: {cant} ({pct:.1f}%)")
 
-def main():
-    if len(sys.argv) < 2:
-        print("Uso: python analizar_umbral_depuracion.py <ruta_ticket>")
+def optimizar(df: pd.DataFrame, max_perdida: float, tope: int, mostrar: int) -> None:
+    """
+    Busca en toda la grilla de umbrales de asignar_tag la combinación con más
+    contactos retenidos por intento realizado, perdiendo a lo sumo
+    `max_perdida` % de los contactos. Muestra también el frente de Pareto
+    (intentos ahorrados vs contactos perdidos).
+    """
+    print("\n" + "=" * 60)
+    print(f"Optimizador de umbrales (pérdida máxima {max_perdida:.1f}% de contactos)")
+    print("=" * 60)
+
+    historias = depurador_bases.historias_de_intentos(
+        df,
+        col_estado=COL_ESTADO,
+        col_subestado=COL_SUBESTADO,
+        col_ani=COL_ANI,
+        col_fecha=COL_FECHA,
+        tope=tope,
+    )
+    grilla = depurador_bases.optimizar_umbrales(historias, max_perdida_pct=max_perdida)
+    print(
+        f"\nCombinaciones evaluadas: {len(grilla)} "
+        f"(firmas de ANI distintas: {len(historias['peso'])})"
+    )
+
+    columnas = [
+        "unallocated",
+        "answering_machine",
+        "no_answer",
+        "rejected",
+        "anis_cortados",
+        "intentos_ahorrados",
+        "contactos_perdidos",
+        "pct_contactos_perdidos",
+        "eficiencia",
+    ]
+
+    actual = grilla
+    for clave, valor in depurador_bases.UMBRALES_TAG.items():
+        actual = actual[actual[clave] == valor]
+    if not actual.empty:
+        print("\nUmbrales actuales:")
+        print(actual[columnas].to_string(index=False))
+
+    factibles = grilla[grilla["factible"]]
+    if factibles.empty:
+        print("\nNinguna combinación cumple la pérdida máxima pedida.")
+    else:
+        print(f"\nMejores {mostrar} combinaciones factibles:")
+        print(factibles[columnas].head(mostrar).to_string(index=False))
+
+    frente = grilla[grilla["pareto"]].sort_values("contactos_perdidos")
+    print("\nFrente de Pareto (más ahorro por cada contacto perdido):")
+    print(frente[columnas + ["factible"]].to_string(index=False))
+
+# ============================
+# MODO STREAMING (STDIN / POR BLOQUES)
+# ============================
+
+def analizar_en_streaming(
+    origen: str,
+    ventana: depurador_bases.VentanaFechas | None,
+    filas_por_bloque: int,
+    cortes: list[int] = CORTES,
+    completa: bool = False,
+) -> None:
+    """
+    Mismas distribuciones y curva de contacto, leyendo el CSV por bloques
+    (origen '-' = stdin) sin cargarlo entero: la memoria depende de la
+    cantidad de ANIs distintos. Asume el archivo en orden cronológico.
+    """
+    entrada = sys.stdin.buffer if origen == "-" else origen
+    acumulador = depurador_bases.AcumuladorPorANI(
+        col_estado=COL_ESTADO,
+        col_subestado=COL_SUBESTADO,
+        col_ani=COL_ANI,
+        col_fecha=COL_FECHA,
+    )
+
+    bloques = pd.read_csv(
+        entrada,
+        sep=None,
+        engine="python",
+        encoding="latin1",
+        chunksize=filas_por_bloque,
+    )
+    for bloque in bloques:
+        if ventana is not None:
+            bloque = ventana.filtrar(bloque, COL_FECHA)
+        acumulador.agregar(bloque)
+        print(
+            f"  ... {acumulador.llamados} llamados, {acumulador.anis} ANI",
+            file=sys.stderr,
+        )
+
+    resumen = acumulador.resumen()
+    print(f"Llamados leídos: {acumulador.llamados} | ANI distintos: {acumulador.anis}")
+
+    curvas = depurador_bases.curvas_supervivencia(
+        depurador_bases.histogramas_contadores(resumen, [col for col, _ in FAMILIAS])
+    )
+    for col, etiqueta in FAMILIAS:
+        analizar_umbral_uno(curvas, col, etiqueta, cortes, completa)
+
+    print("\n" + "=" * 60)
+    print("Curva de contactación: intento del primer AGENT")
+    print("=" * 60)
+    imprimir_curva_contacto(resumen["primer_intento_agent"], cortes)
+
+    if acumulador.anis_desordenados:
+        print(
+            f"\n⚠ {acumulador.anis_desordenados} ANI con llamados fuera de orden "
+            "cronológico: su intento del primer AGENT sigue el orden del archivo."
+        )
+
+# ============================
+# MODO LOTE (VARIOS TICKETS)
+# ============================
+
+def tickets_de_lote(entrada: str) -> list[Path]:
+    """Tickets de una carpeta (no recursivo) o de un patrón glob."""
+    if os.path.isdir(entrada):
+        candidatos = Path(entrada).iterdir()
+    else:
+        candidatos = (Path(r) for r in glob.glob(entrada))
+    return sorted(
+        r for r in candidatos if r.is_file() and r.name.lower().endswith(EXTENSIONES_TICKET)
+    )
+
+def histogramas_ticket(
+    ruta: Path,
+    ventana: depurador_bases.VentanaFechas | None = None,
+) -> dict:
+    """
+    Histogramas parciales de un ticket (corre en un proceso del pool): uno
+    por contador del resumen y uno del intento del primer AGENT.
+    """
+    df = leer_ticket(ruta, ventana)
+    resumen = depurador_bases.construir_resumen_por_ani(
+        df,
+        col_estado=COL_ESTADO,
+        col_subestado=COL_SUBESTADO,
+        col_ani=COL_ANI,
+        col_fecha=COL_FECHA,
+    )
+    contacto = depurador_bases.primer_contacto_por_ani(
+        df,
+        col_estado=COL_ESTADO,
+        col_subestado=COL_SUBESTADO,
+        col_ani=COL_ANI,
+        col_fecha=COL_FECHA,
+    )
+
+    histogramas = depurador_bases.histogramas_contadores(resumen)
+    primer = contacto["primer_intento_agent"].dropna().to_numpy(dtype=np.int64)
+    histogramas["primer_intento_agent"] = np.bincount(primer, minlength=1)
+    return {"llamados": len(df), "histogramas": histogramas}
+
+def reporte_desde_histogramas(
+    nombre: str,
+    llamados: int,
+    histogramas: dict,
+    cortes: list[int] = CORTES,
+) -> dict:
+    """Reporte JSON (distribuciones, cortes y curva de contacto) armado solo con histogramas."""
+    total_anis = int(histogramas["intentos_totales"].sum())
+    curvas = depurador_bases.curvas_supervivencia(
+        {col: histogramas[col] for col, _ in FAMILIAS}
+    ).reindex(cortes, fill_value=0)
+
+    familias = {}
+    for col, etiqueta in FAMILIAS:
+        h = histogramas[col]
+        familias[col] = {
+            "etiqueta": etiqueta,
+            "distribucion": {str(k): int(n) for k, n in enumerate(h) if n},
+            "cortes": {
+                str(t): {
+                    "anis": int(curvas.at[t, col]),
+                    "pct": round(float(curvas.at[t, f"{col}_pct"]), 2),
+                }
+                for t in cortes
+            },
+        }
+
+    primer = histogramas["primer_intento_agent"]
+    contactados = int(primer.sum())
+    curva = {
+        str(t): {
+            "anis": int(primer[:t + 1].sum()),
+            "pct": round(float(primer[:t + 1].sum()) * 100 / contactados, 2) if contactados else 0.0,
+        }
+        for t in cortes
+    }
+
+    return {
+        "archivo": nombre,
+        "llamados": int(llamados),
+        "anis": total_anis,
+        "anis_contactados": contactados,
+        "familias": familias,
+        "curva_primer_agent": curva,
+        # Histogramas crudos: permiten volver a combinar reportes sin releer tickets
+        "histogramas": {col: [int(n) for n in h] for col, h in histogramas.items()},
+    }
+
+def analizar_lote(
+    entrada: str,
+    salida: Path,
+    ventana: depurador_bases.VentanaFechas | None,
+    procesos: int | None,
+    cortes: list[int] = CORTES,
+) -> None:
+    """
+    Analiza cada ticket en un proceso aparte y escribe un JSON por archivo
+    más 'combinado.json', armado sumando los histogramas parciales.
+    Si un ANI aparece en varios tickets, en el combinado cuenta una vez por ticket.
+    """
+    rutas = tickets_de_lote(entrada)
+    if not rutas:
+        print(f"No se encontraron tickets en: {entrada}")
         sys.exit(1)
 
-    ruta = Path(sys.argv[1])
+    salida.mkdir(parents=True, exist_ok=True)
+    print(f"Analizando {len(rutas)} ticket(s) -> {salida}")
+
+    parciales = []
+    llamados = 0
+    nombres_usados: set[str] = set()
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {pool.submit(histogramas_ticket, r, ventana): r for r in rutas}
+        for futuro in as_completed(futuros):
+            ruta = futuros[futuro]
+            try:
+                parcial = futuro.result()
+            except Exception as e:
+                print(f"  ✗ {ruta.name}: {e}")
+                continue
+
+            parciales.append(parcial["histogramas"])
+            llamados += parcial["llamados"]
+
+            nombre = ruta.stem
+            while nombre in nombres_usados:
+                nombre += "_"
+            nombres_usados.add(nombre)
+
+            reporte = reporte_desde_histogramas(
+                str(ruta), parcial["llamados"], parcial["histogramas"], cortes
+            )
+            (salida / f"{nombre}.json").write_text(
+                json.dumps(reporte, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+            print(
+                f"  ✓ {ruta.name}: {reporte['llamados']} llamados, {reporte['anis']} ANI"
+            )
+
+    if not parciales:
+        print("Ningún ticket se pudo analizar.")
+        sys.exit(1)
+
+    combinado = reporte_desde_histogramas(
+        f"{len(parciales)} tickets",
+        llamados,
+        depurador_bases.combinar_histogramas(parciales),
+        cortes,
+    )
+    (salida / "combinado.json").write_text(
+        json.dumps(combinado, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    print(f"Reporte combinado: {salida / 'combinado.json'}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Analiza umbrales de depuración sobre un ticket de Neotel."
+    )
+    parser.add_argument(
+        "ruta_ticket",
+        help="Ticket xls/xlsx/csv (con --lote: carpeta o patrón, ej. 'tickets/*.csv')",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Lee el CSV por bloques (ruta o '-' para stdin) sin cargarlo entero",
+    )
+    parser.add_argument(
+        "--filas-por-bloque",
+        type=int,
+        default=200_000,
+        help="Tamaño de cada bloque (con --stream)",
+    )
+    parser.add_argument(
+        "--lote",
+        action="store_true",
+        help="Analiza varios tickets en paralelo y escribe reportes JSON",
+    )
+    parser.add_argument(
+        "--salida",
+        type=Path,
+        default=Path("reportes_umbral"),
+        help="Carpeta de los reportes JSON (con --lote)",
+    )
+    parser.add_argument(
+        "--procesos",
+        type=int,
+        default=None,
+        help="Procesos en paralelo (con --lote; por defecto, uno por CPU)",
+    )
+    parser.add_argument(
+        "--optimizar",
+        action="store_true",
+        help="Busca automáticamente los umbrales de las reglas de tag",
+    )
+    parser.add_argument(
+        "--max-perdida",
+        type=float,
+        default=2.0,
+        help="%% máximo de contactos que se acepta perder (con --optimizar)",
+    )
+    parser.add_argument(
+        "--tope",
+        type=int,
+        default=10,
+        help="Umbral máximo a probar por regla (con --optimizar)",
+    )
+    parser.add_argument(
+        "--mostrar",
+        type=int,
+        default=10,
+        help="Cantidad de combinaciones a listar (con --optimizar)",
+    )
+    parser.add_argument(
+        "--desde",
+        type=date.fromisoformat,
+        help="Solo llamados desde este día (AAAA-MM-DD)",
+    )
+    parser.add_argument(
+        "--hasta",
+        type=date.fromisoformat,
+        help="Solo llamados hasta este día inclusive (AAAA-MM-DD)",
+    )
+    parser.add_argument(
+        "--habiles",
+        action="store_true",
+        help="Solo llamados de lunes a viernes",
+    )
+    parser.add_argument(
+        "--cortes",
+        type=lambda texto: sorted({int(t) for t in texto.split(",") if t.strip()}),
+        default=CORTES,
+        help="Cortes a reportar, separados por coma (ej. 1,2,3,5,8)",
+    )
+    parser.add_argument(
+        "--curva-completa",
+        action="store_true",
+        help="Muestra la curva de supervivencia para todos los umbrales",
+    )
+    args = parser.parse_args()
+
+    ventana = None
+    if args.desde or args.hasta or args.habiles:
+        ventana = depurador_bases.VentanaFechas(
+            desde=args.desde, hasta=args.hasta, solo_habiles=args.habiles
+        )
+
+    if args.lote:
+        analizar_lote(args.ruta_ticket, args.salida, ventana, args.procesos, args.cortes)
+        return
+
+    if args.stream:
+        analizar_en_streaming(
+            args.ruta_ticket,
+            ventana,
+            args.filas_por_bloque,
+            args.cortes,
+            args.curva_completa,
+        )
+        return
+
+    ruta = Path(args.ruta_ticket)
     if not ruta.exists():
         print(f"No se encontró el archivo: {ruta}")
         sys.exit(1)
 
     print(f"Leyendo ticket: {ruta}")
-    df = leer_ticket(ruta)
+    df = leer_ticket(ruta, ventana)
+
+    if args.optimizar:
+        optimizar(df, args.max_perdida, args.tope, args.mostrar)
+        return
 
     # Armamos el resumen por ANI con el módulo depurador_bases
     resumen = depurador_bases.construir_resumen_por_ani(
@@ -131,14 +521,15 @@ def main():
     print("\nColumnas disponibles en el resumen:")
     print(resumen.columns.tolist())
 
-    # Analizamos cada "familia" de intentos
-    analizar_umbral_uno(resumen, "intentos_unallocated", "UNALLOCATED")
-    analizar_umbral_uno(resumen, "intentos_answering_machine", "ANSWERING MACHINE")
-    analizar_umbral_uno(resumen, "intentos_no_answer", "NO ANSWER")
-    analizar_umbral_uno(resumen, "intentos_rejected", "REJECTED")
+    # Curvas de supervivencia de todas las familias en una pasada
+    curvas = depurador_bases.curvas_supervivencia(
+        depurador_bases.histogramas_contadores(resumen, [col for col, _ in FAMILIAS])
+    )
+    for col, etiqueta in FAMILIAS:
+        analizar_umbral_uno(curvas, col, etiqueta, args.cortes, args.curva_completa)
 
     # Curva de contactación por intento
-    analizar_curva_contacto(df)
+    analizar_curva_contacto(df, args.cortes)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,348 @@
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import depurador_bases  # módulo de lógica
+import generar_tickets
+import prueba_carga_app
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# ============================
+# CONFIGURACIÓN BÁSICA
+# ============================
+
+TAMANOS = [100_000, 1_000_000, 10_000_000]
+
+# Etapas de referencia (groupby.apply / apply por fila): por encima de este
+# tamaño se omiten, a 10M filas tardan horas.
+MAX_FILAS_REFERENCIA = 1_000_000
+
+FILAS_POR_BLOQUE = 200_000
+
+# Pantallas de la app (--pantallas): una sesión de AppTest por tamaño; por
+# encima de este tamaño se omiten, cada rerun recorre el ticket completo.
+MAX_FILAS_PANTALLAS = 1_000_000
+
+# ============================
+# MEDICIÓN
+# ============================
+
+def medir(funcion, con_memoria: bool) -> tuple[object, dict]:
+    """
+    Corre `funcion()` y devuelve (resultado, métricas).
+    El tiempo se mide en una corrida sin tracemalloc (que hace más lento el
+    código Python); el pico de memoria, en una segunda corrida aparte.
+    """
+    inicio, cpu = time.perf_counter(), time.process_time()
+    resultado = funcion()
+    metricas = {
+        "segundos": round(time.perf_counter() - inicio, 4),
+        "cpu_segundos": round(time.process_time() - cpu, 4),
+    }
+    if con_memoria:
+        tracemalloc.start()
+        try:
+            funcion()
+            metricas["pico_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        finally:
+            tracemalloc.stop()
+    return resultado, metricas
+
+def comprobar_medicion_anidada(megas: int = 32) -> dict:
+    """
+    medir() alrededor de una función que asigna `megas` MB, los libera y
+    después pasa por una etapa instrumentada (medir_etapa): el pico externo
+    tiene que seguir incluyendo esos MB, y la etapa no puede informar
+    memoria negativa.
+    Las etapas de depurador_bases corren adentro de cada medición del
+    benchmark; si una etapa le borra el pico a quien mide afuera, todas las
+    cifras de memoria salen de menos. Devuelve las métricas o corta con error.
+    """
+    eventos: list = []
+
+    def funcion():
+        bloque = np.ones(megas * 2**20 // 8)
+        total = float(bloque[0])
+        del bloque
+        with depurador_bases.medir_etapa("comprobacion"):
+            pass
+        return total
+
+    with depurador_bases.escuchar_etapas(eventos.append):
+        _, metricas = medir(funcion, con_memoria=True)
+    if metricas["pico_mb"] < megas * 0.95:
+        raise SystemExit(
+            f"Medición de memoria rota: se asignaron {megas} MB y el pico medido es "
+            f"{metricas['pico_mb']} MB (¿una etapa reinicia el pico de tracemalloc?)"
+        )
+    if any(e.tracemalloc_mb is not None and e.tracemalloc_mb < 0 for e in eventos):
+        raise SystemExit("Medición de memoria rota: una etapa informó memoria negativa")
+    return metricas
+
+def etapas_del_pipeline(ruta: Path, filas: int, max_filas_referencia: int) -> list:
+    """
+    Etapas en orden como (nombre, función que recibe el estado acumulado).
+    Cubre lo que usa cada pantalla: lectura y detección de columnas, el
+    resumen/etiquetado de referencia (procesar_desde_df), los motores
+    vectorizados (resumen por campaña, tags, acumulador por bloques), el
+    primer contacto, el índice ANI <-> BASE y las curvas del simulador.
+    """
+    def resumen_acumulado(e):
+        acumulador = depurador_bases.AcumuladorPorANI(*e["columnas"])
+        for inicio in range(0, len(e["df"]), FILAS_POR_BLOQUE):
+            acumulador.agregar(e["df"].iloc[inicio:inicio + FILAS_POR_BLOQUE])
+        return acumulador.resumen()
+
+    etapas = [
+        ("lectura", lambda e: depurador_bases.leer_ticket(ruta)),
+        ("columnas", lambda e: depurador_bases.detectar_columnas(e["df"])),
+    ]
+    if filas <= max_filas_referencia:
+        etapas += [
+            ("resumen_por_ani", lambda e: depurador_bases.construir_resumen_por_ani(e["df"], *e["columnas"])),
+            ("etiquetar_resumen", lambda e: depurador_bases.etiquetar_resumen(e["resumen_por_ani"])),
+        ]
+    etapas += [
+        ("resumen_base_ani", lambda e: depurador_bases.construir_resumen_por_base_ani(
+            e["df"], *e["columnas"][:3], "BASE", e["columnas"][3])),
+        ("resumen_global", lambda e: depurador_bases.resumen_global_desde_base_ani(e["resumen_base_ani"])),
+        ("asignar_tags", lambda e: depurador_bases.asignar_tags(e["resumen_global"])),
+        ("acumulador_por_bloques", resumen_acumulado),
+        ("primer_contacto", lambda e: depurador_bases.primer_contacto_por_ani(e["df"], *e["columnas"])),
+        ("indice_ani_base", lambda e: depurador_bases.construir_indice_ani_base(
+            e["df"], e["columnas"][2], "BASE", anis=e["resumen_global"]["ANI"])),
+        ("curvas_supervivencia", lambda e: depurador_bases.curvas_supervivencia(
+            depurador_bases.histogramas_contadores(e["resumen_global"]))),
+    ]
+    return etapas
+
+def filas_resultado(resultado) -> int | None:
+    if isinstance(resultado, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(resultado)
+    if isinstance(resultado, dict) and "anis" in resultado:
+        return len(resultado["anis"])
+    return None
+
+def medir_tamano(
+    filas: int,
+    carpeta: Path,
+    formato: str,
+    con_memoria: bool,
+    max_filas_referencia: int,
+    semilla: int,
+    mezcla: dict | None = None,
+) -> list[dict]:
+    """Genera un ticket de `filas` llamados y mide cada etapa sobre él."""
+    ruta = generar_tickets.escribir_ticket(
+        generar_tickets.generar_ticket(filas, mezcla=mezcla, semilla=semilla),
+        carpeta / f"ticket_{filas}.{formato}",
+    )
+    estado: dict = {}
+    resultados = []
+    for nombre, funcion in etapas_del_pipeline(ruta, filas, max_filas_referencia):
+        resultado, metricas = medir(lambda: funcion(estado), con_memoria)
+        estado[nombre] = resultado
+        if nombre == "lectura":
+            estado["df"] = resultado
+        resultados.append({"filas": filas, "etapa": nombre, **metricas, "filas_salida": filas_resultado(resultado)})
+        print(
+            f"  {nombre:<24} {metricas['segundos']:>9.3f} s"
+            + (f" {metricas['pico_mb']:>9.1f} MB" if con_memoria else "")
+        )
+    ruta.unlink()
+    return resultados
+
+def medir_pantallas(filas: int, app: Path, semilla: int, timeout: float) -> list[dict]:
+    """
+    Pantallas de la app Streamlit con un ticket de `filas` llamados: una
+    sesión de AppTest (prueba_carga_app.py, sin pausas) que sube el ticket
+    y recorre pestañas, filtros y simulador. Cada paso es una etapa
+    "pantalla: ..." con el tiempo del rerun; el pico de RSS del proceso
+    queda en la etapa de carga (tracemalloc no sirve acá: Streamlit corre
+    el script en otro hilo).
+    """
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        corrida = pool.submit(
+            prueba_carga_app.correr_carga, 1, app, filas, True, 0.0, timeout, semilla
+        ).result()
+    resultados = []
+    for m in corrida["mediciones"]:
+        if m["accion"] == "inicio" and m["error"] is None:
+            continue
+        fila = {"filas": filas, "etapa": f"pantalla: {m['paso']}", "segundos": round(m["segundos"], 4)}
+        if m["paso"] == "carga" and corrida["rss_pico_mb"] is not None:
+            fila["rss_pico_mb"] = round(corrida["rss_pico_mb"], 1)
+        if m["error"]:
+            fila["error"] = m["error"].strip().splitlines()[-1]
+        resultados.append(fila)
+        print(
+            f"  {fila['etapa']:<40} {fila['segundos']:>9.3f} s"
+            + (f" {fila['rss_pico_mb']:>9.1f} MB RSS" if "rss_pico_mb" in fila else "")
+            + (f"  ✗ {fila['error']}" if "error" in fila else "")
+        )
+    return resultados
+
+# ============================
+# COMPARACIÓN ENTRE VERSIONES
+# ============================
+
+def comparar(actual: list[dict], previo_json: Path) -> pd.DataFrame:
+    """Tiempos y picos de esta corrida contra los de un JSON anterior."""
+    previo = pd.DataFrame(json.loads(previo_json.read_text(encoding="utf-8"))["resultados"])
+    tabla = pd.DataFrame(actual).merge(
+        previo, on=["filas", "etapa"], how="inner", suffixes=("", "_previo")
+    )
+    tabla["aceleracion"] = (tabla["segundos_previo"] / tabla["segundos"].clip(lower=1e-9)).round(2)
+    columnas = ["filas", "etapa", "segundos_previo", "segundos", "aceleracion"]
+    if "pico_mb" in tabla and "pico_mb_previo" in tabla:
+        columnas += ["pico_mb_previo", "pico_mb"]
+    return tabla[columnas]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark por etapa del depurador (tiempo y pico de memoria) sobre tickets sintéticos."
+    )
+    parser.add_argument(
+        "--tamanos",
+        type=int,
+        nargs="+",
+        default=TAMANOS,
+        help=(
+            "Cantidades de filas a medir (default: 100000 1000000 10000000). "
+            f"Con --formato xlsx se omiten las mayores a {generar_tickets.MAX_FILAS_XLSX}"
+        ),
+    )
+    parser.add_argument(
+        "--formato",
+        choices=("csv", "txt", "xlsx"),
+        default="csv",
+        help=(
+            "Formato del ticket que se lee en la etapa de lectura. Un .xlsx admite "
+            f"hasta {generar_tickets.MAX_FILAS_XLSX} filas: los tamaños mayores se omiten"
+        ),
+    )
+    parser.add_argument(
+        "--mezcla",
+        nargs="+",
+        metavar="ESTADO:SUBESTADO=PESO",
+        help="Mezcla de Estado/Sub-Estado de los tickets (mismo formato que generar_tickets.py)",
+    )
+    parser.add_argument(
+        "--pantallas",
+        action="store_true",
+        help=(
+            "Mide también las pantallas de la app Streamlit (una sesión de AppTest por "
+            f"tamaño, hasta {MAX_FILAS_PANTALLAS} filas; necesita streamlit)"
+        ),
+    )
+    parser.add_argument(
+        "--app",
+        type=Path,
+        default=Path(__file__).with_name("main.py"),
+        help="Script de la app para --pantallas (default: main.py junto a este archivo)",
+    )
+    parser.add_argument(
+        "--salida",
+        type=Path,
+        default=Path(f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"),
+        help="JSON con los resultados",
+    )
+    parser.add_argument(
+        "--comparar",
+        type=Path,
+        help="JSON de una corrida anterior para comparar tiempos",
+    )
+    parser.add_argument(
+        "--etiqueta",
+        default="",
+        help="Versión / rama que se está midiendo (queda en el JSON)",
+    )
+    parser.add_argument(
+        "--sin-memoria",
+        action="store_true",
+        help="No mide el pico de memoria (evita correr cada etapa dos veces)",
+    )
+    parser.add_argument(
+        "--max-filas-referencia",
+        type=int,
+        default=MAX_FILAS_REFERENCIA,
+        help="Tamaño máximo en el que se miden construir_resumen_por_ani / etiquetar_resumen",
+    )
+    parser.add_argument(
+        "--semilla",
+        type=int,
+        default=0,
+        help="Semilla de los tickets generados",
+    )
+    args = parser.parse_args()
+
+    try:
+        mezcla = generar_tickets.leer_mezcla(args.mezcla) if args.mezcla else None
+    except ValueError as e:
+        parser.error(str(e))
+    if args.pantallas and not args.app.exists():
+        parser.error(f"No se encuentra la app: {args.app}")
+
+    tamanos = args.tamanos
+    if args.formato == "xlsx":
+        omitidos = [filas for filas in tamanos if filas > generar_tickets.MAX_FILAS_XLSX]
+        tamanos = [filas for filas in tamanos if filas <= generar_tickets.MAX_FILAS_XLSX]
+        for filas in omitidos:
+            print(f"Se omite {filas} filas: un .xlsx admite hasta {generar_tickets.MAX_FILAS_XLSX}")
+
+    if not args.sin_memoria:
+        comprobar_medicion_anidada()
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        for filas in tamanos:
+            print(f"\n=== {filas} filas ===")
+            resultados += medir_tamano(
+                filas,
+                Path(carpeta),
+                args.formato,
+                not args.sin_memoria,
+                args.max_filas_referencia,
+                args.semilla,
+                mezcla,
+            )
+            if args.pantallas and filas > MAX_FILAS_PANTALLAS:
+                print(f"  (pantallas omitidas: más de {MAX_FILAS_PANTALLAS} filas)")
+            elif args.pantallas:
+                resultados += medir_pantallas(filas, args.app.resolve(), args.semilla, timeout=300.0)
+
+    args.salida.write_text(
+        json.dumps(
+            {
+                "etiqueta": args.etiqueta,
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "pandas": pd.__version__,
+                "numpy": np.__version__,
+                "plataforma": platform.platform(),
+                "formato": args.formato,
+                "mezcla": args.mezcla,
+                "semilla": args.semilla,
+                "resultados": resultados,
+            },
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    print(f"\nResultados guardados en {args.salida}")
+
+    if args.comparar:
+        print(f"\nComparación contra {args.comparar}:")
+        print(comparar(resultados, args.comparar).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,141 @@
+import logging
+import sys
+import time
+import tracemalloc
+import unicodedata
+import numpy as np
 import pandas as pd
 
-from typing import Optional, Tuple
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import resource  # no existe en Windows
+except ImportError:
+    resource = None
+
+logger = logging.getLogger("depurador_bases")
+
+@dataclass(frozen=True)
+class EventoEtapa:
+    """
+    Medición de una etapa del procesamiento (lectura, fechas, resumen...).
+
+    - segundos / cpu_segundos: tiempo de reloj y de CPU del proceso
+    - filas_entrada / filas_salida: None si la etapa no las informa
+    - rss_pico_mb: pico de memoria del proceso al terminar la etapa
+      (None donde no hay `resource`, ej. Windows)
+    - tracemalloc_mb: pico de tracemalloc al terminar la etapa, por encima
+      de lo que había al empezar (solo si tracemalloc está activo). El pico
+      no se reinicia (sería borrarle el suyo a quien esté midiendo afuera):
+      si el pico vino de antes de la etapa, esto es una cota superior
+    """
+
+    etapa: str
+    segundos: float
+    cpu_segundos: float
+    filas_entrada: Optional[int] = None
+    filas_salida: Optional[int] = None
+    rss_pico_mb: Optional[float] = None
+    tracemalloc_mb: Optional[float] = None
+
+    def texto(self) -> str:
+        """Resumen de una línea para barras de estado y consola."""
+        partes = [f"{self.etapa}: {self.segundos:.2f} s (CPU {self.cpu_segundos:.2f} s)"]
+        if self.filas_entrada is not None and self.filas_salida is not None:
+            partes.append(f"{self.filas_entrada} → {self.filas_salida} filas")
+        elif self.filas_salida is not None:
+            partes.append(f"{self.filas_salida} filas")
+        if self.tracemalloc_mb is not None:
+            partes.append(f"+{self.tracemalloc_mb:.1f} MB")
+        elif self.rss_pico_mb is not None:
+            partes.append(f"RSS {self.rss_pico_mb:.0f} MB")
+        return ", ".join(partes)
+
+_SUSCRIPTORES: List[Callable[[EventoEtapa], None]] = []
+
+def suscribir_etapas(callback: Callable[[EventoEtapa], None]) -> Callable[[], None]:
+    """
+    Registra `callback(evento)` para cada etapa medida (en el hilo que corre
+    la etapa). Devuelve la función que cancela la suscripción.
+    Los eventos también van al logger "depurador_bases" (nivel INFO, con el
+    evento como diccionario en `record.etapa`).
+    """
+    _SUSCRIPTORES.append(callback)
+    return lambda: _SUSCRIPTORES.remove(callback)
+
+@contextmanager
+def escuchar_etapas(callback: Callable[[EventoEtapa], None]) -> Iterator[None]:
+    """Suscripción limitada a un bloque `with`."""
+    cancelar = suscribir_etapas(callback)
+    try:
+        yield
+    finally:
+        cancelar()
+
+def publicar_etapa(evento: EventoEtapa) -> None:
+    """
+    Entrega un evento a los suscriptores y al logger. También sirve para
+    re-publicar en el proceso principal eventos medidos en un proceso hijo.
+    """
+    logger.info(evento.texto(), extra={"etapa": asdict(evento)})
+    for callback in list(_SUSCRIPTORES):
+        callback(evento)
+
+def _rss_pico_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return pico / 2**20 if sys.platform == "darwin" else pico / 2**10
+
+@contextmanager
+def medir_etapa(etapa: str, filas_entrada: Optional[int] = None) -> Iterator[dict]:
+    """
+    Mide el bloque `with` y publica un EventoEtapa al terminar (si el bloque
+    falla no se publica nada). El bloque puede informar las filas
+    resultantes en medicion["filas_salida"].
+
+        with medir_etapa("lectura") as medicion:
+            df = ...
+            medicion["filas_salida"] = len(df)
+    """
+    medicion: dict = {"filas_salida": None}
+    con_tracemalloc = tracemalloc.is_tracing()
+    if con_tracemalloc:
+        memoria_inicial = tracemalloc.get_traced_memory()[0]
+    inicio, cpu = time.perf_counter(), time.process_time()
+
+    yield medicion
+
+    segundos = time.perf_counter() - inicio
+    cpu_segundos = time.process_time() - cpu
+    publicar_etapa(
+        EventoEtapa(
+            etapa=etapa,
+            segundos=segundos,
+            cpu_segundos=cpu_segundos,
+            filas_entrada=filas_entrada,
+            filas_salida=medicion["filas_salida"],
+            rss_pico_mb=_rss_pico_mb(),
+            tracemalloc_mb=(
+                max(0, tracemalloc.get_traced_memory()[1] - memoria_inicial) / 2**20
+                if con_tracemalloc
+                else None
+            ),
+        )
+    )
+
+# Turnos reales (nombre, hora decimal desde, hora decimal hasta):
+# Mañana 10:00–14:59 (≈ 10–15)
+# Tarde  16:30–20:29 (≈ 16.5–20.5)
+TURNOS_POR_DEFECTO: Tuple[Tuple[str, float, float], ...] = (
+    ("Mañana", 10.0, 15.0),
+    ("Tarde", 16.5, 20.5),
+)
 
 def construir_resumen_por_ani(
     df: pd.DataFrame,
@@ -13,31 +148,36 @@ def construir_resumen_por_ani(
     A partir de los llamados brutos arma un resumen por ANI con contadores
     de cada tipo de estado/subestado relevante.
     """
-    work = df.copy()
+    with medir_etapa("normalizacion", len(df)) as medicion:
+        work = df.copy()
 
-    # Normalización básica
-    work[col_ani] = work[col_ani].astype(str).str.strip()
+        # Normalización básica
+        work[col_ani] = work[col_ani].astype(str).str.strip()
 
-    estado_norm = work[col_estado].astype(str).str.strip().str.lower()
-    estado_norm_sin_espacios = estado_norm.str.replace(" ", "", regex=False)
+        estado_norm = work[col_estado].astype(str).str.strip().str.lower()
+        estado_norm_sin_espacios = estado_norm.str.replace(" ", "", regex=False)
 
-    subestado_norm = (
-        work[col_subestado].fillna("").astype(str).str.strip().str.lower()
-    )
-    subestado_norm_sin_espacios = subestado_norm.str.replace(" ", "", regex=False)
+        subestado_norm = (
+            _normalizar_texto(work[col_subestado])
+        )
+        subestado_norm_sin_espacios = subestado_norm.str.replace(" ", "", regex=False)
 
-    work["_estado_norm"] = estado_norm
-    work["_estado_norm_sin_espacios"] = estado_norm_sin_espacios
-    work["_subestado_norm"] = subestado_norm
-    work["_subestado_norm_sin_espacios"] = subestado_norm_sin_espacios
+        work["_estado_norm"] = estado_norm
+        work["_estado_norm_sin_espacios"] = estado_norm_sin_espacios
+        work["_subestado_norm"] = subestado_norm
+        work["_subestado_norm_sin_espacios"] = subestado_norm_sin_espacios
+        medicion["filas_salida"] = len(work)
 
     # Fecha/hora
-    if col_fecha is not None and col_fecha in work.columns:
-        work[col_fecha] = pd.to_datetime(work[col_fecha], errors="coerce")
-    else:
-        # Creamos una columna dummy para poder usar min/max sin romper
-        col_fecha = "_FECHA_DUMMY"
-        work[col_fecha] = pd.NaT
+    with medir_etapa("fechas", len(work)) as medicion:
+        if col_fecha is not None and col_fecha in work.columns:
+            work[col_fecha] = pd.to_datetime(work[col_fecha], errors="coerce")
+            medicion["filas_salida"] = int(work[col_fecha].notna().sum())
+        else:
+            # Creamos una columna dummy para poder usar min/max sin romper
+            col_fecha = "_FECHA_DUMMY"
+            work[col_fecha] = pd.NaT
+            medicion["filas_salida"] = 0
 
     def resumen_por_grupo(x: pd.DataFrame) -> pd.Series:
         """
@@ -76,12 +216,14 @@ def construir_resumen_por_ani(
             }
         )
 
-    resumen = (
-        work.groupby(col_ani, dropna=True)
-        .apply(resumen_por_grupo)
-        .reset_index()
-        .rename(columns={col_ani: "ANI"})
-    )
+    with medir_etapa("resumen_por_ani", len(work)) as medicion:
+        resumen = (
+            work.groupby(col_ani, dropna=True)
+            .apply(resumen_por_grupo)
+            .reset_index()
+            .rename(columns={col_ani: "ANI"})
+        )
+        medicion["filas_salida"] = len(resumen)
 
     return resumen
 
@@ -121,8 +263,10 @@ def etiquetar_resumen(resumen: pd.DataFrame) -> pd.DataFrame:
     """
     Agrega la columna 'tag_telefono' al resumen por ANI.
     """
-    resumen = resumen.copy()
-    resumen["tag_telefono"] = resumen.apply(asignar_tag, axis=1)
+    with medir_etapa("etiquetado", len(resumen)) as medicion:
+        resumen = resumen.copy()
+        resumen["tag_telefono"] = resumen.apply(asignar_tag, axis=1)
+        medicion["filas_salida"] = len(resumen)
     return resumen
 
 def generar_depurados_y_descartados(
@@ -133,9 +277,11 @@ def generar_depurados_y_descartados(
     - base_depurada: ANIs 'SEGUIR_INTENTANDO'
     - descartados:   resto de tags
     """
-    resumen = resumen.copy()
-    base_depurada = resumen[resumen["tag_telefono"] == "SEGUIR_INTENTANDO"].copy()
-    descartados = resumen[resumen["tag_telefono"] != "SEGUIR_INTENTANDO"].copy()
+    with medir_etapa("separacion", len(resumen)) as medicion:
+        resumen = resumen.copy()
+        base_depurada = resumen[resumen["tag_telefono"] == "SEGUIR_INTENTANDO"].copy()
+        descartados = resumen[resumen["tag_telefono"] != "SEGUIR_INTENTANDO"].copy()
+        medicion["filas_salida"] = len(base_depurada)
     return base_depurada, descartados
 
 def procesar_desde_df(
@@ -150,8 +296,1410 @@ def procesar_desde_df(
     - Construye resumen por ANI
     - Etiqueta con tag_telefono
     - Separa base_depurada y descartados
+
+    Cada etapa (normalizacion, fechas, resumen_por_ani, etiquetado,
+    separacion) publica un EventoEtapa; ver suscribir_etapas.
     """
     resumen = construir_resumen_por_ani(df, col_estado, col_subestado, col_ani, col_fecha)
     resumen = etiquetar_resumen(resumen)
     base_depurada, descartados = generar_depurados_y_descartados(resumen)
-    return resumen, base_depurada, descartados
\ No newline at end of file
+    return resumen, base_depurada, descartados
+
+# Columnas de contadores del resumen (mismo orden que construir_resumen_por_ani)
+COLUMNAS_CONTADORES = (
+    "intentos_totales",
+    "intentos_answer_agent",
+    "intentos_answering_machine",
+    "intentos_no_answer",
+    "intentos_busy",
+    "intentos_unallocated",
+    "intentos_rejected",
+)
+
+# Tags en orden de prioridad (el último es el "resto")
+TAGS = ("INVALIDO", "CONTACTADO", "SOLO_BUZON", "NO_ATIENDE", "RECHAZA", "SEGUIR_INTENTANDO")
+
+# Umbrales de asignar_tag (>= N intentos de esa categoría)
+UMBRALES_TAG: Dict[str, int] = {
+    "unallocated": 3,
+    "answering_machine": 5,
+    "no_answer": 6,
+    "rejected": 3,
+}
+
+def _normalizar_texto(serie: pd.Series) -> pd.Series:
+    """
+    Texto sin espacios a los costados y en minúscula, con los vacíos como "".
+    En columnas category se normaliza cada categoría una sola vez.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = pd.Series(serie.cat.categories).astype(str).str.strip().str.lower()
+        valores = np.append(categorias.to_numpy(dtype=object), "")  # código -1 (vacío) -> ""
+        return pd.Series(valores[serie.cat.codes.to_numpy()], index=serie.index, dtype=object)
+    return serie.fillna("").astype(str).str.strip().str.lower()
+
+def mascara_answer_agent(
+    df: pd.DataFrame,
+    col_estado: str,
+    col_subestado: str,
+) -> np.ndarray:
+    """ANSWER con subestado que contenga la palabra "agent" (CONTACTADO)."""
+    est_sin = _normalizar_texto(df[col_estado]).str.replace(" ", "", regex=False)
+    sub_full = _normalizar_texto(df[col_subestado])
+    return ((est_sin == "answer") & sub_full.str.contains(r"\bagent\b")).to_numpy()
+
+def primer_contacto_por_ani(
+    df: pd.DataFrame,
+    col_estado: str,
+    col_subestado: str,
+    col_ani: str,
+    col_fecha: str,
+) -> pd.DataFrame:
+    """
+    Por ANI: en qué intento (orden cronológico) llegó el primer ANSWER-AGENT
+    y cuánto tardó desde el primer llamado.
+
+    Un único orden estable sobre claves enteras (código de ANI, fecha) y
+    reducciones por segmento (reduceat); no copia la tabla. Los llamados sin
+    fecha válida no cuentan como intento.
+
+    Columnas: ANI, intentos_con_fecha, primer_intento_agent (Int64, vacío si
+    nunca atendió un agente), tiempo_a_primer_contacto (timedelta).
+    """
+    fechas = pd.to_datetime(df[col_fecha], errors="coerce")
+    validas = fechas.notna().to_numpy()
+
+    cod_ani, claves = pd.factorize(df[col_ani].astype(str).str.strip().to_numpy()[validas])
+    tiempos = fechas.to_numpy(dtype="datetime64[ns]")[validas].view(np.int64)
+    agent = mascara_answer_agent(df, col_estado, col_subestado)[validas]
+
+    n = len(cod_ani)
+    if n == 0:
+        return pd.DataFrame(
+            {
+                "ANI": pd.Series(dtype=object),
+                "intentos_con_fecha": pd.Series(dtype=np.int64),
+                "primer_intento_agent": pd.Series(dtype="Int64"),
+                "tiempo_a_primer_contacto": pd.Series(dtype="timedelta64[ns]"),
+            }
+        )
+
+    orden = np.lexsort((tiempos, cod_ani))
+    cod_ord = cod_ani[orden]
+    inicios = np.flatnonzero(np.r_[True, cod_ord[1:] != cod_ord[:-1]])
+    largos = np.diff(np.r_[inicios, n])
+
+    # Número de intento dentro de cada ANI (1, 2, 3, ...)
+    intento = np.arange(1, n + 1) - np.repeat(inicios, largos)
+    agent_ord = agent[orden]
+    tiempos_ord = tiempos[orden]
+
+    sin_agent = np.iinfo(np.int64).max
+    primer = np.minimum.reduceat(np.where(agent_ord, intento, sin_agent), inicios)
+    t_agent = np.minimum.reduceat(np.where(agent_ord, tiempos_ord, sin_agent), inicios)
+
+    tiene = primer != sin_agent
+    demora = np.where(tiene, t_agent - tiempos_ord[inicios], 0).view("timedelta64[ns]")
+
+    return pd.DataFrame(
+        {
+            "ANI": claves[cod_ord[inicios]],
+            "intentos_con_fecha": largos,
+            "primer_intento_agent": pd.Series(np.where(tiene, primer, 0), dtype="Int64").where(
+                tiene, pd.NA
+            ),
+            "tiempo_a_primer_contacto": pd.Series(demora).where(tiene, pd.NaT),
+        }
+    )
+
+def marcar_categorias(
+    df: pd.DataFrame,
+    col_estado: str,
+    col_subestado: str,
+) -> pd.DataFrame:
+    """
+    Máscaras por categoría de cada llamado (mismas reglas que
+    construir_resumen_por_ani), calculadas una sola vez sobre toda la tabla.
+    """
+    est_sin = _normalizar_texto(df[col_estado]).str.replace(" ", "", regex=False)
+    sub_full = _normalizar_texto(df[col_subestado])
+    sub_sin = sub_full.str.replace(" ", "", regex=False)
+
+    es_answer = est_sin == "answer"
+    return pd.DataFrame(
+        {
+            "intentos_totales": np.ones(len(df), dtype=np.int64),
+            "intentos_answer_agent": es_answer & sub_full.str.contains(r"\bagent\b"),
+            "intentos_answering_machine": es_answer
+            & (sub_sin.str.contains("answering") | sub_sin.str.contains("machine")),
+            "intentos_no_answer": est_sin == "noanswer",
+            "intentos_busy": est_sin == "busy",
+            "intentos_unallocated": (est_sin == "unallocated") | (sub_sin == "unallocated"),
+            "intentos_rejected": (est_sin == "rejected") | (sub_sin == "rejected"),
+        },
+        index=df.index,
+    )
+
+def _tags_por_reglas(
+    unallocated: np.ndarray,
+    agent: np.ndarray,
+    machine: np.ndarray,
+    no_answer: np.ndarray,
+    rejected: np.ndarray,
+    umbrales: Dict[str, int],
+) -> np.ndarray:
+    """Código de tag (posición en TAGS) de cada fila, con la prioridad de asignar_tag."""
+    condiciones = [
+        unallocated >= umbrales["unallocated"],
+        agent >= 1,
+        (machine >= umbrales["answering_machine"]) & (agent == 0),
+        (no_answer >= umbrales["no_answer"]) & (agent == 0) & (machine == 0),
+        (rejected >= umbrales["rejected"]) & (agent == 0),
+    ]
+    return np.select(condiciones, range(len(condiciones)), default=len(condiciones))
+
+def asignar_tags(
+    resumen: pd.DataFrame,
+    umbrales: Dict[str, int] = UMBRALES_TAG,
+) -> np.ndarray:
+    """
+    Versión vectorizada de asignar_tag (mismas reglas y prioridad), para
+    resúmenes grandes como el de (BASE, ANI). Los umbrales se pueden variar.
+    """
+    codigos = _tags_por_reglas(
+        resumen["intentos_unallocated"].to_numpy(),
+        resumen["intentos_answer_agent"].to_numpy(),
+        resumen["intentos_answering_machine"].to_numpy(),
+        resumen["intentos_no_answer"].to_numpy(),
+        resumen["intentos_rejected"].to_numpy(),
+        umbrales,
+    )
+    return np.asarray(TAGS, dtype=object)[codigos]
+
+def construir_resumen_por_base_ani(
+    df: pd.DataFrame,
+    col_estado: str,
+    col_subestado: str,
+    col_ani: str,
+    col_base: str,
+    col_fecha: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Resumen por (BASE, ANI) en una sola pasada: máscaras vectorizadas y un
+    único groupby con sumas / min / max. Los llamados sin base quedan con
+    BASE vacía (no se pierden para el resumen global).
+    """
+    work = marcar_categorias(df, col_estado, col_subestado)
+    work["ANI"] = df[col_ani].astype(str).str.strip()
+    work["BASE"] = df[col_base]
+    if col_fecha is not None and col_fecha in df.columns:
+        work["primer_llamado"] = pd.to_datetime(df[col_fecha], errors="coerce")
+    else:
+        work["primer_llamado"] = pd.NaT
+    work["ultimo_llamado"] = work["primer_llamado"]
+
+    agregados = {c: "sum" for c in COLUMNAS_CONTADORES}
+    agregados.update({"primer_llamado": "min", "ultimo_llamado": "max"})
+
+    return (
+        work.groupby(["BASE", "ANI"], sort=True, dropna=False)
+        .agg(agregados)
+        .reset_index()
+    )
+
+def resumen_global_desde_base_ani(resumen_base_ani: pd.DataFrame) -> pd.DataFrame:
+    """
+    Resumen por ANI (mismas columnas que construir_resumen_por_ani) armado
+    sumando las filas (BASE, ANI): no vuelve a recorrer los llamados.
+    """
+    agregados = {c: "sum" for c in COLUMNAS_CONTADORES}
+    agregados.update({"primer_llamado": "min", "ultimo_llamado": "max"})
+    return resumen_base_ani.groupby("ANI", sort=True).agg(agregados).reset_index()
+
+def procesar_por_campana(
+    df: pd.DataFrame,
+    col_estado: str,
+    col_subestado: str,
+    col_ani: str,
+    col_base: str,
+    col_fecha: Optional[str] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Flujo multi-campaña:
+    - Resumen por (BASE, ANI) con 'tag_campana' (reglas sobre los intentos
+      de esa base) y 'tag_telefono' (reglas sobre todos los intentos del ANI)
+    - Resumen global por ANI con 'tag_telefono', derivado del anterior
+    """
+    por_base = construir_resumen_por_base_ani(
+        df, col_estado, col_subestado, col_ani, col_base, col_fecha
+    )
+    resumen = resumen_global_desde_base_ani(por_base)
+    resumen["tag_telefono"] = asignar_tags(resumen)
+
+    por_base["tag_campana"] = asignar_tags(por_base)
+    pos = pd.Index(resumen["ANI"]).get_indexer(por_base["ANI"])
+    por_base["tag_telefono"] = resumen["tag_telefono"].to_numpy()[pos]
+    return por_base, resumen
+
+def describir_turnos(turnos: Sequence[Tuple[str, float, float]]) -> str:
+    """
+    Texto corto para mostrar una tabla de turnos (ej: "Mañana 10–15, Tarde 16:30–20:30").
+    """
+
+    def hhmm(h: float) -> str:
+        horas, minutos = int(h), int(round((h - int(h)) * 60))
+        return f"{horas}" if minutos == 0 else f"{horas}:{minutos:02d}"
+
+    return ", ".join(f"{nombre} {hhmm(desde)}–{hhmm(hasta)}" for nombre, desde, hasta in turnos)
+
+def clasificar_turnos(
+    fechas: pd.Series,
+    bases: Optional[pd.Series] = None,
+    turnos_por_base: Optional[Dict[str, Sequence[Tuple[str, float, float]]]] = None,
+    turnos: Sequence[Tuple[str, float, float]] = TURNOS_POR_DEFECTO,
+) -> pd.DataFrame:
+    """
+    Clasifica cada llamado en franja horaria y turno con una sola pasada
+    vectorizada (searchsorted sobre los bordes de la tabla de turnos).
+
+    - turnos: tabla por defecto [(nombre, desde, hasta), ...] en hora decimal.
+    - turnos_por_base: tabla propia para algunas campañas (clave = BASE).
+
+    Devuelve un DataFrame alineado con `fechas` con:
+    - HORA_DECIMAL:   ej 16:30 -> 16.5
+    - FRANJA_HORARIA: hora entera (0–23)
+    - TURNO:          categórico, NaN fuera de rango o sin fecha
+    """
+    fechas = pd.to_datetime(fechas, errors="coerce")
+    hora = fechas.dt.hour.to_numpy(dtype="float64", na_value=np.nan)
+    minuto = fechas.dt.minute.to_numpy(dtype="float64", na_value=np.nan)
+    hora_decimal = hora + minuto / 60.0
+
+    tablas = [list(turnos)]
+    if turnos_por_base:
+        tablas.extend(list(t) for t in turnos_por_base.values())
+
+    # Categorías: todos los nombres de turno en orden de aparición
+    categorias: list[str] = []
+    for tabla in tablas:
+        for nombre, _, _ in tabla:
+            if nombre not in categorias:
+                categorias.append(nombre)
+
+    def codigos_segun_tabla(h: np.ndarray, tabla) -> np.ndarray:
+        if not tabla:
+            return np.full(len(h), -1, dtype=np.int8)
+        tabla = sorted(tabla, key=lambda t: t[1])
+        desde = np.array([t[1] for t in tabla], dtype="float64")
+        hasta = np.array([t[2] for t in tabla], dtype="float64")
+        cod = np.array([categorias.index(t[0]) for t in tabla], dtype=np.int8)
+
+        pos = np.searchsorted(desde, h, side="right") - 1
+        pos_ok = np.clip(pos, 0, None)
+        dentro = (pos >= 0) & (h < hasta[pos_ok])  # NaN nunca queda dentro
+        return np.where(dentro, cod[pos_ok], -1).astype(np.int8)
+
+    codigos = codigos_segun_tabla(hora_decimal, list(turnos))
+
+    if turnos_por_base and bases is not None:
+        bases_str = bases.astype(str).to_numpy()
+        for base, tabla in turnos_por_base.items():
+            mask = bases_str == str(base)
+            if mask.any():
+                codigos[mask] = codigos_segun_tabla(hora_decimal[mask], list(tabla))
+
+    return pd.DataFrame(
+        {
+            "HORA_DECIMAL": hora_decimal,
+            "FRANJA_HORARIA": pd.array(hora, dtype="Int8"),
+            "TURNO": pd.Categorical.from_codes(codigos, categories=categorias),
+        },
+        index=fechas.index,
+    )
+
+
+def _bitmap_desde_filas(filas: np.ndarray, n_bytes: int) -> np.ndarray:
+    """
+    Arma un bitmap empaquetado (1 bit por fila, orden de np.packbits) a partir
+    de posiciones de fila. Cada bit de un mismo byte es distinto, así que la
+    suma por byte equivale a un OR.
+    """
+    bits = (0x80 >> (filas & 7)).astype(np.float64)
+    return np.bincount(filas >> 3, weights=bits, minlength=n_bytes).astype(np.uint8)
+
+def construir_indice_bitmap(
+    df: pd.DataFrame,
+    columnas: Iterable[str],
+    col_duracion: Optional[str] = None,
+) -> dict:
+    """
+    Índice para el filtro detallado, armado una sola vez por dataset:
+
+    - por cada columna categórica (Estado, Sub-Estado, BASE...): un bitmap
+      empaquetado por valor (matriz valores x bytes)
+    - duración: filas ordenadas por duración (row-ids ordenados), para
+      resolver un rango con dos searchsorted
+
+    Cualquier combinación de filtros se resuelve con AND/OR de bitmaps.
+    """
+    n = len(df)
+    n_bytes = (n + 7) // 8
+    indice: dict = {"n": n, "columnas": {}, "duracion": None}
+
+    for col in columnas:
+        codigos, valores = pd.factorize(df[col], sort=False)  # NaN -> -1
+        codigos = codigos.astype(np.int64)
+        orden = np.argsort(codigos, kind="stable")
+        cortes = np.searchsorted(codigos[orden], np.arange(len(valores) + 1))
+
+        bitmaps = np.empty((len(valores), n_bytes), dtype=np.uint8)
+        for k in range(len(valores)):
+            bitmaps[k] = _bitmap_desde_filas(orden[cortes[k]:cortes[k + 1]], n_bytes)
+
+        indice["columnas"][col] = {
+            "valores": pd.Index(valores),
+            "bitmaps": bitmaps,
+            "tiene_nulos": bool((codigos < 0).any()),
+        }
+
+    if col_duracion is not None:
+        dur = pd.to_numeric(df[col_duracion], errors="coerce").to_numpy(dtype="float64")
+        orden_dur = np.argsort(dur, kind="stable")  # NaN quedan al final
+        indice["duracion"] = {"orden": orden_dur, "valores": dur[orden_dur]}
+
+    return indice
+
+def filtrar_por_indice(
+    indice: dict,
+    seleccion: Dict[str, Sequence],
+    rango_duracion: Optional[Tuple[float, float]] = None,
+    filas: Sequence[Optional[np.ndarray]] = (),
+) -> np.ndarray:
+    """
+    Resuelve los filtros contra el índice de construir_indice_bitmap y
+    devuelve las posiciones de fila (ordenadas) que cumplen todo:
+
+    - seleccion: {columna: valores aceptados}  (OR dentro de la columna)
+    - rango_duracion: (min, max) inclusive; las duraciones vacías nunca entran
+    - filas: posiciones ya resueltas por otros índices (búsqueda de ANI,
+      filas de las bases elegidas); None = sin restricción
+
+    Las columnas con todos sus valores seleccionados (y sin nulos) no se tocan.
+    """
+    n = indice["n"]
+    n_bytes = (n + 7) // 8
+    acumulado: Optional[np.ndarray] = None
+
+    def combinar(bitmap: np.ndarray) -> None:
+        nonlocal acumulado
+        acumulado = bitmap if acumulado is None else (acumulado & bitmap)
+
+    for col, valores_sel in seleccion.items():
+        info = indice["columnas"][col]
+        codigos = info["valores"].get_indexer(list(valores_sel))
+        codigos = np.unique(codigos[codigos >= 0])
+
+        if len(codigos) == len(info["valores"]) and not info["tiene_nulos"]:
+            continue
+        if len(codigos) == 0:
+            return np.empty(0, dtype=np.int64)
+        combinar(np.bitwise_or.reduce(info["bitmaps"][codigos], axis=0))
+
+    if rango_duracion is not None and indice["duracion"] is not None:
+        dur = indice["duracion"]
+        desde = np.searchsorted(dur["valores"], rango_duracion[0], side="left")
+        hasta = np.searchsorted(dur["valores"], rango_duracion[1], side="right")
+        combinar(_bitmap_desde_filas(dur["orden"][desde:hasta], n_bytes))
+
+    for conjunto in filas:
+        if conjunto is not None:
+            combinar(_bitmap_desde_filas(np.asarray(conjunto, dtype=np.int64), n_bytes))
+
+    if acumulado is None:
+        return np.arange(n, dtype=np.int64)
+
+    return np.flatnonzero(np.unpackbits(acumulado, count=n))
+
+
+def construir_indice_ani(anis: pd.Series) -> dict:
+    """
+    Índice de subcadenas para buscar ANI "contiene", armado una vez por dataset:
+
+    - claves: ANIs distintos (en minúscula, tal como se comparan)
+    - trigramas: índice invertido trigrama -> ids de ANI (CSR ordenado)
+    - ANI -> filas: offsets sobre las filas ordenadas por ANI
+    """
+    # Factorizamos los valores crudos y pasamos a texto solo los distintos
+    codigos_crudos, unicos = pd.factorize(anis, sort=False, use_na_sentinel=False)
+    texto_unicos = pd.Series(unicos, dtype=object).astype(str).str.lower()
+    remapeo, claves = pd.factorize(texto_unicos, sort=False)
+    codigos = remapeo.astype(np.int64)[codigos_crudos]
+
+    # ANI -> filas (offsets tipo CSR)
+    orden_filas = np.argsort(codigos, kind="stable")
+    offsets = np.searchsorted(codigos[orden_filas], np.arange(len(claves) + 1))
+
+    # Trigramas sobre los bytes UTF-8 de cada ANI distinto
+    claves_bytes = np.array([c.encode("utf-8") for c in claves], dtype=bytes)
+    largo_max = claves_bytes.dtype.itemsize
+    if len(claves) == 0 or largo_max < 3:
+        tri_claves = np.empty(0, dtype=np.int64)
+        tri_ids = np.empty(0, dtype=np.int64)
+    else:
+        matriz = claves_bytes.view(np.uint8).reshape(len(claves), largo_max).astype(np.int64)
+        largos = np.char.str_len(claves_bytes)
+        tri = (matriz[:, :-2] << 16) | (matriz[:, 1:-1] << 8) | matriz[:, 2:]
+        validos = np.arange(largo_max - 2)[None, :] + 3 <= largos[:, None]
+        ids = np.broadcast_to(np.arange(len(claves))[:, None], tri.shape)
+
+        # Pares (trigrama, id) únicos, ordenados por trigrama y luego por id
+        pares = np.unique((tri[validos] << 32) | ids[validos])
+        tri_claves = pares >> 32
+        tri_ids = pares & 0xFFFFFFFF
+
+    tri_unicos, tri_inicio = np.unique(tri_claves, return_index=True)
+    tri_inicio = np.append(tri_inicio, len(tri_claves))
+
+    return {
+        "claves": pd.Index(claves),
+        "orden_filas": orden_filas,
+        "offsets": offsets,
+        "tri_unicos": tri_unicos,
+        "tri_inicio": tri_inicio,
+        "tri_ids": tri_ids,
+    }
+
+def buscar_ids_ani(indice: dict, texto: str) -> np.ndarray:
+    """
+    Ids de los ANIs distintos que contienen `texto` (sin distinguir mayúsculas).
+    Con 3 o más caracteres intersecta las listas de trigramas y verifica solo
+    los candidatos; con menos, recorre los ANIs distintos (no las filas).
+    """
+    texto = texto.lower()
+    claves = indice["claves"]
+    patron = texto.encode("utf-8")
+
+    if len(patron) < 3:
+        candidatos = np.arange(len(claves))
+    else:
+        trigramas = np.unique(
+            [(patron[i] << 16) | (patron[i + 1] << 8) | patron[i + 2] for i in range(len(patron) - 2)]
+        )
+        pos = np.searchsorted(indice["tri_unicos"], trigramas)
+        if (pos >= len(indice["tri_unicos"])).any() or (
+            indice["tri_unicos"][np.minimum(pos, len(indice["tri_unicos"]) - 1)] != trigramas
+        ).any():
+            return np.empty(0, dtype=np.int64)
+
+        listas = [
+            indice["tri_ids"][indice["tri_inicio"][p]:indice["tri_inicio"][p + 1]] for p in pos
+        ]
+        listas.sort(key=len)
+        candidatos = listas[0]
+        for lista in listas[1:]:
+            candidatos = np.intersect1d(candidatos, lista, assume_unique=True)
+            if len(candidatos) == 0:
+                return np.empty(0, dtype=np.int64)
+
+    coincide = claves[candidatos].str.contains(texto, regex=False)
+    return np.asarray(candidatos, dtype=np.int64)[np.asarray(coincide, dtype=bool)]
+
+def filas_de_anis(indice: dict, ids: np.ndarray) -> np.ndarray:
+    """Posiciones de fila (ordenadas) de los ANIs dados, vía la tabla de offsets."""
+    inicio = indice["offsets"][ids]
+    largos = indice["offsets"][ids + 1] - inicio
+    total = int(largos.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    base = np.repeat(inicio - (np.cumsum(largos) - largos), largos)
+    return np.sort(indice["orden_filas"][base + np.arange(total)])
+
+def buscar_ani(indice: dict, texto: str) -> np.ndarray:
+    """Posiciones de fila cuyo ANI contiene `texto`."""
+    return filas_de_anis(indice, buscar_ids_ani(indice, texto))
+
+
+def construir_histograma_cortes(
+    resumen: pd.DataFrame,
+    indice_ani_base: Optional[dict] = None,
+) -> dict:
+    """
+    Histogramas acumulados de intentos_totales para el simulador de cortes,
+    armados una sola vez por dataset.
+
+    - indice_ani_base: índice de construir_indice_ani_base (alineado con
+      `resumen`) para tener un ámbito por campaña.
+
+    Ámbito 0 = todas las bases; ámbito i = bases[i - 1]. Por ámbito guarda:
+    - total:        ANIs del ámbito
+    - sin_contacto: ANIs que nunca tuvieron ANSWER-AGENT
+    - max_intentos: máximo de intentos_totales
+    - supervivencia[ámbito, t]: ANIs sin contacto con intentos_totales >= t
+    """
+    intentos = resumen["intentos_totales"].to_numpy(dtype=np.int64)
+    sin_contacto = resumen["intentos_answer_agent"].to_numpy() == 0
+
+    ambito = np.zeros(len(resumen), dtype=np.int64)
+    filas = np.arange(len(resumen))
+    bases: list[str] = []
+
+    if indice_ani_base is not None:
+        offsets = indice_ani_base["base_ani_offsets"]
+        bases = list(indice_ani_base["bases"])
+        codigos = np.repeat(np.arange(len(bases)), np.diff(offsets))
+        ambito = np.concatenate([ambito, codigos + 1])
+        filas = np.concatenate([filas, indice_ani_base["base_ani_ids"]])
+
+    n_ambitos = len(bases) + 1
+    ancho = int(intentos.max(initial=0)) + 2  # columna extra: "más que el máximo" = 0
+
+    claves = ambito * ancho + intentos[filas]
+    hist_total = np.bincount(claves, minlength=n_ambitos * ancho).reshape(n_ambitos, ancho)
+    hist_sin = np.bincount(
+        claves[sin_contacto[filas]], minlength=n_ambitos * ancho
+    ).reshape(n_ambitos, ancho)
+
+    # supervivencia[:, t] = suma de hist_sin[:, v] para v >= t
+    supervivencia = np.cumsum(hist_sin[:, ::-1], axis=1)[:, ::-1]
+
+    ocupadas = hist_total > 0
+    max_intentos = np.where(
+        ocupadas.any(axis=1), ancho - 1 - np.argmax(ocupadas[:, ::-1], axis=1), 0
+    )
+
+    return {
+        "bases": bases,
+        "total": hist_total.sum(axis=1),
+        "sin_contacto": supervivencia[:, 0],
+        "max_intentos": max_intentos,
+        "supervivencia": supervivencia,
+    }
+
+def simular_corte(histograma: dict, corte: int, base: Optional[str] = None) -> dict:
+    """
+    Escenario del simulador para un corte máximo de intentos, con una lectura
+    de array: se cortan los ANIs sin contacto con intentos_totales > corte.
+    """
+    ambito = 0 if base is None else histograma["bases"].index(str(base)) + 1
+    supervivencia = histograma["supervivencia"][ambito]
+    t = min(max(int(corte) + 1, 0), len(supervivencia) - 1)
+
+    total = int(histograma["total"][ambito])
+    cortados = int(supervivencia[t])
+    return {
+        "total": total,
+        "sin_contacto": int(histograma["sin_contacto"][ambito]),
+        "max_intentos": int(histograma["max_intentos"][ambito]),
+        "cortados": cortados,
+        "seguir": total - cortados,
+    }
+
+
+def _csr(grupos: np.ndarray, valores: np.ndarray, n_grupos: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Agrupa `valores` por `grupos` en formato CSR (offsets, valores ordenados)."""
+    orden = np.lexsort((valores, grupos))
+    offsets = np.searchsorted(grupos[orden], np.arange(n_grupos + 1))
+    return offsets, valores[orden]
+
+def construir_indice_ani_base(
+    df: pd.DataFrame,
+    col_ani: str,
+    col_base: str,
+    anis: Optional[pd.Series] = None,
+) -> dict:
+    """
+    Índice muchos-a-muchos ANI <-> BASE sobre códigos enteros (offsets CSR),
+    armado una vez al cargar el dataset.
+
+    - anis: claves de ANI del resumen (columna "ANI"); si se pasa, el código
+      de cada ANI es su posición en el resumen, así que un ámbito de campaña
+      es directamente resumen.iloc[anis_de_base(...)].
+
+    Guarda:
+    - base -> ANIs   (base_ani_offsets / base_ani_ids)
+    - ANI -> bases   (ani_base_offsets / ani_base_ids)
+    - base -> filas  (base_fila_offsets / base_fila_ids), para filtrar llamados
+    """
+    ani_norm = df[col_ani].astype(str).str.strip()
+    if anis is None:
+        cod_ani, claves = pd.factorize(ani_norm, sort=True)
+        claves = pd.Index(claves)
+    else:
+        claves = pd.Index(anis.astype(str))
+        cod_ani = claves.get_indexer(ani_norm)
+    cod_ani = cod_ani.astype(np.int64)
+
+    cod_base, bases = pd.factorize(df[col_base], sort=True)  # NaN -> -1
+    cod_base = cod_base.astype(np.int64)
+    n_bases = len(bases)
+
+    filas = np.flatnonzero(cod_base >= 0)
+    base_fila_offsets, base_fila_ids = _csr(cod_base[filas], filas, n_bases)
+
+    # Pares (ANI, BASE) distintos
+    validos = (cod_ani >= 0) & (cod_base >= 0)
+    pares = np.unique(cod_ani[validos] * max(n_bases, 1) + cod_base[validos])
+    par_ani = pares // max(n_bases, 1)
+    par_base = pares % max(n_bases, 1)
+
+    base_ani_offsets, base_ani_ids = _csr(par_base, par_ani, n_bases)
+    ani_base_offsets, ani_base_ids = _csr(par_ani, par_base, len(claves))
+
+    return {
+        "anis": claves,
+        "bases": pd.Index(bases).astype(str),
+        "base_ani_offsets": base_ani_offsets,
+        "base_ani_ids": base_ani_ids,
+        "ani_base_offsets": ani_base_offsets,
+        "ani_base_ids": ani_base_ids,
+        "base_fila_offsets": base_fila_offsets,
+        "base_fila_ids": base_fila_ids,
+        "filas_sin_base": len(df) - len(filas),
+    }
+
+def _codigos_base(indice: dict, bases: Iterable) -> np.ndarray:
+    codigos = indice["bases"].get_indexer([str(b) for b in bases])
+    return np.unique(codigos[codigos >= 0])
+
+def anis_de_base(indice: dict, bases: Iterable) -> np.ndarray:
+    """Códigos de ANI (posiciones en el resumen) presentes en alguna de las bases."""
+    codigos = _codigos_base(indice, bases)
+    off, ids = indice["base_ani_offsets"], indice["base_ani_ids"]
+    partes = [ids[off[c]:off[c + 1]] for c in codigos]
+    if not partes:
+        return np.empty(0, dtype=np.int64)
+    return partes[0] if len(partes) == 1 else np.unique(np.concatenate(partes))
+
+def filas_de_base(indice: dict, bases: Iterable) -> Optional[np.ndarray]:
+    """
+    Posiciones de fila de los llamados de las bases dadas. Devuelve None si
+    están todas las bases y ninguna fila quedó sin base (no hay nada que filtrar).
+    """
+    codigos = _codigos_base(indice, bases)
+    if len(codigos) == len(indice["bases"]) and indice["filas_sin_base"] == 0:
+        return None
+    off, ids = indice["base_fila_offsets"], indice["base_fila_ids"]
+    partes = [ids[off[c]:off[c + 1]] for c in codigos]
+    if not partes:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(partes)
+
+def bases_de_ani(indice: dict, codigo_ani: int) -> list:
+    """Bases (campañas) en las que aparece un ANI."""
+    off = indice["ani_base_offsets"]
+    return list(indice["bases"][indice["ani_base_ids"][off[codigo_ani]:off[codigo_ani + 1]]])
+
+
+# Columnas del cubo de contadores, en el orden de _tags_por_reglas
+_COLUMNAS_CUBO = (
+    "intentos_unallocated",
+    "intentos_answer_agent",
+    "intentos_answering_machine",
+    "intentos_no_answer",
+    "intentos_rejected",
+)
+
+def construir_cubo_contadores(resumen: pd.DataFrame, tope: int = 15) -> dict:
+    """
+    Histograma conjunto de los contadores que usan las reglas de tag:
+    tuplas (unallocated, agent, machine, no_answer, rejected) topeadas en
+    `tope` (agent en 0/1) -> cantidad de ANIs e intentos_totales.
+
+    Solo se guardan las celdas ocupadas (unos pocos miles), así que evaluar
+    cualquier combinación de umbrales <= tope no vuelve a recorrer los ANIs.
+    """
+    valores = np.column_stack(
+        [np.minimum(resumen[c].to_numpy(dtype=np.int64), tope) for c in _COLUMNAS_CUBO]
+    )
+    valores[:, 1] = np.minimum(valores[:, 1], 1)
+
+    celdas, inverso = np.unique(valores, axis=0, return_inverse=True)
+    inverso = inverso.ravel()
+    return {
+        "tope": tope,
+        "celdas": celdas.astype(np.uint8 if tope < 256 else np.int64),
+        "anis": np.bincount(inverso, minlength=len(celdas)),
+        "intentos": np.bincount(
+            inverso,
+            weights=resumen["intentos_totales"].to_numpy(dtype=np.float64),
+            minlength=len(celdas),
+        ).astype(np.int64),
+    }
+
+def evaluar_umbrales(cubo: dict, umbrales: Dict[str, int]) -> Dict[str, Tuple[int, int]]:
+    """
+    Tag -> (ANIs, intentos_totales) para una combinación de umbrales, leyendo
+    solo las celdas del cubo. Los umbrales mayores al tope no son exactos.
+    """
+    c = cubo["celdas"]
+    codigos = _tags_por_reglas(c[:, 0], c[:, 1], c[:, 2], c[:, 3], c[:, 4], umbrales)
+    anis = np.bincount(codigos, weights=cubo["anis"], minlength=len(TAGS))
+    intentos = np.bincount(codigos, weights=cubo["intentos"], minlength=len(TAGS))
+    return {tag: (int(anis[i]), int(intentos[i])) for i, tag in enumerate(TAGS)}
+
+
+# Familias con umbral en asignar_tag: clave de UMBRALES_TAG -> columna de contador
+_FAMILIAS_UMBRAL = (
+    ("unallocated", "intentos_unallocated"),
+    ("answering_machine", "intentos_answering_machine"),
+    ("no_answer", "intentos_no_answer"),
+    ("rejected", "intentos_rejected"),
+)
+
+def historias_de_intentos(
+    df: pd.DataFrame,
+    col_estado: str,
+    col_subestado: str,
+    col_ani: str,
+    col_fecha: str,
+    tope: int = 10,
+) -> dict:
+    """
+    Historia cronológica resumida de cada ANI para el optimizador de umbrales.
+
+    Para cada regla y cada umbral k = 1..tope guarda en qué intento se
+    dispararía (k-ésimo unallocated / contestador / no answer / rejected,
+    respetando las condiciones de asignar_tag: sin agente antes y, para
+    NO_ATIENDE, sin contestador antes). También el intento del primer agente
+    y el total de intentos. Las firmas repetidas se juntan con un peso, así
+    la grilla se evalúa sobre unos pocos miles de filas.
+    """
+    fechas = pd.to_datetime(df[col_fecha], errors="coerce")
+    validas = fechas.notna().to_numpy()
+
+    cod_ani, _ = pd.factorize(df[col_ani].astype(str).str.strip().to_numpy()[validas])
+    tiempos = fechas.to_numpy(dtype="datetime64[ns]")[validas].view(np.int64)
+    marcas = marcar_categorias(df, col_estado, col_subestado).iloc[validas]
+
+    n = len(cod_ani)
+    n_anis = int(cod_ani.max()) + 1 if n else 0
+    orden = np.lexsort((tiempos, cod_ani))
+    cod_ord = cod_ani[orden]
+    inicios = np.flatnonzero(np.r_[True, cod_ord[1:] != cod_ord[:-1]]) if n else np.empty(0, int)
+    largos = np.diff(np.r_[inicios, n])
+    base_seg = np.repeat(inicios, largos)
+    intento = np.arange(1, n + 1) - base_seg
+
+    sin_disparo = np.iinfo(np.int32).max
+
+    def posiciones(mascara: np.ndarray) -> np.ndarray:
+        """(n_anis, tope): intento de la k-ésima ocurrencia de la categoría."""
+        m = mascara[orden]
+        acum = np.cumsum(m)
+        previo = np.r_[0, acum][base_seg]
+        k = acum - previo  # ocurrencias hasta esta fila (inclusive) dentro del ANI
+        sel = m & (k <= tope)
+        pos = np.full((n_anis, tope), sin_disparo, dtype=np.int32)
+        pos[cod_ord[sel], k[sel] - 1] = intento[sel]
+        return pos
+
+    agent = posiciones(marcas["intentos_answer_agent"].to_numpy())[:, 0]
+    pos = {clave: posiciones(marcas[col].to_numpy()) for clave, col in _FAMILIAS_UMBRAL}
+
+    antes_agent = agent[:, None]
+    primer_machine = pos["answering_machine"][:, :1]
+    disparos = {
+        "unallocated": pos["unallocated"],
+        "answering_machine": np.where(
+            pos["answering_machine"] < antes_agent, pos["answering_machine"], sin_disparo
+        ),
+        "no_answer": np.where(
+            (pos["no_answer"] < antes_agent) & (pos["no_answer"] < primer_machine),
+            pos["no_answer"],
+            sin_disparo,
+        ),
+        "rejected": np.where(pos["rejected"] < antes_agent, pos["rejected"], sin_disparo),
+    }
+
+    totales = np.zeros(n_anis, dtype=np.int32)
+    totales[cod_ord[inicios]] = largos
+    firmas = np.column_stack(
+        [disparos[clave] for clave, _ in _FAMILIAS_UMBRAL] + [agent, totales]
+    )
+    firmas, peso = np.unique(firmas, axis=0, return_counts=True)
+
+    return {
+        "tope": tope,
+        "sin_disparo": sin_disparo,
+        "disparos": {
+            clave: firmas[:, i * tope:(i + 1) * tope]
+            for i, (clave, _) in enumerate(_FAMILIAS_UMBRAL)
+        },
+        "primer_agent": firmas[:, -2],
+        "totales": firmas[:, -1],
+        "peso": peso,
+    }
+
+def optimizar_umbrales(historias: dict, max_perdida_pct: float = 2.0) -> pd.DataFrame:
+    """
+    Evalúa toda la grilla de umbrales (1..tope por regla) sobre las historias.
+
+    Un ANI se corta en el primer intento en que se dispara alguna regla; se
+    ahorran los intentos posteriores y se pierde el contacto si el primer
+    agente llegó después del corte. Por combinación devuelve ANIs cortados,
+    intentos ahorrados, contactos perdidos y la eficiencia (contactos
+    retenidos por intento realizado).
+
+    - factible: pierde a lo sumo `max_perdida_pct` % de los contactos
+    - pareto: ninguna otra combinación ahorra más intentos perdiendo igual o
+      menos contactos
+    Ordenado por factibilidad y eficiencia.
+    """
+    tope = historias["tope"]
+    sin = historias["sin_disparo"]
+    d = historias["disparos"]
+    agent = historias["primer_agent"]
+    totales = historias["totales"]
+    peso = historias["peso"].astype(np.float64)
+
+    contactos = float(peso[agent != sin].sum())
+    intentos_reales = float((peso * totales).sum())
+
+    # Sin contacto -> 0, así "agente después del corte" nunca es verdadero
+    agent_eff = np.where(agent == sin, 0, agent).astype(np.int32)[:, None, None]
+    totales_3d = totales.astype(np.int32)[:, None, None]
+
+    # Disparo combinado de no_answer x rejected, una sola vez: (firmas, n, r)
+    corte_nr = np.minimum(d["no_answer"][:, :, None], d["rejected"][:, None, :])
+
+    ks = np.arange(1, tope + 1)
+    nn, rr = np.meshgrid(ks, ks, indexing="ij")
+    filas = []
+    for u in ks:
+        for m in ks:
+            base = np.minimum(d["unallocated"][:, u - 1], d["answering_machine"][:, m - 1])
+            corte = np.minimum(base[:, None, None], corte_nr)
+            # corte <= totales si se disparó; si no, totales - sin < 0 y el clip da 0
+            ahorro = np.clip(totales_3d - corte, 0, None)
+
+            filas.append(
+                pd.DataFrame(
+                    {
+                        "unallocated": u,
+                        "answering_machine": m,
+                        "no_answer": nn.ravel(),
+                        "rejected": rr.ravel(),
+                        "anis_cortados": np.tensordot(peso, corte != sin, axes=1).ravel(),
+                        "intentos_ahorrados": np.tensordot(peso, ahorro, axes=1).ravel(),
+                        "contactos_perdidos": np.tensordot(
+                            peso, agent_eff > corte, axes=1
+                        ).ravel(),
+                    }
+                )
+            )
+
+    grilla = pd.concat(filas, ignore_index=True)
+    for col in ("anis_cortados", "intentos_ahorrados", "contactos_perdidos"):
+        grilla[col] = grilla[col].round().astype(np.int64)
+
+    grilla["pct_contactos_perdidos"] = (
+        grilla["contactos_perdidos"] * 100 / contactos if contactos else 0.0
+    )
+    grilla["eficiencia"] = (contactos - grilla["contactos_perdidos"]) / (
+        intentos_reales - grilla["intentos_ahorrados"]
+    ).clip(lower=1)
+    grilla["factible"] = grilla["pct_contactos_perdidos"] <= max_perdida_pct
+
+    # Frente de Pareto: recorriendo por pérdida creciente (y ahorro decreciente),
+    # queda lo que mejora el mejor ahorro visto hasta ahí.
+    orden = grilla.sort_values(
+        ["contactos_perdidos", "intentos_ahorrados"], ascending=[True, False]
+    )
+    mejor_previo = orden["intentos_ahorrados"].cummax().shift(fill_value=-1)
+    grilla["pareto"] = False
+    grilla.loc[orden.index[(orden["intentos_ahorrados"] > mejor_previo).to_numpy()], "pareto"] = True
+
+    return grilla.sort_values(
+        ["factible", "eficiencia", "intentos_ahorrados"], ascending=False
+    ).reset_index(drop=True)
+
+
+# Nombres (normalizados) que puede tener la columna de fecha/hora del ticket
+COLUMNAS_FECHA = ("FECHAINICIO", "FECHAHORA", "INICIO", "LOGTIME", "FECHALLAMADA")
+
+def normalizar_columna(col: str) -> str:
+    """Normaliza nombres de columna: sin acentos, mayúsculas, sin espacios / - / '/'."""
+    col = col.strip()
+    col = "".join(
+        c
+        for c in unicodedata.normalize("NFKD", col)
+        if not unicodedata.combining(c)
+    )
+    col = col.upper()
+    col = col.replace(" ", "").replace("-", "").replace("/", "")
+    return col
+
+def buscar_columna_fecha(columnas: Iterable[str]) -> Optional[str]:
+    """Nombre original de la columna de fecha/hora (o None si no hay)."""
+    mapa = {normalizar_columna(str(c)): c for c in columnas}
+    for candidato in COLUMNAS_FECHA:
+        if candidato in mapa:
+            return mapa[candidato]
+    return None
+
+def detectar_columnas(df: pd.DataFrame) -> Tuple[str, str, str, str]:
+    """
+    Detecta automáticamente columnas de ESTADO, SUBESTADO, ANI y FECHA
+    usando nombres normalizados.
+    """
+    cols_orig = list(df.columns)
+    cols_norm = [normalizar_columna(str(c)) for c in cols_orig]
+
+    mapa = {n: o for n, o in zip(cols_norm, cols_orig)}
+
+    def buscar(posibles: Sequence[str], nombre_logico: str) -> str:
+        for p in posibles:
+            if p in mapa:
+                return mapa[p]
+        raise KeyError(
+            f"No se encontró columna para {nombre_logico}. "
+            f"Columnas disponibles (normalizadas): {cols_norm}"
+        )
+
+    col_estado = buscar(["ESTADO", "STATUS", "STATE"], "ESTADO")
+    col_subestado = buscar(["SUBESTADO", "SUBESTATUS", "SUBSTATE"], "SUBESTADO")
+    col_ani = buscar(
+        ["ANI", "ANITELEFONO", "TELEFONO", "NUMEROTELEFONO", "NUMEROLLAMADO", "NUMERO"],
+        "ANI / TELÉFONO",
+    )
+    col_fecha = buscar(COLUMNAS_FECHA, "FECHA / HORA")
+
+    return col_estado, col_subestado, col_ani, col_fecha
+
+def buscar_columna_base(columnas: Iterable[str]) -> Optional[str]:
+    """Nombre original de la columna de base / campaña (o None si no hay)."""
+    mapa = {normalizar_columna(str(c)): c for c in columnas}
+    for candidato in ("BASE", "NOMBREBASE", "ORIGEN"):
+        if candidato in mapa:
+            return mapa[candidato]
+    return None
+
+@dataclass(frozen=True)
+class VentanaFechas:
+    """
+    Ventana de análisis por fecha del llamado.
+
+    - desde / hasta: días inclusive (None = sin límite)
+    - solo_habiles: solo lunes a viernes
+    - feriados: días que no cuentan como hábiles (con solo_habiles)
+    """
+
+    desde: Optional[date] = None
+    hasta: Optional[date] = None
+    solo_habiles: bool = False
+    feriados: Tuple[date, ...] = ()
+
+    @classmethod
+    def ultimos_dias(
+        cls,
+        dias: int,
+        solo_habiles: bool = True,
+        feriados: Iterable[date] = (),
+        hoy: Optional[date] = None,
+    ) -> "VentanaFechas":
+        """Ventana desde `dias` días antes de hoy (inclusive), sin límite superior."""
+        hoy = hoy or date.today()
+        return cls(
+            desde=hoy - timedelta(days=dias),
+            solo_habiles=solo_habiles,
+            feriados=tuple(feriados),
+        )
+
+    def mascara(self, fechas: pd.Series) -> np.ndarray:
+        """
+        True para las filas dentro de la ventana (las fechas inválidas quedan
+        afuera). Todo sobre datetime64 / np.is_busday, sin objetos date por fila.
+        """
+        valores = pd.to_datetime(fechas, errors="coerce").to_numpy(dtype="datetime64[ns]")
+        dentro = ~np.isnat(valores)
+        dias = valores.astype("datetime64[D]")
+        if self.desde is not None:
+            dentro &= dias >= np.datetime64(self.desde, "D")
+        if self.hasta is not None:
+            dentro &= dias <= np.datetime64(self.hasta, "D")
+        if self.solo_habiles:
+            habiles = np.zeros(len(dias), dtype=bool)
+            habiles[dentro] = np.is_busday(
+                dias[dentro],
+                holidays=np.array(self.feriados, dtype="datetime64[D]"),
+            )
+            dentro &= habiles
+        return dentro
+
+    def filtrar(self, df: pd.DataFrame, col_fecha: str) -> pd.DataFrame:
+        """Filas de `df` dentro de la ventana, con la columna de fecha ya parseada."""
+        fechas = pd.to_datetime(df[col_fecha], errors="coerce")
+        dentro = self.mascara(fechas)
+        if dentro.all():
+            return df.assign(**{col_fecha: fechas})
+        df = df.loc[dentro].copy()
+        df[col_fecha] = fechas[dentro]
+        return df
+
+def leer_ticket(
+    origen,
+    ventana: Optional[VentanaFechas] = None,
+    nombre: Optional[str] = None,
+    filas_por_bloque: int = 200_000,
+) -> pd.DataFrame:
+    """
+    Lee un ticket de Neotel (xls/xlsx/csv/txt) desde una ruta o un archivo
+    abierto (ej. lo que devuelve un uploader).
+
+    Con `ventana`, los CSV se leen por bloques y cada bloque se recorta a la
+    ventana antes de juntarlos, así las filas de afuera nunca se acumulan.
+    Los Excel no se pueden leer por partes: se recortan apenas se leen.
+    Si el ticket no tiene columna de fecha reconocible, la ventana no aplica.
+
+    Publica un EventoEtapa "lectura" con las filas leídas (ya recortadas).
+    """
+    nombre = (nombre or getattr(origen, "name", None) or str(origen)).lower()
+    if isinstance(origen, str):
+        origen = Path(origen)
+
+    with medir_etapa("lectura") as medicion:
+        df = _leer_ticket(origen, ventana, nombre, filas_por_bloque)
+        medicion["filas_salida"] = len(df)
+    return df
+
+def _leer_ticket(
+    origen,
+    ventana: Optional[VentanaFechas],
+    nombre: str,
+    filas_por_bloque: int,
+) -> pd.DataFrame:
+    if nombre.endswith((".csv", ".txt")):
+        opciones = dict(sep=None, engine="python", encoding="latin1")
+        if ventana is None:
+            return pd.read_csv(origen, **opciones)
+
+        col_fecha = buscar_columna_fecha(pd.read_csv(origen, nrows=0, **opciones).columns)
+        if hasattr(origen, "seek"):
+            origen.seek(0)
+        if col_fecha is None:
+            return pd.read_csv(origen, **opciones)
+
+        bloques = [
+            ventana.filtrar(bloque, col_fecha)
+            for bloque in pd.read_csv(origen, chunksize=filas_por_bloque, **opciones)
+        ]
+        return pd.concat(bloques, ignore_index=True)
+
+    if nombre.endswith((".xlsx", ".xlsm", ".xlsb", ".xls")):
+        df = pd.read_excel(origen)
+    else:
+        raise ValueError(f"Formato de archivo no soportado: {nombre}")
+
+    if ventana is not None:
+        col_fecha = buscar_columna_fecha(df.columns)
+        if col_fecha is not None:
+            df = ventana.filtrar(df, col_fecha).reset_index(drop=True)
+    return df
+
+
+def _entero_minimo(minimo: int, maximo: int) -> str:
+    """Tipo entero más chico donde entran [minimo, maximo] (sin signo si no hay negativos)."""
+    tipos = ("uint8", "uint16", "uint32", "uint64") if minimo >= 0 else ("int8", "int16", "int32", "int64")
+    for tipo in tipos:
+        info = np.iinfo(tipo)
+        if info.min <= minimo and maximo <= info.max:
+            return tipo
+    return "int64"
+
+def _es_texto(serie: pd.Series) -> bool:
+    return serie.dtype == object or (
+        pd.api.types.is_string_dtype(serie.dtype)
+        and not isinstance(serie.dtype, pd.CategoricalDtype)
+    )
+
+def plan_de_tipos(
+    df: pd.DataFrame,
+    col_ani: Optional[str] = None,
+    max_pct_categorias: float = 50.0,
+) -> Dict[str, str]:
+    """
+    Tipo compacto para cada columna que conviene cambiar:
+
+    - texto con pocos valores distintos (<= max_pct_categorias % de las
+      filas: Estado, Sub-Estado, BASE...) -> category
+    - col_ani con solo dígitos, sin cero adelante y hasta 18 dígitos ->
+      int64 (al pasarlo a texto queda igual que el original sin espacios)
+    - float -> float32 solo si no se pierde nada (duración en segundos)
+    - enteros -> el entero más chico donde entran
+
+    Las fechas no se tocan: datetime64 ocupa 8 bytes en cualquier unidad.
+    """
+    plan: Dict[str, str] = {}
+    limite = len(df) * max_pct_categorias / 100
+    for col in df.columns:
+        serie = df[col]
+        if col == col_ani:
+            if _es_texto(serie):
+                texto = serie.astype(str).str.strip()
+                if len(texto) and texto.str.fullmatch(r"[1-9]\d{0,17}").all():
+                    plan[col] = "int64"
+            continue
+        if _es_texto(serie):
+            if len(serie) and serie.nunique(dropna=True) <= limite:
+                plan[col] = "category"
+        elif pd.api.types.is_float_dtype(serie.dtype) and serie.dtype != np.float32:
+            valores = serie.to_numpy(dtype=np.float64)
+            if np.array_equal(valores.astype(np.float32).astype(np.float64), valores, equal_nan=True):
+                plan[col] = "float32"
+        elif pd.api.types.is_integer_dtype(serie.dtype) and len(serie) and not serie.isna().any():
+            tipo = _entero_minimo(int(serie.min()), int(serie.max()))
+            if np.dtype(tipo).itemsize < serie.dtype.itemsize:
+                plan[col] = tipo
+    return plan
+
+def compactar_tipos(
+    df: pd.DataFrame,
+    plan: Optional[Dict[str, str]] = None,
+    conservar: Optional[Iterable[str]] = None,
+    col_ani: Optional[str] = None,
+    max_pct_categorias: float = 50.0,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Aplica un plan de tipos (por defecto, plan_de_tipos) y descarta las
+    columnas que no están en `conservar` (None = conservar todas).
+
+    Devuelve (df compacto, reporte) con el reporte por columna: tipo y MB
+    antes / después; las columnas descartadas quedan con tipo_despues vacío.
+    """
+    antes = df.memory_usage(deep=True, index=False)
+    tipos_antes = df.dtypes.astype(str)
+
+    if conservar is not None:
+        conservar = set(conservar)
+        df = df[[c for c in df.columns if c in conservar]]
+    if plan is None:
+        plan = plan_de_tipos(df, col_ani=col_ani, max_pct_categorias=max_pct_categorias)
+
+    cambios = {}
+    for col, tipo in plan.items():
+        if col not in df.columns:
+            continue
+        serie = df[col]
+        if tipo == "int64" and _es_texto(serie):
+            serie = serie.astype(str).str.strip()
+        cambios[col] = serie.astype(tipo)
+    if cambios:
+        df = df.assign(**cambios)
+
+    despues = df.memory_usage(deep=True, index=False)
+    reporte = pd.DataFrame(
+        {
+            "columna": antes.index,
+            "tipo_antes": tipos_antes.reindex(antes.index).to_numpy(),
+            "tipo_despues": df.dtypes.astype(str).reindex(antes.index, fill_value="").to_numpy(),
+            "MB_antes": antes.to_numpy() / 2**20,
+            "MB_despues": despues.reindex(antes.index, fill_value=0).to_numpy() / 2**20,
+        }
+    )
+    return df, reporte
+
+def compactar_resumen(resumen: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    compactar_tipos para un resumen por ANI: contadores intentos_* al entero
+    sin signo más chico (uint8 / uint16) y tags como category. El ANI queda
+    como texto (es la clave contra la que se cruzan los llamados).
+    """
+    plan: Dict[str, str] = {}
+    for col in resumen.columns:
+        serie = resumen[col]
+        if col.startswith("intentos_") and pd.api.types.is_integer_dtype(serie.dtype):
+            if len(serie) and not serie.isna().any():
+                plan[col] = _entero_minimo(min(int(serie.min()), 0), int(serie.max()))
+        elif col.startswith("tag_") and _es_texto(serie):
+            plan[col] = "category"
+    return compactar_tipos(resumen, plan=plan)
+
+def histogramas_contadores(
+    resumen: pd.DataFrame,
+    columnas: Sequence[str] = COLUMNAS_CONTADORES,
+) -> Dict[str, np.ndarray]:
+    """
+    Por columna de contador: cantidad de ANIs con exactamente k intentos
+    (posición k del array). Son sumables entre archivos (ver combinar_histogramas).
+    """
+    return {
+        col: np.bincount(resumen[col].to_numpy(dtype=np.int64)) if len(resumen) else np.zeros(1, np.int64)
+        for col in columnas
+    }
+
+def combinar_histogramas(parciales: Iterable[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Suma histogramas parciales (de distinto largo) columna por columna."""
+    total: Dict[str, np.ndarray] = {}
+    for parcial in parciales:
+        for col, h in parcial.items():
+            previo = total.get(col)
+            if previo is None:
+                total[col] = np.asarray(h, dtype=np.int64).copy()
+                continue
+            largo = max(len(previo), len(h))
+            suma = np.zeros(largo, dtype=np.int64)
+            suma[:len(previo)] += previo
+            suma[:len(h)] += np.asarray(h, dtype=np.int64)
+            total[col] = suma
+    return total
+
+def curvas_supervivencia(histogramas: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    Curvas de supervivencia completas de todos los contadores a la vez: para
+    cada umbral t (0..máximo observado), cuántos ANIs tienen >= t intentos
+    (columna `<contador>`) y qué % del total (`<contador>_pct`).
+    Es la suma acumulada invertida de cada histograma; umbrales mayores al
+    máximo valen 0 (usar .reindex(cortes, fill_value=0)).
+    """
+    largo = max((len(h) for h in histogramas.values()), default=1)
+    datos = {}
+    for col, h in histogramas.items():
+        h = np.pad(np.asarray(h, dtype=np.int64), (0, largo - len(h)))
+        sobreviven = np.cumsum(h[::-1])[::-1]
+        total = sobreviven[0]
+        datos[col] = sobreviven
+        datos[f"{col}_pct"] = sobreviven * 100.0 / total if total else np.zeros(largo)
+    return pd.DataFrame(datos, index=pd.RangeIndex(largo, name="umbral"))
+
+class AcumuladorPorANI:
+    """
+    Resumen por ANI armado bloque a bloque (un CSV leído por partes o desde
+    stdin): la memoria depende de la cantidad de ANIs distintos, no de la
+    cantidad de llamados.
+
+    Por ANI guarda los contadores del resumen, cuántos intentos con fecha
+    lleva y en qué intento llegó el primer ANSWER-AGENT. Los intentos se
+    numeran en el orden en que llegan, así que se asume que el archivo viene
+    en orden cronológico; los ANIs con llamados fuera de orden se cuentan en
+    `anis_desordenados` (para ellos la numeración puede diferir).
+    """
+
+    _SIN_AGENT = np.iinfo(np.int64).max
+    _SIN_FECHA = np.iinfo(np.int64).min
+
+    def __init__(
+        self,
+        col_estado: str,
+        col_subestado: str,
+        col_ani: str,
+        col_fecha: Optional[str] = None,
+    ):
+        self.col_estado = col_estado
+        self.col_subestado = col_subestado
+        self.col_ani = col_ani
+        self.col_fecha = col_fecha
+
+        self.llamados = 0
+        self._claves = pd.Index([], dtype=object)
+        self._contadores = np.zeros((0, len(COLUMNAS_CONTADORES)), dtype=np.int64)
+        self._intentos = np.zeros(0, dtype=np.int64)
+        self._primer_agent = np.zeros(0, dtype=np.int64)
+        self._ultima_fecha = np.zeros(0, dtype=np.int64)
+        self._desordenado = np.zeros(0, dtype=bool)
+
+    @property
+    def anis(self) -> int:
+        return len(self._claves)
+
+    @property
+    def anis_desordenados(self) -> int:
+        return int(self._desordenado[:self.anis].sum())
+
+    def _crecer(self, n: int) -> None:
+        """Agranda los arrays por ANI (al doble) cuando aparecen ANIs nuevos."""
+        capacidad = len(self._intentos)
+        if n <= capacidad:
+            return
+        nueva = max(n, 2 * capacidad, 1024)
+        extra = nueva - capacidad
+        self._contadores = np.vstack(
+            [self._contadores, np.zeros((extra, self._contadores.shape[1]), dtype=np.int64)]
+        )
+        self._intentos = np.r_[self._intentos, np.zeros(extra, dtype=np.int64)]
+        self._primer_agent = np.r_[self._primer_agent, np.full(extra, self._SIN_AGENT)]
+        self._ultima_fecha = np.r_[self._ultima_fecha, np.full(extra, self._SIN_FECHA)]
+        self._desordenado = np.r_[self._desordenado, np.zeros(extra, dtype=bool)]
+
+    def _codigos(self, anis: np.ndarray) -> np.ndarray:
+        """Código entero de cada ANI; los nuevos se agregan al final."""
+        codigos = self._claves.get_indexer(anis)
+        nuevos = codigos < 0
+        if nuevos.any():
+            nuevas = pd.Index(pd.unique(anis[nuevos]), dtype=object)
+            codigos[nuevos] = len(self._claves) + nuevas.get_indexer(anis[nuevos])
+            self._claves = self._claves.append(nuevas)
+            self._crecer(len(self._claves))
+        return codigos.astype(np.int64)
+
+    def agregar(self, bloque: pd.DataFrame) -> None:
+        """Suma un bloque de llamados (en el orden del archivo)."""
+        if bloque.empty:
+            return
+        self.llamados += len(bloque)
+
+        anis = bloque[self.col_ani].astype(str).str.strip().to_numpy(dtype=object)
+        codigos = self._codigos(anis)
+        n = self.anis
+
+        marcas = marcar_categorias(bloque, self.col_estado, self.col_subestado)
+        for j, col in enumerate(COLUMNAS_CONTADORES):
+            self._contadores[:n, j] += np.bincount(
+                codigos, weights=marcas[col].to_numpy(dtype=np.float64), minlength=n
+            ).astype(np.int64)
+
+        if self.col_fecha is None or self.col_fecha not in bloque.columns:
+            return
+
+        tiempos = (
+            pd.to_datetime(bloque[self.col_fecha], errors="coerce")
+            .to_numpy(dtype="datetime64[ns]")
+            .view(np.int64)
+        )
+        validas = tiempos != self._SIN_FECHA  # NaT
+        cod = codigos[validas]
+        if len(cod) == 0:
+            return
+        tiempos = tiempos[validas]
+        agent = marcas["intentos_answer_agent"].to_numpy()[validas]
+
+        # Agrupamos por ANI respetando el orden del archivo dentro de cada uno
+        orden = np.argsort(cod, kind="stable")
+        cod_ord = cod[orden]
+        t_ord = tiempos[orden]
+        inicios = np.flatnonzero(np.r_[True, cod_ord[1:] != cod_ord[:-1]])
+        largos = np.diff(np.r_[inicios, len(cod_ord)])
+        rango = np.arange(len(cod_ord)) - np.repeat(inicios, largos)
+        intento = self._intentos[cod_ord] + rango + 1
+
+        sel = agent[orden]
+        np.minimum.at(self._primer_agent, cod_ord[sel], intento[sel])
+
+        # Fuera de orden: fecha anterior a la del intento previo del mismo ANI
+        previa = np.r_[self._SIN_FECHA, t_ord[:-1]]
+        previa[inicios] = self._ultima_fecha[cod_ord[inicios]]
+        self._desordenado[cod_ord[t_ord < previa]] = True
+
+        self._intentos[cod_ord[inicios]] += largos
+        finales = inicios + largos - 1
+        self._ultima_fecha[cod_ord[finales]] = np.maximum(
+            self._ultima_fecha[cod_ord[finales]],
+            np.maximum.reduceat(t_ord, inicios),
+        )
+
+    def resumen(self) -> pd.DataFrame:
+        """
+        Resumen acumulado: ANI, contadores (mismas columnas que
+        construir_resumen_por_ani), intentos_con_fecha y primer_intento_agent.
+        """
+        n = self.anis
+        primer = self._primer_agent[:n]
+        tiene = primer != self._SIN_AGENT
+        resumen = pd.DataFrame(
+            self._contadores[:n], columns=list(COLUMNAS_CONTADORES)
+        )
+        resumen.insert(0, "ANI", self._claves)
+        resumen["intentos_con_fecha"] = self._intentos[:n]
+        resumen["primer_intento_agent"] = pd.Series(
+            np.where(tiene, primer, 0), dtype="Int64"
+        ).where(tiene, pd.NA)
+        return resumen
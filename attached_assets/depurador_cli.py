@@ -0,0 +1,447 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import logging
+import time
+import pandas as pd
+import depurador_bases  # módulo de lógica
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict
+from datetime import date
+from pathlib import Path
+
+# ============================
+# CONFIGURACIÓN BÁSICA
+# ============================
+
+EXTENSIONES_TICKET = (".xls", ".xlsx", ".xlsm", ".xlsb", ".csv", ".txt")
+
+ARCHIVO_CHECKPOINT = ".checkpoint.json"
+ARCHIVO_RESUMEN = "resumen_ejecucion.json"
+
+# Las tres salidas de la depuración (nombre de archivo sin extensión)
+SALIDAS = (
+    ("resumen", "resumen_ani_depuracion"),
+    ("base_depurada", "base_depurada_seguir_intentando"),
+    ("descartados", "anis_descartados"),
+)
+
+# ============================
+# ENTRADAS Y CHECKPOINT
+# ============================
+
+def tickets_de_entradas(entradas: list[str]) -> list[Path]:
+    """Tickets de una lista de archivos, carpetas (no recursivo) o patrones glob."""
+    rutas: set[Path] = set()
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            candidatos = Path(entrada).iterdir()
+        else:
+            candidatos = (Path(r) for r in glob.glob(entrada))
+        rutas.update(
+            r.resolve()
+            for r in candidatos
+            if r.is_file() and r.name.lower().endswith(EXTENSIONES_TICKET)
+        )
+    return sorted(rutas)
+
+def huella_unidad(ruta: Path, config: dict) -> str:
+    """
+    Identifica una unidad de trabajo: el archivo (ruta, tamaño, fecha de
+    modificación) más la configuración. Si cambia algo, se vuelve a procesar.
+    """
+    estado = ruta.stat()
+    texto = json.dumps(
+        [str(ruta), estado.st_size, estado.st_mtime_ns, config],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+def leer_checkpoint(salida: Path) -> dict:
+    ruta = salida / ARCHIVO_CHECKPOINT
+    if not ruta.exists():
+        return {}
+    try:
+        return json.loads(ruta.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def guardar_checkpoint(salida: Path, completadas: dict) -> None:
+    """Escritura atómica: si el proceso se corta, queda el checkpoint anterior."""
+    ruta = salida / ARCHIVO_CHECKPOINT
+    temporal = ruta.with_suffix(".tmp")
+    temporal.write_text(json.dumps(completadas, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(temporal, ruta)
+
+# ============================
+# PROCESAMIENTO DE UNA UNIDAD
+# ============================
+
+def nombre_seguro(texto: str) -> str:
+    """Nombre apto para carpeta/archivo (campañas con '/' o espacios)."""
+    return re.sub(r"[^\w\-.]+", "_", str(texto)).strip("_") or "sin_nombre"
+
+def carpetas_de_salida(
+    rutas: list[Path],
+    pendientes: list[Path],
+    usadas: set[str],
+) -> dict[Path, str]:
+    """
+    Carpeta de salida de cada ticket pendiente, única en el lote: el nombre
+    del archivo sin extensión y, si dos tickets del lote lo comparten
+    (a/ticket.csv y b/ticket.csv, ticket.csv y ticket.xlsx), carpeta padre +
+    nombre + extensión. `usadas` trae las carpetas de unidades ya
+    procesadas, que no se pisan.
+    """
+    repetidos = Counter(nombre_seguro(r.stem) for r in rutas)
+    usadas = set(usadas)
+    carpetas = {}
+    for ruta in pendientes:
+        nombre = nombre_seguro(ruta.stem)
+        if repetidos[nombre] > 1:
+            nombre = nombre_seguro(f"{ruta.parent.name}_{ruta.stem}_{ruta.suffix.lstrip('.')}")
+        while nombre in usadas:
+            nombre += "_"
+        usadas.add(nombre)
+        carpetas[ruta] = nombre
+    return carpetas
+
+def carpetas_de_campanas(bases) -> dict[str, str]:
+    """
+    Carpeta de cada BASE dentro de la del ticket, única: si dos campañas
+    quedan con el mismo nombre seguro ("Campaña 1" y "Campaña/1"), cada una
+    lleva además un sufijo corto sacado del nombre original (estable entre
+    corridas, no depende del orden).
+    """
+    bases = [str(b) for b in bases]
+    repetidos = Counter(nombre_seguro(b) for b in bases)
+    usadas: set[str] = set()
+    carpetas = {}
+    for base in bases:
+        nombre = nombre_seguro(base)
+        if repetidos[nombre] > 1:
+            nombre += "_" + hashlib.sha1(base.encode("utf-8")).hexdigest()[:6]
+        while nombre in usadas:
+            nombre += "_"
+        usadas.add(nombre)
+        carpetas[base] = nombre
+    return carpetas
+
+def escribir_salidas(
+    tablas: dict[str, pd.DataFrame],
+    carpeta: Path,
+    formato: str,
+) -> int:
+    """Escribe resumen / base depurada / descartados; devuelve filas escritas."""
+    carpeta.mkdir(parents=True, exist_ok=True)
+    filas = 0
+    for clave, nombre in SALIDAS:
+        df = tablas[clave]
+        if formato == "xlsx":
+            df.to_excel(carpeta / f"{nombre}.xlsx", index=False)
+        else:
+            df.to_csv(carpeta / f"{nombre}.csv", index=False, encoding="utf-8-sig")
+        filas += len(df)
+    return filas
+
+def procesar_unidad(
+    ruta: Path,
+    carpeta: Path,
+    formato: str,
+    por_campana: bool,
+    ventana: depurador_bases.VentanaFechas | None,
+) -> dict:
+    """
+    Depuración completa de un ticket (corre en un proceso del pool).
+    Devuelve las mediciones de cada etapa (eventos de depurador_bases).
+    """
+    eventos: list[depurador_bases.EventoEtapa] = []
+    with depurador_bases.escuchar_etapas(eventos.append):
+        df = depurador_bases.leer_ticket(ruta, ventana=ventana)
+
+        col_estado, col_subestado, col_ani, col_fecha = depurador_bases.detectar_columnas(df)
+        col_base = depurador_bases.buscar_columna_base(df.columns) if por_campana else None
+        if por_campana and col_base is None:
+            raise KeyError("No se encontró columna de BASE / campaña para --por-campana.")
+
+        resumen = depurador_bases.construir_resumen_por_ani(
+            df, col_estado, col_subestado, col_ani, col_fecha
+        )
+
+        with depurador_bases.medir_etapa("etiquetado", len(resumen)) as medicion:
+            # Mismas reglas que etiquetar_resumen, sin el apply fila por fila
+            resumen["tag_telefono"] = depurador_bases.asignar_tags(resumen)
+            medicion["filas_salida"] = len(resumen)
+
+        base_depurada, descartados = depurador_bases.generar_depurados_y_descartados(resumen)
+
+        with depurador_bases.medir_etapa("exportacion", len(resumen)) as medicion:
+            medicion["filas_salida"] = exportar(
+                df, resumen, base_depurada, descartados, carpeta, formato, col_ani, col_base
+            )
+
+    return {
+        "archivo": str(ruta),
+        "salida": str(carpeta),
+        "llamados": len(df),
+        "anis": len(resumen),
+        "descartados": len(descartados),
+        "etapas": [asdict(e) for e in eventos],
+    }
+
+def exportar(
+    df: pd.DataFrame,
+    resumen: pd.DataFrame,
+    base_depurada: pd.DataFrame,
+    descartados: pd.DataFrame,
+    carpeta: Path,
+    formato: str,
+    col_ani: str,
+    col_base: str | None,
+) -> int:
+    """Las tres salidas del ticket, o de cada campaña si hay col_base; devuelve filas escritas."""
+    if col_base is None:
+        return escribir_salidas(
+            {"resumen": resumen, "base_depurada": base_depurada, "descartados": descartados},
+            carpeta,
+            formato,
+        )
+
+    # Mismo criterio que la app: los tags son globales y cada campaña se
+    # queda con los ANIs que aparecen en ella (índice ANI <-> BASE).
+    indice = depurador_bases.construir_indice_ani_base(df, col_ani, col_base, anis=resumen["ANI"])
+    filas = 0
+    for base, nombre in zip(indice["bases"], carpetas_de_campanas(indice["bases"]).values()):
+        resumen_base = resumen.iloc[depurador_bases.anis_de_base(indice, [base])]
+        seguir = resumen_base["tag_telefono"] == "SEGUIR_INTENTANDO"
+        filas += escribir_salidas(
+            {
+                "resumen": resumen_base,
+                "base_depurada": resumen_base[seguir],
+                "descartados": resumen_base[~seguir],
+            },
+            carpeta / nombre,
+            formato,
+        )
+    return filas
+# ============================
+# EJECUCIÓN EN LOTE
+# ============================
+
+def resumen_por_etapa(resultados: list[dict]) -> pd.DataFrame:
+    """Segundos y filas por etapa, sumados sobre todas las unidades procesadas."""
+    filas = [e for r in resultados for e in r["etapas"]]
+    if not filas:
+        return pd.DataFrame(
+            columns=["etapa", "unidades", "segundos", "cpu_segundos", "filas_entrada", "filas_salida", "filas_por_seg"]
+        )
+    tabla = (
+        pd.DataFrame(filas)
+        .groupby("etapa", sort=False)
+        .agg(
+            unidades=("etapa", "size"),
+            segundos=("segundos", "sum"),
+            cpu_segundos=("cpu_segundos", "sum"),
+            filas_entrada=("filas_entrada", "sum"),
+            filas_salida=("filas_salida", "sum"),
+        )
+        .reset_index()
+        .astype({"filas_entrada": "int64", "filas_salida": "int64"})
+    )
+    # Las filas procesadas son las de entrada (la lectura solo informa las de salida)
+    procesadas = tabla["filas_entrada"].where(tabla["filas_entrada"] > 0, tabla["filas_salida"])
+    tabla["filas_por_seg"] = (procesadas / tabla["segundos"].clip(lower=1e-9)).round()
+    tabla[["segundos", "cpu_segundos"]] = tabla[["segundos", "cpu_segundos"]].round(3)
+    return tabla
+
+def ejecutar(
+    rutas: list[Path],
+    salida: Path,
+    formato: str,
+    por_campana: bool,
+    ventana: depurador_bases.VentanaFechas | None,
+    procesos: int | None,
+    reanudar: bool,
+) -> int:
+    """Procesa las unidades pendientes en paralelo; devuelve la cantidad de errores."""
+    salida.mkdir(parents=True, exist_ok=True)
+    config = {"formato": formato, "por_campana": por_campana, "ventana": ventana}
+
+    completadas = leer_checkpoint(salida) if reanudar else {}
+    huellas = {r: huella_unidad(r, config) for r in rutas}
+    pendientes = [r for r in rutas if huellas[r] not in completadas]
+    salteadas = len(rutas) - len(pendientes)
+    # Las carpetas se asignan antes de repartir el trabajo: dos procesos
+    # nunca escriben en la misma. Un ticket que cambió vuelve a su carpeta.
+    archivos_pendientes = {str(r) for r in pendientes}
+    carpetas = carpetas_de_salida(
+        rutas,
+        pendientes,
+        {Path(c["salida"]).name for c in completadas.values() if c["archivo"] not in archivos_pendientes},
+    )
+
+    print(
+        f"Tickets: {len(rutas)} | ya procesados (checkpoint): {salteadas} | "
+        f"pendientes: {len(pendientes)}"
+    )
+
+    resultados: list[dict] = []
+    errores = 0
+    inicio = time.perf_counter()
+    if pendientes:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            futuros = {
+                pool.submit(
+                    procesar_unidad, r, salida / carpetas[r], formato, por_campana, ventana
+                ): r
+                for r in pendientes
+            }
+            for futuro in as_completed(futuros):
+                ruta = futuros[futuro]
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    errores += 1
+                    print(f"  ✗ {ruta.name}: {e}")
+                    continue
+
+                resultados.append(resultado)
+                # Los eventos se midieron en el proceso hijo: se re-publican
+                # acá para que los vean el logging y los suscriptores de este proceso
+                for evento in resultado["etapas"]:
+                    depurador_bases.publicar_etapa(depurador_bases.EventoEtapa(**evento))
+                # Una entrada por archivo: la de una versión anterior ya no sirve
+                completadas = {
+                    h: c for h, c in completadas.items() if c["archivo"] != resultado["archivo"]
+                }
+                completadas[huellas[ruta]] = {
+                    "archivo": resultado["archivo"],
+                    "salida": resultado["salida"],
+                    "terminado": time.strftime("%Y-%m-%d %H:%M:%S"),
+                }
+                guardar_checkpoint(salida, completadas)
+                segundos = sum(e["segundos"] for e in resultado["etapas"])
+                print(
+                    f"  ✓ {ruta.name}: {resultado['llamados']} llamados, "
+                    f"{resultado['anis']} ANI, {resultado['descartados']} descartados "
+                    f"({segundos:.1f} s)"
+                )
+
+    total = time.perf_counter() - inicio
+    etapas = resumen_por_etapa(resultados)
+    if not etapas.empty:
+        print("\nTiempos por etapa (suma de todas las unidades):")
+        print(etapas.to_string(index=False))
+    print(f"\nTiempo total: {total:.1f} s | errores: {errores}")
+
+    (salida / ARCHIVO_RESUMEN).write_text(
+        json.dumps(
+            {
+                "tickets": len(rutas),
+                "salteados": salteadas,
+                "procesados": len(resultados),
+                "errores": errores,
+                "segundos_totales": round(total, 3),
+                "etapas": etapas.to_dict(orient="records"),
+                "unidades": resultados,
+            },
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    return errores
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Depuración de bases Neotel sin interfaz (para correr en lote)."
+    )
+    parser.add_argument(
+        "entradas",
+        nargs="+",
+        help="Tickets, carpetas o patrones (ej. 'tickets/*.csv')",
+    )
+    parser.add_argument(
+        "--salida",
+        type=Path,
+        default=Path("depuracion"),
+        help="Carpeta de salida (una subcarpeta por ticket)",
+    )
+    parser.add_argument(
+        "--formato",
+        choices=("xlsx", "csv"),
+        default="xlsx",
+        help="Formato de los archivos de salida",
+    )
+    parser.add_argument(
+        "--por-campana",
+        action="store_true",
+        help="Escribe las tres salidas por cada BASE / campaña del ticket",
+    )
+    parser.add_argument(
+        "--procesos",
+        type=int,
+        default=None,
+        help="Procesos en paralelo (por defecto, uno por CPU)",
+    )
+    parser.add_argument(
+        "--sin-reanudar",
+        action="store_true",
+        help="Ignora el checkpoint y vuelve a procesar todo",
+    )
+    parser.add_argument(
+        "--log-etapas",
+        action="store_true",
+        help="Muestra por stderr cada etapa medida (logger 'depurador_bases')",
+    )
+    parser.add_argument(
+        "--desde",
+        type=date.fromisoformat,
+        help="Solo llamados desde este día (AAAA-MM-DD)",
+    )
+    parser.add_argument(
+        "--hasta",
+        type=date.fromisoformat,
+        help="Solo llamados hasta este día inclusive (AAAA-MM-DD)",
+    )
+    parser.add_argument(
+        "--habiles",
+        action="store_true",
+        help="Solo llamados de lunes a viernes",
+    )
+    args = parser.parse_args()
+
+    if args.log_etapas:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    rutas = tickets_de_entradas(args.entradas)
+    if not rutas:
+        print("No se encontraron tickets en las entradas indicadas.")
+        sys.exit(1)
+
+    ventana = None
+    if args.desde or args.hasta or args.habiles:
+        ventana = depurador_bases.VentanaFechas(
+            desde=args.desde, hasta=args.hasta, solo_habiles=args.habiles
+        )
+
+    errores = ejecutar(
+        rutas,
+        args.salida,
+        args.formato,
+        args.por_campana,
+        ventana,
+        args.procesos,
+        reanudar=not args.sin_reanudar,
+    )
+    sys.exit(1 if errores else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
+import os
+import queue
+import threading
+import time
 import tkinter as tk
-import unicodedata
+import numpy as np
 import pandas as pd
 import depurador_bases  # módulo de lógica
 
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
 
@@ -10,68 +15,383 @@ from pathlib import Path
 # HELPERS PARA COLUMNAS
 # ============================
 
-def normalizar_columna(col: str) -> str:
-    """Normaliza nombres de columna (similar a tu main.py)."""
-    col = col.strip()
-    col = "".join(
-        c
-        for c in unicodedata.normalize("NFKD", col)
-        if not unicodedata.combining(c)
-    )
-    col = col.upper()
-    col = col.replace(" ", "").replace("-", "").replace("/", "")
-    return col
+normalizar_columna = depurador_bases.normalizar_columna
+
+detectar_columnas = depurador_bases.detectar_columnas
 
-def detectar_columnas(df: pd.DataFrame):
+# ============================
+# LECTURA DEL TICKET
+# ============================
+
+def leer_ticket_generico(ruta: Path) -> pd.DataFrame:
     """
-    Detecta automáticamente columnas de ESTADO, SUBESTADO, ANI y FECHA
-    usando nombres normalizados.
+    Lectura genérica de ticket Neotel.
+    Soporta xls/xlsx/csv/txt.
+    """
+    return depurador_bases.leer_ticket(ruta)
+
+# ============================
+# TRABAJO EN SEGUNDO PLANO
+# ============================
+
+class Cancelado(Exception):
+    """El usuario canceló la tarea en curso."""
+
+def _leer_con_columnas(ruta: Path) -> tuple[pd.DataFrame, tuple]:
+    """Lee un ticket y detecta sus columnas (corre en un proceso del pool)."""
+    df = leer_ticket_generico(ruta)
+    return df, detectar_columnas(df)
+
+def _exportar_xlsx(df: pd.DataFrame, ruta: str) -> tuple[str, int]:
+    """Escribe un XLSX (corre en un proceso del pool)."""
+    with depurador_bases.medir_etapa("exportacion", len(df)) as medicion:
+        df.to_excel(ruta, index=False)
+        medicion["filas_salida"] = len(df)
+    return ruta, len(df)
+
+def _con_etapas(funcion, *args) -> tuple[object, list]:
+    """Corre funcion(*args) juntando los eventos de etapa que publica (en el proceso hijo)."""
+    eventos: list[depurador_bases.EventoEtapa] = []
+    with depurador_bases.escuchar_etapas(eventos.append):
+        return funcion(*args), eventos
+
+def _miles(n: float) -> str:
+    """Número con separador de miles en punto (1.234.567)."""
+    return f"{n:,.0f}".replace(",", ".")
+
+# Cada cuánto se revisa el botón Cancelar mientras trabaja el pool (segundos)
+PAUSA_CANCELAR = 0.2
+
+def _procesos(cantidad: int) -> int:
+    return max(1, min(cantidad, os.cpu_count() or 1))
+
+def _en_paralelo(funcion, tareas: dict, cancelar: threading.Event):
     """
-    cols_orig = list(df.columns)
-    cols_norm = [normalizar_columna(c) for c in cols_orig]
+    Corre funcion(*args) para cada tarea en un pool de procesos y va
+    devolviendo (clave, resultado) a medida que terminan. Los eventos de
+    etapa medidos en cada proceso se re-publican acá.
 
-    mapa = {n: o for n, o in zip(cols_norm, cols_orig)}
+    Una sola tarea corre en este hilo: pasarla por el pool solo agrega
+    copiar el resultado (el DataFrame entero) de vuelta desde el proceso hijo.
 
-    def buscar(posibles: list[str], nombre_logico: str) -> str:
-        for p in posibles:
-            if p in mapa:
-                return mapa[p]
-        raise KeyError(
-            f"No se encontró columna para {nombre_logico}. "
-            f"Columnas disponibles (normalizadas): {cols_norm}"
+    Cancelar se revisa cada PAUSA_CANCELAR segundos aunque nada haya
+    terminado: se descarta lo pendiente y se vuelve sin esperar lo que ya
+    está corriendo (esos procesos terminan solos y su resultado se tira).
+    """
+    if len(tareas) == 1:
+        (clave, args), = tareas.items()
+        if cancelar.is_set():
+            raise Cancelado()
+        yield clave, funcion(*args)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=_procesos(len(tareas)))
+    cancelado = False
+    try:
+        futuros = {
+            pool.submit(_con_etapas, funcion, *args): clave for clave, args in tareas.items()
+        }
+        pendientes = set(futuros)
+        while pendientes:
+            listos, pendientes = wait(pendientes, timeout=PAUSA_CANCELAR, return_when=FIRST_COMPLETED)
+            if cancelar.is_set():
+                cancelado = True
+                raise Cancelado()
+            for futuro in listos:
+                resultado, eventos = futuro.result()
+                for evento in eventos:
+                    depurador_bases.publicar_etapa(evento)
+                yield futuros[futuro], resultado
+    finally:
+        pool.shutdown(wait=not cancelado, cancel_futures=True)
+
+def procesar_tickets_en_etapas(rutas: list[Path], avisar, cancelar: threading.Event) -> dict:
+    """
+    Lectura (en paralelo, un proceso por archivo) + depuración completa de
+    uno o más tickets, etapa por etapa. Corre en un hilo aparte: avisa el
+    avance con avisar(texto, porcentaje) y entre etapas revisa `cancelar`
+    (la etapa en curso no se interrumpe).
+    """
+    def etapa(texto: str, porcentaje: float) -> None:
+        if cancelar.is_set():
+            raise Cancelado()
+        avisar(texto, porcentaje)
+
+    etapa(f"Leyendo {len(rutas)} archivo(s)...", 2)
+    inicio = time.perf_counter()
+    leidos: dict[Path, tuple[pd.DataFrame, tuple]] = {}
+    megas = 0.0
+    for ruta, (df, columnas) in _en_paralelo(
+        _leer_con_columnas, {r: (r,) for r in rutas}, cancelar
+    ):
+        leidos[ruta] = (df, columnas)
+        megas += ruta.stat().st_size / 1e6
+        filas = sum(len(d) for d, _ in leidos.values())
+        segundos = max(time.perf_counter() - inicio, 1e-6)
+        avisar(
+            f"Leído {ruta.name} ({len(leidos)}/{len(rutas)}) – "
+            f"{_miles(filas / segundos)} filas/s, {megas / segundos:.1f} MB/s",
+            2 + 33 * len(leidos) / len(rutas),
         )
 
-    col_estado = buscar(["ESTADO", "STATUS", "STATE"], "ESTADO")
-    col_subestado = buscar(["SUBESTADO", "SUBESTATUS", "SUBSTATE"], "SUBESTADO")
-    col_ani = buscar(
-        ["ANI", "ANITELEFONO", "TELEFONO", "NUMEROTELEFONO", "NUMEROLLAMADO", "NUMERO"],
-        "ANI / TELÉFONO",
-    )
-    col_fecha = buscar(
-        ["FECHAINICIO", "FECHAHORA", "INICIO", "LOGTIME", "FECHALLAMADA"],
-        "FECHA / HORA",
+    # Todos con los nombres de columna del primer archivo
+    df_ref, columnas_ref = leidos[rutas[0]]
+    dfs = []
+    for ruta in rutas:
+        df, columnas = leidos[ruta]
+        dfs.append(df.rename(columns=dict(zip(columnas, columnas_ref))))
+
+    etapa("Uniendo archivos...", 36)
+    df = pd.concat(dfs, ignore_index=True) if len(dfs) > 1 else df_ref
+    col_estado, col_subestado, col_ani, col_fecha = columnas_ref
+
+    etapa(f"Resumen por ANI ({_miles(len(df))} llamados)...", 40)
+    resumen = depurador_bases.construir_resumen_por_ani(
+        df, col_estado, col_subestado, col_ani, col_fecha
     )
 
-    return col_estado, col_subestado, col_ani, col_fecha
+    etapa("Etiquetando ANIs...", 80)
+    resumen = depurador_bases.etiquetar_resumen(resumen)
+
+    etapa("Separando base depurada y descartados...", 95)
+    base_depurada, descartados = depurador_bases.generar_depurados_y_descartados(resumen)
+
+    etapa("Listo", 100)
+    return {
+        "rutas": rutas,
+        "df": df,
+        "columnas": columnas_ref,
+        "resumen": resumen,
+        "base_depurada": base_depurada,
+        "descartados": descartados,
+    }
+
+def exportar_en_etapas(salidas: dict, avisar, cancelar: threading.Event) -> list[str]:
+    """
+    Escribe varios XLSX a la vez ({ruta: DataFrame}), un proceso por archivo,
+    avisando cada uno que termina y las filas/s acumuladas.
+    """
+    avisar(f"Exportando {len(salidas)} archivos...", 2)
+    inicio = time.perf_counter()
+    escritos: list[str] = []
+    filas = 0
+    for ruta, (_, n) in _en_paralelo(
+        _exportar_xlsx, {r: (df, r) for r, df in salidas.items()}, cancelar
+    ):
+        escritos.append(ruta)
+        filas += n
+        segundos = max(time.perf_counter() - inicio, 1e-6)
+        avisar(
+            f"Guardado {Path(ruta).name} ({len(escritos)}/{len(salidas)}) – "
+            f"{_miles(filas / segundos)} filas/s",
+            100 * len(escritos) / len(salidas),
+        )
+    return escritos
 
 # ============================
-# LECTURA DEL TICKET
+# TABLA VIRTUAL (SOLO FILAS VISIBLES)
 # ============================
 
-def leer_ticket_generico(ruta: Path) -> pd.DataFrame:
+def orden_columna(serie: pd.Series) -> tuple[np.ndarray, int]:
     """
-    Lectura genérica de ticket Neotel.
-    Soporta xls/xlsx/csv/txt.
+    Orden estable de una columna (vacíos al final) como posiciones, más la
+    cantidad de valores no vacíos. Se calcula una vez por columna.
     """
-    nombre = ruta.name.lower()
-    if nombre.endswith((".xlsx", ".xlsm", ".xlsb", ".xls")):
-        df = pd.read_excel(ruta)
-    elif nombre.endswith((".csv", ".txt")):
-        df = pd.read_csv(ruta, sep=None, engine="python", encoding="latin1")
-    else:
-        raise ValueError(f"Formato de archivo no soportado: {nombre}")
+    serie = serie.reset_index(drop=True)
+    try:
+        ordenada = serie.sort_values(kind="stable", na_position="last")
+    except TypeError:
+        # Tipos mezclados: ordenamos como texto
+        ordenada = serie.astype(str).where(serie.notna()).sort_values(
+            kind="stable", na_position="last"
+        )
+    return ordenada.index.to_numpy(), int(serie.notna().sum())
+
+class TablaVirtual(ttk.Frame):
+    """
+    Grilla para DataFrames grandes: el Treeview tiene siempre las mismas
+    `filas_visibles` filas y al scrollear solo se les cambian los valores.
+    Ordenar (clic en el encabezado) y filtrar ("contiene") trabajan sobre
+    posiciones con órdenes y textos precalculados por columna.
+    """
+
+    def __init__(self, parent, df: pd.DataFrame, filas_visibles: int = 25):
+        super().__init__(parent, padding=(6, 6))
+        self.df = df
+        self.columnas = [str(c) for c in df.columns]
+        self.filas_visibles = filas_visibles
 
-    return df
+        # Estado de la vista: posiciones (filtradas + ordenadas) y primera fila visible
+        self._todas = np.arange(len(df))
+        self._filtro: np.ndarray | None = None
+        self._vista = self._todas
+        self._inicio = 0
+        self._orden_col: str | None = None
+        self._ascendente = True
+
+        # Caches por columna (se llenan la primera vez que se usan)
+        self._ordenes: dict[str, tuple[np.ndarray, int]] = {}
+        self._textos: dict[str, pd.Series] = {}
+
+        self._build()
+        self._render()
+
+    # ---------------- UI ----------------
+    def _build(self) -> None:
+        barra = ttk.Frame(self)
+        barra.pack(side=tk.TOP, fill=tk.X, pady=(0, 4))
+
+        ttk.Label(barra, text="Filtrar").pack(side=tk.LEFT)
+        self.var_columna = tk.StringVar(value=self.columnas[0] if self.columnas else "")
+        ttk.Combobox(
+            barra,
+            textvariable=self.var_columna,
+            values=self.columnas,
+            state="readonly",
+            width=24,
+        ).pack(side=tk.LEFT, padx=4)
+
+        ttk.Label(barra, text="contiene").pack(side=tk.LEFT)
+        self.var_texto = tk.StringVar()
+        entrada = ttk.Entry(barra, textvariable=self.var_texto, width=24)
+        entrada.pack(side=tk.LEFT, padx=4)
+        entrada.bind("<Return>", lambda _e: self.aplicar_filtro())
+
+        ttk.Button(barra, text="Aplicar", command=self.aplicar_filtro).pack(side=tk.LEFT)
+        ttk.Button(barra, text="Limpiar", command=self.limpiar_filtro).pack(side=tk.LEFT, padx=4)
+
+        self.var_info = tk.StringVar()
+        ttk.Label(barra, textvariable=self.var_info).pack(side=tk.RIGHT)
+
+        cuerpo = ttk.Frame(self)
+        cuerpo.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+
+        self.tree = ttk.Treeview(
+            cuerpo,
+            columns=self.columnas,
+            show="headings",
+            height=self.filas_visibles,
+            selectmode="browse",
+        )
+        for col in self.columnas:
+            self.tree.heading(col, text=col, command=lambda c=col: self.ordenar(c))
+            self.tree.column(col, width=120, anchor="w", stretch=True)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # Filas fijas: se reutilizan en cada render
+        self._iids = [
+            self.tree.insert("", tk.END, values=()) for _ in range(self.filas_visibles)
+        ]
+
+        self.scroll = ttk.Scrollbar(cuerpo, orient="vertical", command=self._scrollbar)
+        self.scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+        for widget in (self.tree, self.scroll):
+            widget.bind("<MouseWheel>", self._rueda)
+            widget.bind("<Button-4>", lambda _e: self._mover(-3))
+            widget.bind("<Button-5>", lambda _e: self._mover(3))
+        self.tree.bind("<Prior>", lambda _e: self._mover(-self.filas_visibles))
+        self.tree.bind("<Next>", lambda _e: self._mover(self.filas_visibles))
+
+    # ---------------- SCROLL ----------------
+    def _scrollbar(self, accion: str, cantidad: str, unidad: str | None = None) -> None:
+        if accion == "moveto":
+            self._ir_a(int(float(cantidad) * len(self._vista)))
+        elif accion == "scroll":
+            paso = self.filas_visibles if unidad == "pages" else 1
+            self._mover(int(cantidad) * paso)
+
+    def _rueda(self, evento) -> str:
+        self._mover(-3 if evento.delta > 0 else 3)
+        return "break"
+
+    def _mover(self, filas: int) -> None:
+        self._ir_a(self._inicio + filas)
+
+    def _ir_a(self, inicio: int) -> None:
+        inicio = max(0, min(inicio, len(self._vista) - self.filas_visibles))
+        if inicio != self._inicio:
+            self._inicio = inicio
+            self._render()
+
+    def _render(self) -> None:
+        total = len(self._vista)
+        posiciones = self._vista[self._inicio:self._inicio + self.filas_visibles]
+        bloque = self.df.iloc[posiciones]
+        bloque = bloque.astype(object).where(bloque.notna(), "").to_numpy()
+
+        for i, iid in enumerate(self._iids):
+            self.tree.item(iid, values=tuple(bloque[i]) if i < len(bloque) else ())
+
+        if total:
+            self.scroll.set(self._inicio / total, (self._inicio + len(posiciones)) / total)
+            self.var_info.set(
+                f"Filas {self._inicio + 1:,}–{self._inicio + len(posiciones):,} "
+                f"de {total:,}".replace(",", ".")
+            )
+        else:
+            self.scroll.set(0, 1)
+            self.var_info.set("Sin filas")
+
+    # ---------------- ORDEN Y FILTRO ----------------
+    def ordenar(self, columna: str) -> None:
+        """Clic en el encabezado: ordena por la columna (otro clic invierte)."""
+        if self._orden_col == columna:
+            self._ascendente = not self._ascendente
+        else:
+            self._orden_col = columna
+            self._ascendente = True
+        for col in self.columnas:
+            flecha = ""
+            if col == columna:
+                flecha = " ▲" if self._ascendente else " ▼"
+            self.tree.heading(col, text=col + flecha)
+        self._armar_vista()
+
+    def aplicar_filtro(self) -> None:
+        columna = self.var_columna.get()
+        texto = self.var_texto.get().strip().lower()
+        if not texto or columna not in self.columnas:
+            self.limpiar_filtro()
+            return
+        if columna not in self._textos:
+            col = self.df.columns[self.columnas.index(columna)]
+            self._textos[columna] = self.df[col].astype(str).str.lower().reset_index(drop=True)
+        self._filtro = self._textos[columna].str.contains(texto, regex=False).to_numpy()
+        self._armar_vista()
+
+    def limpiar_filtro(self) -> None:
+        self.var_texto.set("")
+        self._filtro = None
+        self._armar_vista()
+
+    def _armar_vista(self) -> None:
+        """Posiciones visibles: recorre el orden precalculado y se queda con las filtradas."""
+        if self._orden_col is None:
+            vista = self._todas
+        else:
+            if self._orden_col not in self._ordenes:
+                col = self.df.columns[self.columnas.index(self._orden_col)]
+                self._ordenes[self._orden_col] = orden_columna(self.df[col])
+            orden, n_validos = self._ordenes[self._orden_col]
+            if self._ascendente:
+                vista = orden
+            else:
+                vista = np.concatenate([orden[:n_validos][::-1], orden[n_validos:]])
+
+        if self._filtro is not None:
+            vista = vista[self._filtro[vista]]
+
+        self._vista = vista
+        self._inicio = 0
+        self._render()
+
+def abrir_tabla(parent, df: pd.DataFrame, titulo: str) -> None:
+    """Ventana aparte con la tabla virtual de `df`."""
+    ventana = tk.Toplevel(parent)
+    ventana.title(titulo)
+    ventana.geometry("1000x600")
+    TablaVirtual(ventana, df).pack(fill=tk.BOTH, expand=True)
 
 # ============================
 # CLASE PRINCIPAL TKINTER
@@ -97,6 +417,16 @@ class DepuradorGUI(tk.Tk):
         self.col_ani: str | None = None
         self.col_fecha: str | None = None
 
+        # Tarea en segundo plano (el hilo avisa por la cola, la UI la lee con after)
+        self._cola: queue.Queue = queue.Queue()
+        self._cancelar = threading.Event()
+        self._hilo: threading.Thread | None = None
+        self._al_terminar = None
+
+        # Mediciones por etapa de depurador_bases (llegan desde cualquier hilo)
+        self._mediciones: list[depurador_bases.EventoEtapa] = []
+        depurador_bases.suscribir_etapas(lambda evento: self._cola.put(("medicion", evento)))
+
         self._configurar_estilos()
         self._build_ui()
 
@@ -224,13 +554,13 @@ class DepuradorGUI(tk.Tk):
         frame_btn = ttk.Frame(pasos)
         frame_btn.grid(row=0, column=0, sticky="w", padx=(0, 12))
 
-        btn_cargar = ttk.Button(
+        self.btn_cargar = ttk.Button(
             frame_btn,
-            text="📂  Paso 1 – Cargar ticket Neotel",
+            text="📂  Paso 1 – Cargar ticket(s) Neotel",
             style="Primary.TButton",
             command=self.cargar_ticket,
         )
-        btn_cargar.pack(side=tk.LEFT)
+        self.btn_cargar.pack(side=tk.LEFT)
 
         self.lbl_archivo = ttk.Label(
             pasos,
@@ -246,6 +576,42 @@ class DepuradorGUI(tk.Tk):
         )
         lbl_paso3.grid(row=1, column=0, columnspan=2, sticky="w", pady=(4, 0))
 
+        # Progreso de la tarea en curso
+        frame_progreso = ttk.Frame(pasos)
+        frame_progreso.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(6, 0))
+        frame_progreso.columnconfigure(0, weight=1)
+
+        self.var_progreso = tk.DoubleVar(value=0)
+        ttk.Progressbar(
+            frame_progreso,
+            variable=self.var_progreso,
+            maximum=100,
+            mode="determinate",
+        ).grid(row=0, column=0, sticky="ew")
+
+        self.btn_cancelar = ttk.Button(
+            frame_progreso,
+            text="✖ Cancelar",
+            command=self.cancelar_tarea,
+            state="disabled",
+        )
+        self.btn_cancelar.grid(row=0, column=1, padx=(8, 0))
+
+        self.var_estado = tk.StringVar(value="Listo para cargar un ticket.")
+        ttk.Label(
+            frame_progreso,
+            textvariable=self.var_estado,
+            style="Subtitle.TLabel",
+        ).grid(row=1, column=0, columnspan=2, sticky="w")
+
+        # Última etapa medida; al terminar, el tiempo de cada etapa
+        self.var_mediciones = tk.StringVar(value="")
+        ttk.Label(
+            frame_progreso,
+            textvariable=self.var_mediciones,
+            style="Subtitle.TLabel",
+        ).grid(row=2, column=0, columnspan=2, sticky="w")
+
         # ---- PANEL CENTRAL (KPIs + TAGS) ----
         center = ttk.Frame(self, padding=(12, 6))
         center.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
@@ -386,68 +752,173 @@ class DepuradorGUI(tk.Tk):
             command=self.exportar_descartados,
         ).pack(side=tk.LEFT, padx=4)
 
+        ttk.Button(
+            bottom,
+            text="⬇️ Exportar todo",
+            style="Primary.TButton",
+            command=self.exportar_todo,
+        ).pack(side=tk.LEFT, padx=4)
+
+        ttk.Button(
+            bottom,
+            text="🔎 Ver descartados",
+            style="Export.TButton",
+            command=lambda: self.ver_tabla(self.descartados, "ANIs descartados"),
+        ).pack(side=tk.RIGHT, padx=4)
+
+        ttk.Button(
+            bottom,
+            text="🔎 Ver resumen ANI",
+            style="Export.TButton",
+            command=lambda: self.ver_tabla(self.resumen_ani, "Resumen por ANI"),
+        ).pack(side=tk.RIGHT, padx=4)
+
     # ---------------- LÓGICA ----------------
     def cargar_ticket(self):
-        ruta_str = filedialog.askopenfilename(
-            title="Seleccionar ticket Neotel",
+        rutas_str = filedialog.askopenfilenames(
+            title="Seleccionar tickets Neotel (uno o varios)",
             filetypes=(
                 ("Excel / CSV", "*.xls *.xlsx *.xlsm *.xlsb *.csv *.txt"),
                 ("Todos los archivos", "*.*"),
             ),
         )
-        if not ruta_str:
+        if not rutas_str:
             return
 
-        ruta = Path(ruta_str)
+        rutas = [Path(r) for r in rutas_str]
+        self._iniciar_tarea(procesar_tickets_en_etapas, rutas, al_terminar=self._mostrar_resultado)
 
-        try:
-            df = leer_ticket_generico(ruta)
-        except Exception as e:
-            messagebox.showerror(
-                "Error al leer archivo",
-                f"No se pudo leer el archivo:\n{e}",
+    def exportar_todo(self):
+        if self.resumen_ani is None:
+            messagebox.showwarning(
+                "Sin datos",
+                "Primero cargá un ticket y dejá que se procese.",
             )
             return
 
-        self.df_raw = df
+        carpeta = filedialog.askdirectory(title="Carpeta donde guardar los 3 archivos")
+        if not carpeta:
+            return
 
-        # Detectar columnas reales del ticket
-        try:
-            col_estado, col_subestado, col_ani, col_fecha = detectar_columnas(df)
-        except Exception as e:
-            messagebox.showerror(
-                "Error detectando columnas",
-                f"No se pudieron identificar las columnas clave:\n{e}",
-            )
+        salidas = {
+            str(Path(carpeta) / "resumen_ani_depuracion.xlsx"): self.resumen_ani,
+            str(Path(carpeta) / "base_depurada_seguir_intentando.xlsx"): self.base_depurada,
+            str(Path(carpeta) / "anis_descartados.xlsx"): self.descartados,
+        }
+        self._iniciar_tarea(exportar_en_etapas, salidas, al_terminar=self._exportacion_lista)
+
+    def _exportacion_lista(self, escritos: list[str]) -> None:
+        messagebox.showinfo(
+            "Exportación completada",
+            "Archivos guardados:\n" + "\n".join(escritos),
+        )
+
+    # ---------------- SEGUNDO PLANO ----------------
+    def _iniciar_tarea(self, funcion, *args, al_terminar) -> None:
+        """Corre funcion(*args, avisar, cancelar) en un hilo y sigue la cola."""
+        if self._hilo is not None and self._hilo.is_alive():
+            messagebox.showwarning("En proceso", "Esperá a que termine la tarea en curso.")
             return
 
+        self._cancelar.clear()
+        self.btn_cargar.configure(state="disabled")
+        self.btn_cancelar.configure(state="normal")
+        self.var_progreso.set(0)
+        self._mediciones = []
+        self.var_mediciones.set("")
+
+        def avisar(texto: str, porcentaje: float) -> None:
+            self._cola.put(("etapa", texto, porcentaje))
+
+        def correr() -> None:
+            try:
+                self._cola.put(("listo", funcion(*args, avisar, self._cancelar)))
+            except Cancelado:
+                self._cola.put(("cancelado",))
+            except Exception as e:
+                self._cola.put(("error", e))
+
+        self._al_terminar = al_terminar
+        self._hilo = threading.Thread(target=correr, daemon=True)
+        self._hilo.start()
+        self.after(100, self._sondear_cola)
+
+    def _sondear_cola(self) -> None:
+        """Aplica en la UI los avisos del hilo; se reprograma mientras haya tarea."""
+        terminado = False
+        try:
+            while True:
+                mensaje = self._cola.get_nowait()
+                tipo = mensaje[0]
+                if tipo == "etapa":
+                    self.var_estado.set(mensaje[1])
+                    self.var_progreso.set(mensaje[2])
+                elif tipo == "medicion":
+                    self._mediciones.append(mensaje[1])
+                    self.var_mediciones.set(mensaje[1].texto())
+                elif tipo == "listo":
+                    terminado = True
+                    self._fin_tarea("Listo.")
+                    self._al_terminar(mensaje[1])
+                elif tipo == "cancelado":
+                    terminado = True
+                    self._fin_tarea("Cancelado.")
+                else:
+                    terminado = True
+                    self._fin_tarea("Error.")
+                    messagebox.showerror(
+                        "Error",
+                        f"Ocurrió un error en la tarea:\n{mensaje[1]}",
+                    )
+        except queue.Empty:
+            pass
+
+        if not terminado:
+            self.after(100, self._sondear_cola)
+
+    def _fin_tarea(self, texto: str) -> None:
+        self.var_estado.set(texto)
+        if self._mediciones:
+            # Misma etapa en varios archivos (lectura, exportación): se suma
+            por_etapa: dict[str, float] = {}
+            for evento in self._mediciones:
+                por_etapa[evento.etapa] = por_etapa.get(evento.etapa, 0.0) + evento.segundos
+            self.var_mediciones.set(
+                " · ".join(f"{etapa} {segundos:.1f} s" for etapa, segundos in por_etapa.items())
+            )
+        self.btn_cargar.configure(state="normal")
+        self.btn_cancelar.configure(state="disabled")
+
+    @staticmethod
+    def _nombre_archivos(rutas: list[Path]) -> str:
+        if len(rutas) == 1:
+            return f"Archivo: {rutas[0].name}"
+        return f"Archivos: {len(rutas)} ({rutas[0].name}, ...)"
+
+    def cancelar_tarea(self) -> None:
+        self._cancelar.set()
+        self.var_estado.set("Cancelando al terminar la etapa actual...")
+
+    def _mostrar_resultado(self, resultado: dict) -> None:
+        rutas = resultado["rutas"]
+        resumen = resultado["resumen"]
+        base_depurada = resultado["base_depurada"]
+        descartados = resultado["descartados"]
+        col_estado, col_subestado, col_ani, col_fecha = resultado["columnas"]
+
+        self.df_raw = resultado["df"]
         self.col_estado = col_estado
         self.col_subestado = col_subestado
         self.col_ani = col_ani
         self.col_fecha = col_fecha
 
-        try:
-            resumen, base_depurada, descartados = depurador_bases.procesar_desde_df(
-                df,
-                col_estado=col_estado,
-                col_subestado=col_subestado,
-                col_ani=col_ani,
-                col_fecha=col_fecha,
-            )
-        except Exception as e:
-            messagebox.showerror(
-                "Error en depuración",
-                f"Ocurrió un error al procesar el ticket:\n{e}",
-            )
-            return
-
         self.resumen_ani = resumen
         self.base_depurada = base_depurada
         self.descartados = descartados
 
         self.lbl_archivo.config(
             text=(
-                f"Archivo: {ruta.name}  |  ANI: {col_ani}  |  "
+                f"{self._nombre_archivos(rutas)}  |  ANI: {col_ani}  |  "
                 f"ESTADO: {col_estado}  |  SUBESTADO: {col_subestado}"
             )
         )
@@ -482,6 +953,15 @@ class DepuradorGUI(tk.Tk):
             "Ahora podés exportar los archivos desde los botones de abajo.",
         )
 
+    def ver_tabla(self, df: pd.DataFrame | None, titulo: str) -> None:
+        if df is None:
+            messagebox.showwarning(
+                "Sin datos",
+                "Primero cargá un ticket y dejá que se procese.",
+            )
+            return
+        abrir_tabla(self, df, titulo)
+
     def exportar_resumen(self):
         if self.resumen_ani is None:
             messagebox.showwarning(
@@ -0,0 +1,266 @@
+import argparse
+import numpy as np
+import pandas as pd
+
+from datetime import date, timedelta
+from pathlib import Path
+
+# ============================
+# CONFIGURACIÓN BÁSICA
+# ============================
+
+# Mismos nombres de columna que exporta Neotel
+COL_ANI = "ANI/Teléfono"
+COL_ESTADO = "Estado"
+COL_SUBESTADO = "Sub-Estado"
+COL_FECHA = "Inicio"
+COL_BASE = "BASE"
+
+# Mezcla por defecto de (Estado, Sub-Estado) -> peso relativo.
+# Incluye las variantes que aparecen en los tickets reales: unallocated y
+# rejected en cualquiera de las dos columnas, subestado vacío, "agente".
+MEZCLA_ESTADOS: dict[tuple[str, str], float] = {
+    ("ANSWER", "answer agent"): 0.07,
+    ("ANSWER", "Agente"): 0.01,
+    ("ANSWER", "answering machine"): 0.20,
+    ("ANSWER", ""): 0.02,
+    ("NO ANSWER", ""): 0.33,
+    ("NO ANSWER", "answering machine"): 0.03,
+    ("BUSY", ""): 0.10,
+    ("UNALLOCATED", ""): 0.05,
+    ("FAILED", "unallocated"): 0.03,
+    ("REJECTED", ""): 0.06,
+    ("FAILED", "rejected"): 0.03,
+    ("FAILED", ""): 0.07,
+}
+
+# Los números inválidos dan siempre "unallocated" (como en la realidad)
+ESTADOS_INVALIDO: dict[tuple[str, str], float] = {
+    ("UNALLOCATED", ""): 0.6,
+    ("FAILED", "unallocated"): 0.4,
+}
+
+HASTA_POR_DEFECTO = date(2025, 3, 31)
+
+# Excel no admite más filas por hoja (incluye la de encabezados)
+MAX_FILAS_XLSX = 1_048_576 - 1
+
+# ============================
+# GENERACIÓN
+# ============================
+
+def leer_mezcla(textos: list[str]) -> dict[tuple[str, str], float]:
+    """
+    Mezcla de (Estado, Sub-Estado) desde la línea de comandos: una entrada
+    "ESTADO:SUBESTADO=PESO" por combinación; "ESTADO=PESO" (o "ESTADO:=PESO")
+    es con subestado vacío. Ej.: "ANSWER:answer agent=0.1" "NO ANSWER=0.5".
+    """
+    mezcla: dict[tuple[str, str], float] = {}
+    for texto in textos:
+        clave, signo, peso = texto.rpartition("=")
+        if not signo or not clave.strip():
+            raise ValueError(f"Mezcla inválida: {texto!r} (usar ESTADO:SUBESTADO=PESO)")
+        estado, _, subestado = clave.partition(":")
+        try:
+            valor = float(peso)
+        except ValueError:
+            raise ValueError(f"Peso inválido en {texto!r}: {peso!r}") from None
+        if valor < 0:
+            raise ValueError(f"Peso negativo en {texto!r}")
+        mezcla[(estado.strip(), subestado.strip())] = valor
+    if not sum(mezcla.values()):
+        raise ValueError("La mezcla necesita al menos un peso mayor a 0")
+    return mezcla
+
+def _sortear(
+    rng: np.random.Generator,
+    mezcla: dict[tuple[str, str], float],
+    n: int,
+) -> tuple[np.ndarray, list[tuple[str, str]]]:
+    """Códigos de (estado, subestado) sorteados según los pesos de la mezcla."""
+    claves = list(mezcla)
+    pesos = np.array([mezcla[c] for c in claves], dtype=float)
+    return rng.choice(len(claves), size=n, p=pesos / pesos.sum()), claves
+
+def generar_ticket(
+    filas: int,
+    intentos_por_ani: float = 5.0,
+    bases: int = 3,
+    dias: int = 14,
+    hasta: date = HASTA_POR_DEFECTO,
+    mezcla: dict[tuple[str, str], float] | None = None,
+    pct_invalidos: float = 5.0,
+    semilla: int = 0,
+) -> pd.DataFrame:
+    """
+    Ticket sintético de Neotel, determinístico para una misma semilla.
+
+    - intentos_por_ani: promedio de llamados por ANI (la cantidad de ANIs
+      es filas / intentos_por_ani; la carga por ANI es dispar, como en una
+      campaña real)
+    - bases: cantidad de campañas (BASE); cada ANI pertenece a una y un
+      10 % de los llamados se hace desde otra (ANIs compartidos)
+    - dias: días corridos hasta `hasta` inclusive, llamados de 8 a 21 h
+    - pct_invalidos: % de ANIs cuyos llamados son siempre unallocated
+
+    Las filas salen en orden cronológico, como el export de Neotel.
+    Las columnas de texto son categóricas para poder generar decenas de
+    millones de filas sin reventar la memoria.
+    """
+    rng = np.random.default_rng(semilla)
+    n_anis = max(1, int(round(filas / intentos_por_ani)))
+
+    # Carga dispar por ANI: pesos gamma (algunos ANIs se llaman mucho más)
+    pesos = rng.gamma(2.0, size=n_anis)
+    ani = rng.choice(n_anis, size=filas, p=pesos / pesos.sum())
+    # Números de 10 dígitos distintos (7919 es coprimo con 10^8)
+    sufijos = (np.arange(n_anis, dtype=np.int64) * 7919 + 10_000_000) % 100_000_000
+    numeros = pd.Index(np.char.add("11", np.char.zfill(sufijos.astype(str), 8)))
+
+    estado_fila, claves = _sortear(rng, mezcla or MEZCLA_ESTADOS, filas)
+    invalido = rng.random(n_anis) < pct_invalidos / 100
+    filas_invalidas = invalido[ani]
+    codigos_inv, claves_inv = _sortear(rng, ESTADOS_INVALIDO, int(filas_invalidas.sum()))
+    estado_fila[filas_invalidas] = len(claves) + codigos_inv
+    claves = claves + claves_inv
+
+    base_ani = rng.integers(0, bases, size=n_anis)[ani]
+    otra = rng.random(filas) < 0.10
+    base_ani[otra] = rng.integers(0, bases, size=int(otra.sum()))
+
+    desde = np.datetime64(hasta - timedelta(days=dias - 1), "s")
+    segundos = rng.integers(0, dias, size=filas) * 86_400 + rng.integers(8 * 3600, 21 * 3600, size=filas)
+    inicio = desde + np.sort(segundos).astype("timedelta64[s]")
+
+    estados = pd.Index([e for e, _ in claves]).unique()
+    subestados = pd.Index([s for _, s in claves]).unique()
+    cod_estado = estados.get_indexer([e for e, _ in claves])[estado_fila]
+    cod_subestado = subestados.get_indexer([s for _, s in claves])[estado_fila]
+
+    return pd.DataFrame(
+        {
+            COL_ANI: pd.Categorical.from_codes(ani, numeros),
+            COL_ESTADO: pd.Categorical.from_codes(cod_estado, estados),
+            COL_SUBESTADO: pd.Categorical.from_codes(cod_subestado, subestados),
+            COL_FECHA: inicio,
+            COL_BASE: pd.Categorical.from_codes(
+                base_ani, [f"BASE_{i + 1:02d}" for i in range(bases)]
+            ),
+        }
+    )
+
+def escribir_ticket(df: pd.DataFrame, ruta: Path) -> Path:
+    """
+    Escribe el ticket como lo exporta Neotel según la extensión:
+    .csv (separado por ';'), .txt (tabulado) o .xlsx. Texto en latin1.
+    """
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    extension = ruta.suffix.lower()
+    if extension in (".csv", ".txt"):
+        df.to_csv(
+            ruta,
+            sep=";" if extension == ".csv" else "\t",
+            index=False,
+            encoding="latin1",
+            date_format="%Y-%m-%d %H:%M:%S",
+        )
+    elif extension == ".xlsx":
+        if len(df) > MAX_FILAS_XLSX:
+            raise ValueError(
+                f"Un .xlsx admite hasta {MAX_FILAS_XLSX} filas; el ticket tiene {len(df)} (usar .csv o .txt)"
+            )
+        df.to_excel(ruta, index=False)
+    else:
+        raise ValueError(f"Formato de archivo no soportado: {ruta.name}")
+    return ruta
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Genera tickets sintéticos de Neotel (determinísticos) para pruebas y benchmarks."
+    )
+    parser.add_argument(
+        "salida",
+        type=Path,
+        help="Archivo a generar (.csv, .txt o .xlsx)",
+    )
+    parser.add_argument(
+        "--filas",
+        type=int,
+        default=100_000,
+        help="Cantidad de llamados (default: 100000)",
+    )
+    parser.add_argument(
+        "--intentos",
+        type=float,
+        default=5.0,
+        help="Promedio de intentos por ANI (default: 5)",
+    )
+    parser.add_argument(
+        "--bases",
+        type=int,
+        default=3,
+        help="Cantidad de BASE / campañas (default: 3)",
+    )
+    parser.add_argument(
+        "--dias",
+        type=int,
+        default=14,
+        help="Días corridos que cubre el ticket (default: 14)",
+    )
+    parser.add_argument(
+        "--hasta",
+        type=date.fromisoformat,
+        default=HASTA_POR_DEFECTO,
+        help=f"Último día del ticket (default: {HASTA_POR_DEFECTO})",
+    )
+    parser.add_argument(
+        "--invalidos",
+        type=float,
+        default=5.0,
+        help="%% de ANIs inválidos (siempre unallocated) (default: 5)",
+    )
+    parser.add_argument(
+        "--mezcla",
+        nargs="+",
+        metavar="ESTADO:SUBESTADO=PESO",
+        help=(
+            "Mezcla de Estado/Sub-Estado con pesos relativos, ej. "
+            "\"ANSWER:answer agent=0.1\" \"NO ANSWER=0.5\" \"BUSY=0.4\" "
+            "(default: MEZCLA_ESTADOS, parecida a una campaña real)"
+        ),
+    )
+    parser.add_argument(
+        "--semilla",
+        type=int,
+        default=0,
+        help="Semilla aleatoria: misma semilla, mismo ticket (default: 0)",
+    )
+    args = parser.parse_args()
+
+    try:
+        mezcla = leer_mezcla(args.mezcla) if args.mezcla else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    df = generar_ticket(
+        args.filas,
+        intentos_por_ani=args.intentos,
+        bases=args.bases,
+        dias=args.dias,
+        hasta=args.hasta,
+        mezcla=mezcla,
+        pct_invalidos=args.invalidos,
+        semilla=args.semilla,
+    )
+    try:
+        escribir_ticket(df, args.salida)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(
+        f"{args.salida}: {len(df)} llamados, {df[COL_ANI].nunique()} ANIs, "
+        f"{args.bases} bases, {args.dias} días"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,19 @@
 import os
 import base64
-import unicodedata
+import functools
+import hashlib
 import io
+import threading
+import time
 import pandas as pd
 import streamlit as st
 import plotly.express as px
 import numpy as np
 
+from contextlib import contextmanager
 from pathlib import Path
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
-from datetime import datetime, timedelta
+from datetime import date, datetime
 
 import depurador_bases
 
@@ -52,6 +56,13 @@ TURN_COLOR_MAP = {
     "Tarde": GOOD_GREEN,
 }
 
+# Las cachés por dataset son del proceso, compartidas por todas las sesiones,
+# y cada subida es un dataset distinto: se dimensionan para SESIONES_MAX
+# supervisores a la vez (si no, se desalojan entre ellos y cada rerun vuelve
+# a procesar el ticket). TTL_DATASET libera lo de sesiones ya cerradas.
+SESIONES_MAX = 16
+TTL_DATASET = 2 * 3600  # segundos
+
 # ---------------------------------------------------------
 # FUNCIÓN PARA CARGAR CSS EXTERNO
 # ---------------------------------------------------------
@@ -113,47 +124,101 @@ else:
         unsafe_allow_html=True,
     )
 
+# ---------------------------------------------------------
+# RENDIMIENTO (panel opcional, se activa en la barra lateral)
+# ---------------------------------------------------------
+# El script corre entero en cada interacción: estas mediciones son las del
+# rerun actual. Lo acumulado de la sesión va en st.session_state.
+INICIO_RERUN = time.perf_counter()
+OPERACIONES: list[dict] = []  # {"operacion", "segundos", "tipo"}
+CALCULADOS: set = set()  # funciones cacheadas que corrieron (fallo de caché)
+
+def registrar_operacion(operacion: str, segundos: float, tipo: str) -> None:
+    OPERACIONES.append({"operacion": operacion, "segundos": segundos, "tipo": tipo})
+
+def registrar_calculo(clave) -> None:
+    """Primera línea de cada función cacheada: solo corre si no estaba en caché."""
+    CALCULADOS.add(clave)
+
+@contextmanager
+def medir_operacion(operacion: str, clave_calculo=None):
+    """
+    Mide el bloque. Con `clave_calculo` (la de registrar_calculo) se anota
+    como acierto o fallo de caché según si la función llegó a correr.
+    """
+    CALCULADOS.discard(clave_calculo)
+    inicio = time.perf_counter()
+    yield
+    if clave_calculo is None:
+        tipo = "bloque"
+    else:
+        tipo = "fallo" if clave_calculo in CALCULADOS else "acierto"
+    registrar_operacion(operacion, time.perf_counter() - inicio, tipo)
+
+def medido(nombre: str):
+    """Decorador para poner por encima de @st.cache_*: mide cada llamada (ver medir_operacion)."""
+    def decorar(funcion):
+        @functools.wraps(funcion)
+        def envuelta(*args, **kwargs):
+            with medir_operacion(nombre, nombre):
+                return funcion(*args, **kwargs)
+        return envuelta
+    return decorar
+
+@st.cache_resource
+def _colector_etapas() -> threading.local:
+    """
+    Un único suscriptor a las etapas de depurador_bases por proceso (lectura,
+    fechas, resumen por ANI...). Cada rerun indica, en el hilo que lo corre,
+    en qué lista dejar los eventos.
+    """
+    local = threading.local()
+
+    def recibir(evento: depurador_bases.EventoEtapa) -> None:
+        destino = getattr(local, "destino", None)
+        if destino is not None:
+            destino.append(
+                {"operacion": f"etapa: {evento.etapa}", "segundos": evento.segundos, "tipo": "etapa"}
+            )
+
+    depurador_bases.suscribir_etapas(recibir)
+    return local
+
+_colector_etapas().destino = OPERACIONES
+
 # ---------------------------------------------------------
 # FUNCIONES AUXILIARES
 # ---------------------------------------------------------
-def normalizar_columna(col: str) -> str:
-    col = col.strip()
-    col = "".join(
-        c
-        for c in unicodedata.normalize("NFKD", col)
-        if not unicodedata.combining(c)
-    )
-    col = col.upper()
-    col = col.replace(" ", "").replace("-", "").replace("/", "")
-    return col
+normalizar_columna = depurador_bases.normalizar_columna
 
-def leer_archivo(file) -> pd.DataFrame | None:
+def leer_archivo(
+    file,
+    ventana: depurador_bases.VentanaFechas | None = None,
+) -> pd.DataFrame | None:
+    """Lee un ticket subido; las filas fuera de `ventana` se descartan al leer."""
     nombre = file.name.lower()
+    if not nombre.endswith((".csv", ".txt", ".xlsx", ".xlsm", ".xlsb", ".xls")):
+        st.error(f"❌ Formato no soportado: {file.name}")
+        return None
     try:
-        if nombre.endswith((".csv", ".txt")):
-            return pd.read_csv(file, sep=None, engine="python", encoding="latin1")
-        if nombre.endswith((".xlsx", ".xlsm", ".xlsb")):
-            return pd.read_excel(file, engine="openpyxl")
-        if nombre.endswith(".xls"):
-            return pd.read_excel(file, engine="xlrd")
+        return depurador_bases.leer_ticket(file, ventana=ventana, nombre=nombre)
     except Exception as e:
         st.error(f"❌ No se pudo leer {file.name}: {e}")
         return None
 
-    st.error(f"❌ Formato no soportado: {file.name}")
-    return None
-
 def buscar_columna(df: pd.DataFrame, posibles: list[str]) -> str | None:
     for candidato in posibles:
         if candidato in df.columns:
             return candidato
     return None
 
+@medido("cargar_prefijos_tabla")
 @st.cache_data
 def cargar_prefijos_tabla(
     ruta: str = "Prefijos interurbanos.csv",
 ) -> pd.DataFrame | None:
     """Carga el CSV de prefijos y agrega una columna PREFIJO_NUM solo dígitos."""
+    registrar_calculo("cargar_prefijos_tabla")
     if not os.path.exists(ruta):
         return None
 
@@ -223,9 +288,11 @@ def cargar_prefijos_tabla(
 
     return pref
 
+@medido("obtener_lista_prefijos")
 @st.cache_data
 def obtener_lista_prefijos(ruta: str = "Prefijos interurbanos.csv") -> list[str] | None:
     """Devuelve lista de prefijos numéricos ordenados de mayor a menor longitud."""
+    registrar_calculo("obtener_lista_prefijos")
     pref = cargar_prefijos_tabla(ruta)
     if pref is None or pref.empty:
         return None
@@ -241,6 +308,367 @@ def obtener_lista_prefijos(ruta: str = "Prefijos interurbanos.csv") -> list[str]
     lista = sorted(lista, key=len, reverse=True)
     return lista
 
+def hora_a_decimal(valor) -> float | None:
+    """Convierte '16:30' / '16.5' / 16.5 a hora decimal (16.5)."""
+    texto = str(valor).strip().replace(",", ".")
+    if not texto or texto.lower() == "nan":
+        return None
+    try:
+        if ":" in texto:
+            horas, minutos = texto.split(":")[:2]
+            return int(horas) + int(minutos) / 60.0
+        return float(texto)
+    except ValueError:
+        return None
+
+@medido("cargar_feriados")
+@st.cache_data
+def cargar_feriados(ruta: str = "Feriados.csv") -> tuple[date, ...]:
+    """
+    Feriados (una fecha por fila, columna FECHA) que no cuentan como días
+    hábiles en la ventana de análisis. Sin archivo, no hay feriados.
+    """
+    registrar_calculo("cargar_feriados")
+    if not os.path.exists(ruta):
+        return ()
+
+    for args in [
+        dict(sep=None, engine="python", encoding="utf-8-sig"),
+        dict(sep=None, engine="python", encoding="latin1"),
+    ]:
+        try:
+            tabla = pd.read_csv(ruta, dtype=str, **args)
+            break
+        except Exception:
+            continue
+    else:
+        return ()
+
+    tabla.columns = [normalizar_columna(c) for c in tabla.columns]
+    if "FECHA" not in tabla.columns:
+        return ()
+
+    fechas = pd.to_datetime(tabla["FECHA"], errors="coerce", dayfirst=True).dropna()
+    return tuple(sorted(set(fechas.dt.date)))
+
+@medido("cargar_tabla_turnos")
+@st.cache_data
+def cargar_tabla_turnos(
+    ruta: str = "Turnos por campaña.csv",
+) -> tuple[tuple, dict[str, list]]:
+    """
+    Tabla de turnos configurable por campaña (BASE;TURNO;DESDE;HASTA).
+    Filas con BASE vacía o '*' reemplazan la tabla por defecto.
+    Si el archivo no existe se usan los turnos reales (Mañana / Tarde).
+    """
+    registrar_calculo("cargar_tabla_turnos")
+    turnos_defecto = depurador_bases.TURNOS_POR_DEFECTO
+    if not os.path.exists(ruta):
+        return turnos_defecto, {}
+
+    tabla = None
+    for args in [
+        dict(sep=None, engine="python", encoding="utf-8-sig"),
+        dict(sep=None, engine="python", encoding="latin1"),
+    ]:
+        try:
+            tabla = pd.read_csv(ruta, dtype=str, **args)
+            break
+        except Exception:
+            continue
+
+    if tabla is None or tabla.empty:
+        return turnos_defecto, {}
+
+    tabla.columns = [normalizar_columna(c) for c in tabla.columns]
+    if not {"TURNO", "DESDE", "HASTA"}.issubset(tabla.columns):
+        return turnos_defecto, {}
+    if "BASE" not in tabla.columns:
+        tabla["BASE"] = "*"
+
+    generales: list = []
+    por_base: dict[str, list] = {}
+    for _, fila in tabla.iterrows():
+        desde = hora_a_decimal(fila["DESDE"])
+        hasta = hora_a_decimal(fila["HASTA"])
+        if desde is None or hasta is None:
+            continue
+        turno = (str(fila["TURNO"]).strip(), desde, hasta)
+        base = str(fila["BASE"]).strip() if pd.notna(fila["BASE"]) else ""
+        if base in ("", "*"):
+            generales.append(turno)
+        else:
+            por_base.setdefault(base, []).append(turno)
+
+    return (tuple(generales) if generales else turnos_defecto), por_base
+
+@medido("calcular_turnos")
+@st.cache_resource(max_entries=SESIONES_MAX, ttl=TTL_DATASET)
+def calcular_turnos(
+    clave: tuple,
+    _fechas: pd.Series,
+    _bases: pd.Series | None,
+    turnos: tuple,
+    turnos_por_base: dict[str, list],
+) -> pd.DataFrame:
+    """
+    Turno y franja horaria de cada llamado, una sola vez por dataset.
+    (Compartido entre pestañas: no modificar el resultado.)
+    """
+    registrar_calculo("calcular_turnos")
+    return depurador_bases.clasificar_turnos(
+        _fechas,
+        bases=_bases,
+        turnos_por_base=turnos_por_base,
+        turnos=turnos,
+    )
+
+@medido("calcular_indice_filtros")
+@st.cache_resource(max_entries=SESIONES_MAX, ttl=TTL_DATASET)
+def calcular_indice_filtros(
+    clave: tuple,
+    _data: pd.DataFrame,
+    columnas: tuple[str, ...],
+    col_duracion: str,
+) -> dict:
+    """Bitmaps por valor (Estado / Subestado) y duración ordenada, una vez por dataset."""
+    registrar_calculo("calcular_indice_filtros")
+    return depurador_bases.construir_indice_bitmap(_data, columnas, col_duracion)
+
+@medido("calcular_indice_ani")
+@st.cache_resource(max_entries=SESIONES_MAX, ttl=TTL_DATASET)
+def calcular_indice_ani(clave: tuple, _anis: pd.Series) -> dict:
+    """Índice de trigramas sobre los ANIs distintos + tabla ANI -> filas, una vez por dataset."""
+    registrar_calculo("calcular_indice_ani")
+    return depurador_bases.construir_indice_ani(_anis)
+
+@medido("calcular_orden_columna")
+@st.cache_resource(max_entries=16 * SESIONES_MAX, ttl=TTL_DATASET)
+def calcular_orden_columna(
+    clave: tuple,
+    _serie: pd.Series,
+    columna: str,
+) -> tuple[np.ndarray, int]:
+    """
+    Orden global (estable, vacíos al final) de una columna del dataset, una sola
+    vez por dataset y columna. Devuelve (posiciones ordenadas, cantidad no vacía).
+    """
+    registrar_calculo("calcular_orden_columna")
+    serie = _serie.reset_index(drop=True)
+    try:
+        ordenada = serie.sort_values(kind="stable", na_position="last")
+    except TypeError:
+        # Columnas con tipos mezclados: ordenamos como texto
+        ordenada = serie.astype(str).where(serie.notna()).sort_values(
+            kind="stable", na_position="last"
+        )
+    return ordenada.index.to_numpy(), int(serie.notna().sum())
+
+def ordenar_filas(
+    filas: np.ndarray,
+    orden: np.ndarray,
+    n_validos: int,
+    n_total: int,
+    ascendente: bool = True,
+) -> np.ndarray:
+    """
+    Ordena un subconjunto de filas recorriendo el orden global precalculado
+    (O(n) con una máscara, sin volver a ordenar). Los vacíos quedan al final.
+    """
+    if not ascendente:
+        orden = np.concatenate([orden[:n_validos][::-1], orden[n_validos:]])
+    marcadas = np.zeros(n_total, dtype=bool)
+    marcadas[filas] = True
+    return orden[marcadas[orden]]
+
+@medido("preparar_dataset")
+@st.cache_resource(max_entries=SESIONES_MAX, ttl=TTL_DATASET, show_spinner="Procesando archivos...")
+def preparar_dataset(clave: tuple, _archivos: list, todas_las_columnas: bool = False) -> dict:
+    """
+    Lectura, normalización, filtro de fechas y resumen por ANI, una sola vez
+    por dataset. Los reruns (cambiar de pestaña, mover un filtro) reutilizan
+    el resultado. Todo lo devuelto es compartido: no modificarlo.
+
+    Los tipos se compactan (category, enteros chicos, float32) y, salvo
+    todas_las_columnas, se descartan las columnas del ticket que no se usan.
+    """
+    registrar_calculo("preparar_dataset")
+    # Ventana de análisis: solo lunes a viernes (sin feriados) y últimas
+    # 2 semanas desde hoy. Se aplica al leer, así lo de afuera no se acumula.
+    ventana = depurador_bases.VentanaFechas.ultimos_dias(
+        14, solo_habiles=True, feriados=cargar_feriados()
+    )
+
+    dfs: list[pd.DataFrame] = []
+    for f in _archivos:
+        df_tmp = leer_archivo(f, ventana)
+        if df_tmp is not None:
+            dfs.append(df_tmp)
+
+    if not dfs:
+        return {"error": "No se pudo leer ningún archivo válido."}
+
+    data = pd.concat(dfs, ignore_index=True)
+
+    # ---------------------------------------------------------
+    # NORMALIZAR COLUMNAS Y DETECTAR CLAVES
+    # ---------------------------------------------------------
+    columnas_originales = list(data.columns)
+    columnas_normalizadas = [normalizar_columna(c) for c in columnas_originales]
+    data.columns = columnas_normalizadas
+
+    mapa_headers = {
+        norm: orig for norm, orig in zip(columnas_normalizadas, columnas_originales)
+    }
+
+    col_estado = buscar_columna(data, ["ESTADO", "STATUS", "STATE"])
+    col_subestado = buscar_columna(data, ["SUBESTADO", "SUBESTATUS", "SUBSTATE"])
+    col_ani = buscar_columna(data, ["ANI", "ANITELEFONO", "TELEFONO", "PHONE"])
+    col_base = buscar_columna(data, ["BASE", "NOMBREBASE", "ORIGEN"])
+    col_duracion = buscar_columna(
+        data,
+        ["DURACION", "DURACIONENSEGUNDOS", "SEGUNDOS", "DURATION"],
+    )
+
+    # Columna fecha/hora para turnos y resumen ANI
+    posibles_fechas = list(depurador_bases.COLUMNAS_FECHA)
+    col_fecha = buscar_columna(data, posibles_fechas)
+
+    faltan = []
+    if not col_estado:
+        faltan.append("ESTADO")
+    if not col_subestado:
+        faltan.append("SUBESTADO")
+    if not col_ani:
+        faltan.append("ANI / TELÉFONO")
+    if not col_duracion:
+        faltan.append("DURACIÓN (segundos)")
+    if not col_base:
+        faltan.append("BASE")
+
+    if faltan:
+        return {"error": f"Faltan columnas necesarias en el archivo: {faltan}"}
+
+    avisos: list[str] = []
+
+    # ---------------------------------------------------------
+    # FILTRO DE FECHA: ya aplicado al leer cada archivo (ventana).
+    # Si algún archivo venía sin fecha, sus filas quedan vacías acá.
+    # ---------------------------------------------------------
+    if col_fecha:
+        data[col_fecha] = pd.to_datetime(data[col_fecha], errors="coerce")
+        data = data.dropna(subset=[col_fecha])
+    else:
+        avisos.append(
+            "No se encontró una columna de fecha/hora (FECHAINICIO, INICIO, LOGTIME, etc.). "
+            "Se analiza todo el período cargado."
+        )
+
+    data = data.copy()
+    data[col_subestado] = data[col_subestado].fillna("VACIO")
+    data[col_duracion] = pd.to_numeric(data[col_duracion], errors="coerce")
+
+    usadas = [c for c in (col_estado, col_subestado, col_ani, col_base, col_duracion, col_fecha) if c]
+    data, reporte_data = depurador_bases.compactar_tipos(
+        data,
+        conservar=None if todas_las_columnas else usadas,
+        col_ani=col_ani,
+    )
+
+    # ---------------------------------------------------------
+    # RESUMEN POR ANI (para depuración y tablero visual)
+    # ---------------------------------------------------------
+    resumen_ani, base_depurada, descartados = depurador_bases.procesar_desde_df(
+        data,
+        col_estado=col_estado,
+        col_subestado=col_subestado,
+        col_ani=col_ani,
+        col_fecha=col_fecha,
+    )
+    resumen_ani, reporte_resumen = depurador_bases.compactar_resumen(resumen_ani)
+    base_depurada, reporte_depurada = depurador_bases.compactar_resumen(base_depurada)
+    descartados, reporte_descartados = depurador_bases.compactar_resumen(descartados)
+
+    # Índice ANI <-> BASE (códigos alineados con el resumen): ámbitos por
+    # campaña del simulador, filtro de bases y exportes por campaña.
+    indice_ani_base = depurador_bases.construir_indice_ani_base(
+        data, col_ani, col_base, anis=resumen_ani["ANI"]
+    )
+
+    return {
+        "error": None,
+        "avisos": avisos,
+        "data": data,
+        "mapa_headers": mapa_headers,
+        "col_estado": col_estado,
+        "col_subestado": col_subestado,
+        "col_ani": col_ani,
+        "col_base": col_base,
+        "col_duracion": col_duracion,
+        "col_fecha": col_fecha,
+        "dur_min_global": int(data[col_duracion].min(skipna=True)),
+        "dur_max_global": int(data[col_duracion].max(skipna=True)),
+        "resumen_ani": resumen_ani,
+        "base_depurada": base_depurada,
+        "descartados": descartados,
+        "indice_ani_base": indice_ani_base,
+        "reporte_tipos": pd.concat(
+            [
+                reporte.assign(tabla=tabla)
+                for tabla, reporte in (
+                    ("data", reporte_data),
+                    ("resumen_ani", reporte_resumen),
+                    ("base_depurada", reporte_depurada),
+                    ("descartados", reporte_descartados),
+                )
+            ],
+            ignore_index=True,
+        ),
+    }
+
+@st.cache_resource(max_entries=64 * SESIONES_MAX, ttl=TTL_DATASET)
+def _memo_por_dataset(clave: tuple, nombre, _calcular):
+    registrar_calculo(("por_dataset", nombre))
+    return _calcular()
+
+def por_dataset(nombre, calcular):
+    """
+    Calcula `calcular()` la primera vez que se pide `nombre` para el dataset
+    actual y lo reutiliza en los reruns siguientes. Cambia el dataset, cambia
+    la clave y se recalcula. El resultado es compartido: no modificarlo.
+    """
+    etiqueta = nombre if isinstance(nombre, str) else nombre[0]
+    with medir_operacion(f"por_dataset: {etiqueta}", ("por_dataset", nombre)):
+        return _memo_por_dataset(clave_dataset, nombre, calcular)
+
+def descarga_diferida(
+    etiqueta: str,
+    firma: tuple,
+    generar,
+    file_name: str,
+    mime: str,
+) -> None:
+    """
+    Botón de descarga que arma el archivo recién cuando se lo pide.
+    Lo generado queda en la sesión mientras no cambie `firma` (dataset +
+    filtros), así los reruns no vuelven a serializar miles de filas.
+    """
+    clave = f"descarga::{file_name}"
+    guardado = st.session_state.get(clave)
+    if guardado is None or guardado[0] != firma:
+        if not st.button(f"⚙️ Preparar {file_name}", key=f"preparar::{file_name}"):
+            return
+        guardado = (firma, generar())
+        st.session_state[clave] = guardado
+
+    st.download_button(etiqueta, data=guardado[1], file_name=file_name, mime=mime)
+
+def a_xlsx(df: pd.DataFrame, hoja: str) -> bytes:
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
+        df.to_excel(writer, index=False, sheet_name=hoja)
+    return buf.getvalue()
+
 # ---------------------------------------------------------
 # CARGA DE ARCHIVOS
 # ---------------------------------------------------------
@@ -263,126 +691,122 @@ if not uploaded_files:
     st.info("Subí al menos un archivo para habilitar las pestañas de análisis.")
     st.stop()
 
-dfs: list[pd.DataFrame] = []
-for f in uploaded_files:
-    df_tmp = leer_archivo(f)
-    if df_tmp is not None:
-        dfs.append(df_tmp)
+todas_las_columnas = st.sidebar.checkbox(
+    "Conservar todas las columnas del ticket",
+    value=False,
+    help=(
+        "Por defecto solo se cargan las columnas que usa el análisis (estado, "
+        "subestado, ANI, base, duración y fecha). Activalo para ver y exportar "
+        "el resto de las columnas del ticket (usa más memoria)."
+    ),
+)
 
-if not dfs:
-    st.error("No se pudo leer ningún archivo válido.")
-    st.stop()
+# Identifica el dataset cargado: cambia si cambian los archivos, el día
+# (el filtro de las últimas 2 semanas depende de la fecha de hoy) o las
+# columnas que se conservan (cambian la grilla y los exportes).
+clave_dataset = (
+    tuple((f.name, f.size, getattr(f, "file_id", None)) for f in uploaded_files),
+    datetime.today().date().isoformat(),
+    todas_las_columnas,
+)
 
-data = pd.concat(dfs, ignore_index=True)
+dataset = preparar_dataset(clave_dataset, uploaded_files, todas_las_columnas)
 
-# ---------------------------------------------------------
-# NORMALIZAR COLUMNAS Y DETECTAR CLAVES
-# ---------------------------------------------------------
-columnas_originales = list(data.columns)
-columnas_normalizadas = [normalizar_columna(c) for c in columnas_originales]
-data.columns = columnas_normalizadas
+if dataset.get("error"):
+    st.error(dataset["error"])
+    st.stop()
 
-mapa_headers = {
-    norm: orig for norm, orig in zip(columnas_normalizadas, columnas_originales)
-}
+for aviso in dataset["avisos"]:
+    st.warning(aviso)
 
-col_estado = buscar_columna(data, ["ESTADO", "STATUS", "STATE"])
-col_subestado = buscar_columna(data, ["SUBESTADO", "SUBESTATUS", "SUBSTATE"])
-col_ani = buscar_columna(data, ["ANI", "ANITELEFONO", "TELEFONO", "PHONE"])
-col_base = buscar_columna(data, ["BASE", "NOMBREBASE", "ORIGEN"])
-col_duracion = buscar_columna(
-    data,
-    ["DURACION", "DURACIONENSEGUNDOS", "SEGUNDOS", "DURATION"],
-)
+# A partir de acá, TODO el análisis usa data ya filtrado (compartido: solo lectura)
+data = dataset["data"]
+mapa_headers = dataset["mapa_headers"]
+col_estado = dataset["col_estado"]
+col_subestado = dataset["col_subestado"]
+col_ani = dataset["col_ani"]
+col_base = dataset["col_base"]
+col_duracion = dataset["col_duracion"]
+col_fecha = dataset["col_fecha"]
 
-# Columna fecha/hora para turnos y resumen ANI
-posibles_fechas = ["FECHAINICIO", "FECHAHORA", "INICIO", "LOGTIME", "FECHALLAMADA"]
-col_fecha = buscar_columna(data, posibles_fechas)
-
-faltan = []
-if not col_estado:
-    faltan.append("ESTADO")
-if not col_subestado:
-    faltan.append("SUBESTADO")
-if not col_ani:
-    faltan.append("ANI / TELÉFONO")
-if not col_duracion:
-    faltan.append("DURACIÓN (segundos)")
-if not col_base:
-    faltan.append("BASE")
-
-if faltan:
-    st.error(f"Faltan columnas necesarias en el archivo: {faltan}")
-    st.stop()
+dur_min_global = dataset["dur_min_global"]
+dur_max_global = dataset["dur_max_global"]
+
+resumen_ani = dataset["resumen_ani"]
+base_depurada = dataset["base_depurada"]
+descartados = dataset["descartados"]
+indice_ani_base = dataset["indice_ani_base"]
 
 # ---------------------------------------------------------
-# FILTRO DE FECHA: solo lunes a viernes y últimas 2 semanas
+# TURNOS Y FRANJAS HORARIAS (una vez por dataset, compartido entre pestañas)
 # ---------------------------------------------------------
-if col_fecha:
-    data[col_fecha] = pd.to_datetime(data[col_fecha], errors="coerce")
-    data = data.dropna(subset=[col_fecha])
-
-    # Solo lunes a viernes (0 = lunes, 6 = domingo)
-    data = data[data[col_fecha].dt.dayofweek < 5]
-
-    # Opcional: últimas 2 semanas desde hoy
-    hoy = datetime.today().date()
-    limite = hoy - timedelta(days=14)
-    data = data[data[col_fecha].dt.date >= limite]
-else:
-    st.warning(
-        "No se encontró una columna de fecha/hora (FECHAINICIO, INICIO, LOGTIME, etc.). "
-        "Se analiza todo el período cargado."
+turnos_config, turnos_por_base = cargar_tabla_turnos()
+
+def obtener_primer_contacto() -> pd.DataFrame:
+    """Intento y demora del primer ANSWER-AGENT por ANI (una vez por dataset)."""
+    return por_dataset(
+        "primer_contacto",
+        lambda: depurador_bases.primer_contacto_por_ani(
+            data, col_estado, col_subestado, col_ani, col_fecha
+        ),
     )
 
-# A partir de acá, TODO el análisis usa data ya filtrado
-data[col_subestado] = data[col_subestado].fillna("VACIO")
-data[col_duracion] = pd.to_numeric(data[col_duracion], errors="coerce")
-
-data[col_subestado] = data[col_subestado].fillna("VACIO")
-data[col_duracion] = pd.to_numeric(data[col_duracion], errors="coerce")
-
-dur_min_global = int(data[col_duracion].min(skipna=True))
-dur_max_global = int(data[col_duracion].max(skipna=True))
+def obtener_turnos() -> pd.DataFrame | None:
+    """Turnos del dataset; se calculan la primera vez que una pestaña los pide."""
+    if not col_fecha:
+        return None
+    return calcular_turnos(
+        clave_dataset,
+        data[col_fecha],
+        data[col_base] if col_base else None,
+        turnos_config,
+        turnos_por_base,
+    )
 
-# ---------------------------------------------------------
-# RESUMEN POR ANI (para depuración y tablero visual)
-# ---------------------------------------------------------
-resumen_ani, base_depurada, descartados = depurador_bases.procesar_desde_df(
-    data,
-    col_estado=col_estado,
-    col_subestado=col_subestado,
-    col_ani=col_ani,
-    col_fecha=col_fecha,
-)
+def kpis_ani() -> tuple[int, int, int]:
+    """ANIs totales, ANIs a depurar y ANIs contactados (ANSWER-AGENT)."""
+    return (
+        int(resumen_ani["ANI"].nunique()),
+        int(descartados["ANI"].nunique()),
+        int((resumen_ani["intentos_answer_agent"] > 0).sum()),
+    )
 
 # ---------------------------------------------------------
 # TABS PRINCIPALES
 # ---------------------------------------------------------
 
-(
-    tab_dashboard,
-    tab_turnos,
-    tab_dep,
-    tab_filtros,
-    tab_prefijos_info,
-    tab_simulador,
-) = st.tabs(
+# st.tabs ejecuta el cuerpo de TODAS las pestañas en cada rerun. Con un
+# selector solo se calcula (y se cachea por dataset) la pestaña visible.
+TAB_DASHBOARD = "📊 Tablero visual"
+TAB_TURNOS = "📈 Turnos y prefijos"
+TAB_DEP = "🧹 Depuración sugerida"
+TAB_FILTROS = "🎛 Filtro detallado"
+TAB_PREFIJOS_INFO = "📚 Catálogo de prefijos"
+TAB_SIMULADOR = "⚙️ Simulador de cortes"
+
+tab_activa = st.radio(
+    "Sección",
     [
-        "📊 Tablero visual",
-        "📈 Turnos y prefijos",
-        "🧹 Depuración sugerida",
-        "🎛 Filtro detallado",
-        "📚 Catálogo de prefijos",
-        "⚙️ Simulador de cortes",
-    ]
+        TAB_DASHBOARD,
+        TAB_TURNOS,
+        TAB_DEP,
+        TAB_FILTROS,
+        TAB_PREFIJOS_INFO,
+        TAB_SIMULADOR,
+    ],
+    horizontal=True,
+    label_visibility="collapsed",
+    key="tab_activa",
 )
 
+# Lo anterior es carga / caché del dataset; desde acá, la pestaña visible
+INICIO_PESTANA = time.perf_counter()
+
 # =========================================================
 # GRÁFICOS
 # =========================================================
 
-with tab_dashboard:
+if tab_activa == TAB_DASHBOARD:
     st.markdown(
         '''
         <h2 class="section-title"
@@ -396,17 +820,17 @@ with tab_dashboard:
     # =======================
     # 1) KPIs globales
     # =======================
-    total_anis = resumen_ani["ANI"].nunique()
-    anis_descartar = descartados["ANI"].nunique()
+    total_anis, anis_descartar, anis_contactados = por_dataset("kpis_ani", kpis_ani)
     pct_anis_descartar = (anis_descartar * 100 / total_anis) if total_anis > 0 else 0
     # ANIs que alguna vez llegaron a ANSWER-AGENT
-    anis_contactados = (resumen_ani["intentos_answer_agent"] > 0).sum()
     pct_contactados = (anis_contactados * 100 / total_anis) if total_anis > 0 else 0
 
-    estados_norm = data[col_estado].astype(str).str.upper().str.replace(" ", "")
+    def conteo_answer() -> tuple[int, int]:
+        estados_norm = data[col_estado].astype(str).str.upper().str.replace(" ", "")
+        return int((estados_norm == "ANSWER").sum()), int((estados_norm == "NOANSWER").sum())
+
     total_llamados = len(data)
-    tot_answer = (estados_norm == "ANSWER").sum()
-    tot_noanswer = (estados_norm == "NOANSWER").sum()
+    tot_answer, tot_noanswer = por_dataset("tablero_answer", conteo_answer)
     pct_answer = (tot_answer * 100 / total_llamados) if total_llamados > 0 else 0
     pct_noanswer = (tot_noanswer * 100 / total_llamados) if total_llamados > 0 else 0
 
@@ -442,14 +866,18 @@ with tab_dashboard:
     with c5:
         st.markdown("#### 🧩 Distribución de estados de llamada")
 
-        estados_counts = (
-            data[col_estado]
-            .astype(str)
-            .str.strip()
-            .value_counts()
-            .reset_index()
-        )
-        estados_counts.columns = ["Estado", "Cantidad"]
+        def contar_estados() -> pd.DataFrame:
+            estados_counts = (
+                data[col_estado]
+                .astype(str)
+                .str.strip()
+                .value_counts()
+                .reset_index()
+            )
+            estados_counts.columns = ["Estado", "Cantidad"]
+            return estados_counts
+
+        estados_counts = por_dataset("tablero_estados", contar_estados)
 
         if not estados_counts.empty:
             fig_estados = px.pie(
@@ -480,11 +908,14 @@ with tab_dashboard:
     with c6:
         st.markdown("#### 🏷️ ANIs por TAG de depuración")
 
-        tag_counts = (
-            resumen_ani["tag_telefono"]
-            .value_counts()
-            .rename_axis("TAG")
-            .reset_index(name="Cantidad_ANIs")
+        tag_counts = por_dataset(
+            "tablero_tags",
+            lambda: (
+                resumen_ani["tag_telefono"]
+                .value_counts()
+                .rename_axis("TAG")
+                .reset_index(name="Cantidad_ANIs")
+            ),
         )
 
         if not tag_counts.empty:
@@ -514,42 +945,24 @@ with tab_dashboard:
     # 3.1 ¿En qué intento atienden por primera vez? (ANSWER-AGENT)
     st.markdown("#### 📞 Intento del primer ANSWER-AGENT")
 
-    df_tmp = data.copy()
-    if col_fecha:
-        df_tmp[col_fecha] = pd.to_datetime(df_tmp[col_fecha], errors="coerce")
-        df_tmp = df_tmp.dropna(subset=[col_fecha])
+    def curva_primer_agent() -> pd.DataFrame | None:
+        primer_intento = obtener_primer_contacto()["primer_intento_agent"].dropna()
 
-        df_tmp = df_tmp.sort_values([col_ani, col_fecha])
-        df_tmp["intento_n"] = df_tmp.groupby(col_ani).cumcount() + 1
+        if primer_intento.empty:
+            return None
 
-        est_norm = (
-            df_tmp[col_estado]
-            .astype(str)
-            .str.strip()
-            .str.lower()
-            .str.replace(" ", "")
-        )
-        sub_norm = (
-            df_tmp[col_subestado]
-            .fillna("")
-            .astype(str)
-            .str.strip()
-            .str.lower()
+        dist_intentos = (
+            primer_intento.value_counts()
+            .sort_index()
+            .reset_index()
         )
+        dist_intentos.columns = ["Intento", "Cantidad_ANIs"]
+        return dist_intentos
 
-        # ANSWER con subestado que contenga "agent" (ANSWER-AGENT)
-        mask_aa = (est_norm == "answer") & (sub_norm.str.contains(r"\bagent\b"))
-        df_aa = df_tmp[mask_aa]
-
-        if not df_aa.empty:
-            primer_intento = df_aa.groupby(col_ani)["intento_n"].min()
-            dist_intentos = (
-                primer_intento.value_counts()
-                .sort_index()
-                .reset_index()
-            )
-            dist_intentos.columns = ["Intento", "Cantidad_ANIs"]
+    if col_fecha:
+        dist_intentos = por_dataset("tablero_curva_primer_agent", curva_primer_agent)
 
+        if dist_intentos is not None:
             fig_curva = px.bar(
                 dist_intentos,
                 x="Intento",
@@ -587,23 +1000,27 @@ with tab_dashboard:
     st.markdown("#### 📊 Distribución de intentos totales por ANI")
 
     if not resumen_ani.empty:
-        # Distribución: cuántos ANIs tienen 1,2,3,... intentos
-        dist_totales = (
-            resumen_ani["intentos_totales"]
-            .value_counts()
-            .sort_index()
-            .reset_index()
-        )
-        dist_totales.columns = ["intentos_totales", "Cantidad_ANIs"]
+        def distribucion_totales() -> pd.DataFrame:
+            # Distribución: cuántos ANIs tienen 1,2,3,... intentos
+            dist_totales = (
+                resumen_ani["intentos_totales"]
+                .value_counts()
+                .sort_index()
+                .reset_index()
+            )
+            dist_totales.columns = ["intentos_totales", "Cantidad_ANIs"]
 
-        total_anis = dist_totales["Cantidad_ANIs"].sum()
-        dist_totales["Pct"] = (
-            dist_totales["Cantidad_ANIs"] * 100 / total_anis
-        ).round(1)
-        dist_totales["label"] = (
-            dist_totales["Cantidad_ANIs"].astype(str)
-            + " (" + dist_totales["Pct"].astype(str) + "%)"
-        )
+            total_anis = dist_totales["Cantidad_ANIs"].sum()
+            dist_totales["Pct"] = (
+                dist_totales["Cantidad_ANIs"] * 100 / total_anis
+            ).round(1)
+            dist_totales["label"] = (
+                dist_totales["Cantidad_ANIs"].astype(str)
+                + " (" + dist_totales["Pct"].astype(str) + "%)"
+            )
+            return dist_totales
+
+        dist_totales = por_dataset("tablero_dist_totales", distribucion_totales)
 
         fig_hist = px.bar(
             dist_totales,
@@ -676,51 +1093,24 @@ with tab_dashboard:
                 "No se encontró una columna de fecha/hora para calcular el intento del primer contacto por prefijo."
             )
         else:
-            df_tmp = data.copy()
-            df_tmp[col_fecha] = pd.to_datetime(df_tmp[col_fecha], errors="coerce")
-            df_tmp = df_tmp.dropna(subset=[col_fecha])
-
-            # Normalizamos ANI
-            df_tmp["ANI_norm"] = df_tmp[col_ani].astype(str).str.strip()
-
-            # Ordenamos por ANI + fecha y numeramos intentos
-            df_tmp = df_tmp.sort_values(["ANI_norm", col_fecha])
-            df_tmp["intento_n"] = df_tmp.groupby("ANI_norm").cumcount() + 1
-
-            est_norm = (
-                df_tmp[col_estado]
-                .astype(str)
-                .str.strip()
-                .str.lower()
-                .str.replace(" ", "", regex=False)
-            )
-            sub_norm = (
-                df_tmp[col_subestado]
-                .fillna("")
-                .astype(str)
-                .str.strip()
-                .str.lower()
-            )
+            def prefijos_primer_contacto() -> pd.DataFrame | str:
+                """TOP 10 prefijos por rango de intento del primer contacto (o mensaje)."""
+                contacto = obtener_primer_contacto()
+                con_agent = contacto["primer_intento_agent"].notna()
 
-            # ANSWER con subestado que contenga "agent" (ANSWER-AGENT)
-            mask_aa = (est_norm == "answer") & (sub_norm.str.contains(r"\bagent\b"))
-            df_aa = df_tmp[mask_aa]
+                if not con_agent.any():
+                    return "No se encontraron registros con ANSWER-AGENT para analizar por prefijo."
 
-            if df_aa.empty:
-                st.info(
-                    "No se encontraron registros con ANSWER-AGENT para analizar por prefijo."
-                )
-            else:
                 # Primer intento donde atendió cada ANI
-                primer_intento = (
-                    df_aa.groupby("ANI_norm")["intento_n"]
-                    .min()
-                    .reset_index()
-                    .rename(columns={"intento_n": "primer_intento"})
+                primer_intento = pd.DataFrame(
+                    {
+                        "ANI_norm": contacto.loc[con_agent, "ANI"],
+                        "primer_intento": contacto.loc[con_agent, "primer_intento_agent"].astype(int),
+                    }
                 )
 
                 # ---- Asignamos prefijo a cada ANI ----
-                df_pref = df_tmp[["ANI_norm"]].drop_duplicates().copy()
+                df_pref = contacto[["ANI"]].rename(columns={"ANI": "ANI_norm"})
                 df_pref["ANI_digits"] = df_pref["ANI_norm"].str.replace(
                     r"\D", "", regex=True
                 )
@@ -747,93 +1137,86 @@ with tab_dashboard:
                 df_join = primer_intento.merge(df_pref, on="ANI_norm", how="inner")
 
                 if df_join.empty:
-                    st.info(
-                        "No se pudieron cruzar ANIs con prefijos para este análisis."
-                    )
-                else:
-                    # Bucket: hasta 3 intentos vs más de 3
-                    df_join["Rango"] = np.where(
-                        df_join["primer_intento"] <= 3,
-                        "≤ 3 intentos",
-                        "> 3 intentos",
-                    )
+                    return "No se pudieron cruzar ANIs con prefijos para este análisis."
 
-                    # Conteo de ANIs por prefijo y rango
-                    pref_agg = (
-                        df_join.groupby(["Prefijo", "Rango"])["ANI_norm"]
-                        .nunique()
-                        .reset_index(name="ANIs")
-                    )
+                # Bucket: hasta 3 intentos vs más de 3
+                df_join["Rango"] = np.where(
+                    df_join["primer_intento"] <= 3,
+                    "≤ 3 intentos",
+                    "> 3 intentos",
+                )
 
-                    # Total por prefijo para armar % y seleccionar TOP 10
-                    pref_agg["total_prefijo"] = pref_agg.groupby("Prefijo")[
-                        "ANIs"
-                    ].transform("sum")
+                # Conteo de ANIs por prefijo y rango
+                pref_agg = (
+                    df_join.groupby(["Prefijo", "Rango"])["ANI_norm"]
+                    .nunique()
+                    .reset_index(name="ANIs")
+                )
 
-                    top_prefijos = (
-                        pref_agg.sort_values("total_prefijo", ascending=False)
-                        .drop_duplicates("Prefijo")
-                        .head(10)["Prefijo"]
-                        .tolist()
-                    )
+                # Total por prefijo para armar % y seleccionar TOP 10
+                pref_agg["total_prefijo"] = pref_agg.groupby("Prefijo")[
+                    "ANIs"
+                ].transform("sum")
 
-                    pref_agg_top = pref_agg[pref_agg["Prefijo"].isin(top_prefijos)].copy()
-
-                    # % dentro de cada prefijo
-                    pref_agg_top["Pct"] = (
-                        pref_agg_top["ANIs"] * 100 / pref_agg_top["total_prefijo"]
-                    ).round(1)
-
-                    # *** CLAVE: tratar prefijo como categoría, no número ***
-                    pref_agg_top["Prefijo"] = pref_agg_top["Prefijo"].astype(str)
-
-                    fig_pref_rangos = px.bar(
-                        pref_agg_top,
-                        x="Prefijo",
-                        y="Pct",
-                        color="Rango",
-                        text="Pct",
-                        barmode="stack",
-                        color_discrete_map={
-                            "≤ 3 intentos": GOOD_GREEN,
-                            "> 3 intentos": NEUTRAL_GRAY,
-                        },
-                    )
-                    fig_pref_rangos.update_traces(textposition="inside")
-                    fig_pref_rangos.update_layout(
-                        yaxis_title="% de ANIs con contacto",
-                        xaxis_title="Prefijo",
-                        yaxis_range=[0, 100],
-                        xaxis_type="category",
-                        xaxis_categoryorder="category ascending",
-                    )
-                    st.plotly_chart(fig_pref_rangos, width="stretch")
+                top_prefijos = (
+                    pref_agg.sort_values("total_prefijo", ascending=False)
+                    .drop_duplicates("Prefijo")
+                    .head(10)["Prefijo"]
+                    .tolist()
+                )
+
+                pref_agg_top = pref_agg[pref_agg["Prefijo"].isin(top_prefijos)].copy()
+
+                # % dentro de cada prefijo
+                pref_agg_top["Pct"] = (
+                    pref_agg_top["ANIs"] * 100 / pref_agg_top["total_prefijo"]
+                ).round(1)
+
+                # *** CLAVE: tratar prefijo como categoría, no número ***
+                pref_agg_top["Prefijo"] = pref_agg_top["Prefijo"].astype(str)
+                return pref_agg_top
+
+            pref_agg_top = por_dataset("tablero_prefijos", prefijos_primer_contacto)
+
+            if isinstance(pref_agg_top, str):
+                st.info(pref_agg_top)
+            else:
+                fig_pref_rangos = px.bar(
+                    pref_agg_top,
+                    x="Prefijo",
+                    y="Pct",
+                    color="Rango",
+                    text="Pct",
+                    barmode="stack",
+                    color_discrete_map={
+                        "≤ 3 intentos": GOOD_GREEN,
+                        "> 3 intentos": NEUTRAL_GRAY,
+                    },
+                )
+                fig_pref_rangos.update_traces(textposition="inside")
+                fig_pref_rangos.update_layout(
+                    yaxis_title="% de ANIs con contacto",
+                    xaxis_title="Prefijo",
+                    yaxis_range=[0, 100],
+                    xaxis_type="category",
+                    xaxis_categoryorder="category ascending",
+                )
+                st.plotly_chart(fig_pref_rangos, width="stretch")
   
     # 4.2 Turnos: mañana vs tarde
     with c10:
         st.markdown("#### ⏰ Contactabilidad por turno")
 
         if col_fecha:
-            df_turnos_dash = data.copy()
-            df_turnos_dash[col_fecha] = pd.to_datetime(
-                df_turnos_dash[col_fecha], errors="coerce"
-            )
-            df_turnos_dash = df_turnos_dash.dropna(subset=[col_fecha])
-
-            hdec = df_turnos_dash[col_fecha].dt.hour + df_turnos_dash[col_fecha].dt.minute / 60.0
-
-            def clasificar_turno(h):
-                if 10.0 <= h < 15.0:
-                    return "Mañana"
-                elif 16.5 <= h < 20.5:
-                    return "Tarde"
-                else:
-                    return "Fuera de rango"
+            def contactabilidad_por_turno() -> pd.DataFrame | None:
+                turnos_data = obtener_turnos()
+                en_turno = turnos_data["TURNO"].notna()
+                df_turnos_dash = data.loc[en_turno, [col_estado]].copy()
+                df_turnos_dash["Turno"] = turnos_data.loc[en_turno, "TURNO"]
 
-            df_turnos_dash["Turno"] = hdec.apply(clasificar_turno)
-            df_turnos_dash = df_turnos_dash[df_turnos_dash["Turno"] != "Fuera de rango"]
+                if df_turnos_dash.empty:
+                    return None
 
-            if not df_turnos_dash.empty:
                 est_norm2 = (
                     df_turnos_dash[col_estado]
                     .astype(str)
@@ -843,7 +1226,7 @@ with tab_dashboard:
                 df_turnos_dash["ES_ANSWER"] = est_norm2 == "ANSWER"
 
                 turno_stats = (
-                    df_turnos_dash.groupby("Turno")
+                    df_turnos_dash.groupby("Turno", observed=True)
                     .agg(
                         Llamados=("Turno", "size"),
                         ANSWER=("ES_ANSWER", "sum"),
@@ -853,7 +1236,11 @@ with tab_dashboard:
                 turno_stats["% ANSWER"] = (
                     turno_stats["ANSWER"] * 100 / turno_stats["Llamados"]
                 ).round(1)
+                return turno_stats
 
+            turno_stats = por_dataset("tablero_turnos", contactabilidad_por_turno)
+
+            if turno_stats is not None:
                 fig_turno = px.bar(
                     turno_stats,
                     x="Turno",
@@ -877,7 +1264,7 @@ with tab_dashboard:
 # =========================================================
 # TAB 1: TURNOS Y PREFIJOS
 # =========================================================
-with tab_turnos:
+if tab_activa == TAB_TURNOS:
     st.markdown(
         '<h2 class="section-title" style="text-align:center; margin-top:1.5rem;">'
         '<span class="emoji">📈</span>Análisis por turnos y prefijos'
@@ -886,7 +1273,58 @@ with tab_turnos:
     )
 
     # ---------- 1) TURNOS ----------
-    df_turnos = data.copy()
+    def distribucion_por_turno() -> pd.DataFrame | None:
+        turnos_data = obtener_turnos()
+        en_turno = turnos_data["TURNO"].notna()
+        df_turnos = data.loc[en_turno, [col_estado]].copy()
+        df_turnos["TURNO"] = turnos_data.loc[en_turno, "TURNO"]
+
+        if df_turnos.empty:
+            return None
+
+        estados_norm = (
+            df_turnos[col_estado]
+            .astype(str)
+            .str.upper()
+            .str.replace(" ", "")
+        )
+        df_turnos["ES_ANSWER"] = estados_norm == "ANSWER"
+        df_turnos["ES_NOANSWER"] = estados_norm == "NOANSWER"
+
+        turno_stats = (
+            df_turnos.groupby("TURNO", observed=True)
+            .agg(
+                TOTAL=("TURNO", "size"),
+                ANSWER=("ES_ANSWER", "sum"),
+                NOANSWER=("ES_NOANSWER", "sum"),
+            )
+            .reset_index()
+        )
+
+        # Siempre mostrar todas las filas de turno (Mañana / Tarde / ...)
+        orden = list(turnos_data["TURNO"].cat.categories)
+        turno_stats = (
+            turno_stats.set_index("TURNO")
+            .reindex(orden)
+            .fillna(0)
+            .reset_index()
+        )
+
+        for col_num in ["TOTAL", "ANSWER", "NOANSWER"]:
+            turno_stats[col_num] = turno_stats[col_num].astype(int)
+
+        turno_stats["% ANSWER"] = (
+            turno_stats["ANSWER"] * 100
+            / turno_stats["TOTAL"].replace(0, pd.NA)
+        ).round(1)
+        turno_stats["% NOANSWER"] = (
+            turno_stats["NOANSWER"] * 100
+            / turno_stats["TOTAL"].replace(0, pd.NA)
+        ).round(1)
+
+        turno_stats["% ANSWER"] = turno_stats["% ANSWER"].fillna(0)
+        turno_stats["% NOANSWER"] = turno_stats["% NOANSWER"].fillna(0)
+        return turno_stats
 
     if not col_fecha:
         st.warning(
@@ -894,107 +1332,41 @@ with tab_turnos:
             "para armar los turnos."
         )
     else:
-        df_turnos[col_fecha] = pd.to_datetime(df_turnos[col_fecha], errors="coerce")
-        df_turnos = df_turnos.dropna(subset=[col_fecha])
-
-        # Hora en formato decimal (ej: 16:30 -> 16.5)
-        df_turnos["HORA_DECIMAL"] = (
-            df_turnos[col_fecha].dt.hour
-            + df_turnos[col_fecha].dt.minute / 60.0
-        )
-
-        # Turnos reales:
-        # Mañana 10:00–14:59 (≈ 10–15)
-        # Tarde  16:30–20:29 (≈ 16.5–20.5)
-        def clasificar_turno(hdec: float) -> str | None:
-            if 10.0 <= hdec < 15.0:
-                return "Mañana"
-            elif 16.5 <= hdec < 20.5:
-                return "Tarde"
-            else:
-                return None
-
-        df_turnos["TURNO"] = df_turnos["HORA_DECIMAL"].apply(clasificar_turno)
-        df_turnos = df_turnos.dropna(subset=["TURNO"])
+        turno_stats = por_dataset("turnos_distribucion", distribucion_por_turno)
 
-        if df_turnos.empty:
+        if turno_stats is None:
             st.info(
                 "No hay registros dentro de los rangos definidos de turno "
-                "(Mañana 10–15, Tarde 16:30–20:30)."
+                f"({depurador_bases.describir_turnos(turnos_config)})."
             )
         else:
-            estados_norm = (
-                df_turnos[col_estado]
-                .astype(str)
-                .str.upper()
-                .str.replace(" ", "")
-            )
-            df_turnos["ES_ANSWER"] = estados_norm == "ANSWER"
-            df_turnos["ES_NOANSWER"] = estados_norm == "NOANSWER"
-
-            turno_stats = (
-                df_turnos.groupby("TURNO")
-                .agg(
-                    TOTAL=("TURNO", "size"),
-                    ANSWER=("ES_ANSWER", "sum"),
-                    NOANSWER=("ES_NOANSWER", "sum"),
-                )
-                .reset_index()
-            )
-
-            # Siempre mostrar ambas filas (Mañana / Tarde)
-            orden = ["Mañana", "Tarde"]
-            turno_stats = (
-                turno_stats.set_index("TURNO")
-                .reindex(orden)
-                .fillna(0)
-                .reset_index()
-            )
-
-            for col_num in ["TOTAL", "ANSWER", "NOANSWER"]:
-                turno_stats[col_num] = turno_stats[col_num].astype(int)
-
-            turno_stats["% ANSWER"] = (
-                turno_stats["ANSWER"] * 100
-                / turno_stats["TOTAL"].replace(0, pd.NA)
-            ).round(1)
-            turno_stats["% NOANSWER"] = (
-                turno_stats["NOANSWER"] * 100
-                / turno_stats["TOTAL"].replace(0, pd.NA)
-            ).round(1)
-
-            turno_stats["% ANSWER"] = turno_stats["% ANSWER"].fillna(0)
-            turno_stats["% NOANSWER"] = turno_stats["% NOANSWER"].fillna(0)
-
             st.subheader("📊 Distribución por turno")
             st.dataframe(turno_stats, width="stretch")
 
     # ---------- 2) PREFIJOS ----------
     st.subheader("📞 Análisis por prefijos")
 
-    df_pref = data.copy()
-    df_pref[col_ani] = df_pref[col_ani].astype(str).str.replace(
-        r"\D", "", regex=True
-    )
-
     lista_prefijos = obtener_lista_prefijos()
 
-    if lista_prefijos:
-        def buscar_prefijo_numero(numero: str) -> str | None:
-            for p in lista_prefijos:
-                if numero.startswith(p):
-                    return p
-            return None
+    def volumen_por_prefijo() -> pd.DataFrame | None:
+        df_pref = data[[col_ani]].copy()
+        df_pref[col_ani] = df_pref[col_ani].astype(str).str.replace(
+            r"\D", "", regex=True
+        )
 
-        df_pref["PREFIJO"] = df_pref[col_ani].apply(buscar_prefijo_numero)
-        df_pref = df_pref.dropna(subset=["PREFIJO"])
+        if lista_prefijos:
+            def buscar_prefijo_numero(numero: str) -> str | None:
+                for p in lista_prefijos:
+                    if numero.startswith(p):
+                        return p
+                return None
+
+            df_pref["PREFIJO"] = df_pref[col_ani].apply(buscar_prefijo_numero)
+            df_pref = df_pref.dropna(subset=["PREFIJO"])
+
+            if df_pref.empty:
+                return None
 
-        if df_pref.empty:
-            st.info(
-                "No se pudo asignar ningún prefijo del archivo 'Prefijos interurbanos.csv' "
-                "a los ANI de la base."
-            )
-        else:
             pref_stats = (
                 df_pref.groupby("PREFIJO")
                 .size()
@@ -1005,16 +1377,7 @@ with tab_turnos:
             pref_stats["% SOBRE_TOTAL"] = (
                 pref_stats["TOTAL"] * 100 / total_global_pref
             ).round(2)
-
-            st.write(
-                "Prefijos con mayor volumen de llamados (según catálogo de prefijos):"
-            )
-            st.dataframe(pref_stats, width="stretch")
-    else:
-        st.warning(
-            "No se pudo usar 'Prefijos interurbanos.csv'. "
-            "Se muestra el análisis simple por los primeros 3 dígitos del ANI."
-        )
+            return pref_stats
 
         df_pref["PREFIJO"] = df_pref[col_ani].str.extract(
             r"(\d{3})", expand=False
@@ -1035,7 +1398,28 @@ with tab_turnos:
         else:
             pref_stats["% SOBRE_TOTAL"] = 0
 
-        pref_stats = pref_stats.sort_values("TOTAL", ascending=False)
+        return pref_stats.sort_values("TOTAL", ascending=False)
+
+    pref_stats = por_dataset(
+        ("turnos_prefijos", bool(lista_prefijos)), volumen_por_prefijo
+    )
+
+    if lista_prefijos:
+        if pref_stats is None:
+            st.info(
+                "No se pudo asignar ningún prefijo del archivo 'Prefijos interurbanos.csv' "
+                "a los ANI de la base."
+            )
+        else:
+            st.write(
+                "Prefijos con mayor volumen de llamados (según catálogo de prefijos):"
+            )
+            st.dataframe(pref_stats, width="stretch")
+    else:
+        st.warning(
+            "No se pudo usar 'Prefijos interurbanos.csv'. "
+            "Se muestra el análisis simple por los primeros 3 dígitos del ANI."
+        )
 
         st.write(
             "Prefijos con mayor volumen de llamados (primeros 3 dígitos):"
@@ -1045,7 +1429,7 @@ with tab_turnos:
 # =========================================================
 # TAB 2: DEPURACIÓN SUGERIDA (NUEVA LÓGICA POR TAGS)
 # =========================================================
-with tab_dep:
+if tab_activa == TAB_DEP:
     st.markdown(
         '''
         <h2 class="section-title"
@@ -1063,29 +1447,18 @@ with tab_dep:
         "para no seguir quemando intentos."
     )
 
-    # Procesamos con el módulo externo
-    resumen_ani, base_depurada, descartados = depurador_bases.procesar_desde_df(
-        data,
-        col_estado=col_estado,
-        col_subestado=col_subestado,
-        col_ani=col_ani,
-        col_fecha=col_fecha,
-    )
-
-    # Totales
-    total_anis = resumen_ani["ANI"].nunique()
-    # ANIs a depurar (todos los TAG ≠ SEGUIR_INTENTANDO)
-    anis_descartar = descartados["ANI"].nunique()
+    # Totales (el resumen por ANI ya viene procesado con el dataset)
+    # - ANIs a depurar: todos los TAG ≠ SEGUIR_INTENTANDO
+    # - ANIs contactados: tuvieron al menos un ANSWER-AGENT
+    total_anis, anis_descartar, anis_contactados = por_dataset("kpis_ani", kpis_ani)
     pct_anis_descartar = (
         anis_descartar * 100 / total_anis if total_anis > 0 else 0
     )
-    # ANIs contactados: tuvieron al menos un ANSWER-AGENT
-    anis_contactados = (resumen_ani["intentos_answer_agent"] > 0).sum()
     pct_contactados = (
         anis_contactados * 100 / total_anis if total_anis > 0 else 0
     )
     # ANIs que seguimos usando en la base (solo TAG = SEGUIR_INTENTANDO)
-    anis_seguir = base_depurada["ANI"].nunique()
+    anis_seguir = por_dataset("dep_anis_seguir", lambda: base_depurada["ANI"].nunique())
     # ANIs no contactados pero igual a depurar
     anis_no_contact_depurar = max(anis_descartar - anis_contactados, 0)
     pct_no_contact_depurar = (
@@ -1144,11 +1517,14 @@ with tab_dep:
         '<h3 class="section-title"><span class="emoji">🏷️</span>Distribución por tag</h3>',
         unsafe_allow_html=True,
     )
-    dist_tags = (
-        resumen_ani["tag_telefono"]
-        .value_counts()
-        .rename_axis("TAG")
-        .reset_index(name="CANTIDAD")
+    dist_tags = por_dataset(
+        "dep_dist_tags",
+        lambda: (
+            resumen_ani["tag_telefono"]
+            .value_counts()
+            .rename_axis("TAG")
+            .reset_index(name="CANTIDAD")
+        ),
     )
     st.dataframe(dist_tags, use_container_width=True)
     
@@ -1158,7 +1534,10 @@ with tab_dep:
     st.markdown("### 🎛 Filtro rápido por TAG para exportar")
 
     # Tags disponibles en el resumen
-    tags_disponibles = sorted(resumen_ani["tag_telefono"].dropna().unique().tolist())
+    tags_disponibles = por_dataset(
+        "dep_tags_disponibles",
+        lambda: sorted(resumen_ani["tag_telefono"].dropna().unique().tolist()),
+    )
 
     # Default: sólo SEGUIR_INTENTANDO si existe, si no todos
     if "SEGUIR_INTENTANDO" in tags_disponibles:
@@ -1175,40 +1554,47 @@ with tab_dep:
     if not tags_seleccionados:
         st.info("Seleccioná al menos un TAG para armar la base filtrada.")
     else:
-        # 1) Resumen filtrado por ANI
-        resumen_filtrado = resumen_ani[
-            resumen_ani["tag_telefono"].isin(tags_seleccionados)
-        ].copy()
+        tags_clave = tuple(sorted(tags_seleccionados))
 
-        # 2) Base de llamados filtrada: todos los intentos de esos ANIs
-        anis_filtrados = resumen_filtrado["ANI"].astype(str).unique().tolist()
-        base_llamadas_filtrada = data[
-            data[col_ani].astype(str).isin(anis_filtrados)
-        ].copy()
+        def filtrar_por_tags() -> tuple[pd.DataFrame, np.ndarray]:
+            # 1) Resumen filtrado por ANI
+            resumen_filtrado = resumen_ani[
+                resumen_ani["tag_telefono"].isin(tags_seleccionados)
+            ].copy()
+
+            # 2) Base de llamados filtrada: todos los intentos de esos ANIs
+            anis_filtrados = resumen_filtrado["ANI"].astype(str).unique().tolist()
+            ani_str = por_dataset("ani_str", lambda: data[col_ani].astype(str))
+            filas = np.flatnonzero(ani_str.isin(anis_filtrados).to_numpy())
+            return resumen_filtrado, filas
+
+        resumen_filtrado, filas_tags = por_dataset(
+            ("dep_filtro_tags", tags_clave), filtrar_por_tags
+        )
 
         st.write(
-            f"**ANIs en la base filtrada:** {len(anis_filtrados):,}  "
-            f" |  **Llamados (filtrados):** {len(base_llamadas_filtrada):,}"
+            f"**ANIs en la base filtrada:** {resumen_filtrado['ANI'].nunique():,}  "
+            f" |  **Llamados (filtrados):** {len(filas_tags):,}"
         )
 
         col_exp1, col_exp2 = st.columns(2)
 
         # --- Botón 1: resumen por ANI filtrado ---
         with col_exp1:
-            csv_resumen = resumen_filtrado.to_csv(index=False).encode("utf-8-sig")
-            st.download_button(
+            descarga_diferida(
                 "📥 Descargar resumen por ANI (CSV)",
-                data=csv_resumen,
+                (clave_dataset, tags_clave),
+                lambda: resumen_filtrado.to_csv(index=False).encode("utf-8-sig"),
                 file_name="resumen_ani_filtrado.csv",
                 mime="text/csv",
             )
 
         # --- Botón 2: base de llamados filtrada ---
         with col_exp2:
-            csv_detalle = base_llamadas_filtrada.to_csv(index=False).encode("utf-8-sig")
-            st.download_button(
+            descarga_diferida(
                 "📥 Descargar base de llamados filtrada (CSV)",
-                data=csv_detalle,
+                (clave_dataset, tags_clave),
+                lambda: data.iloc[filas_tags].to_csv(index=False).encode("utf-8-sig"),
                 file_name="llamados_filtrados.csv",
                 mime="text/csv",
             )
@@ -1231,9 +1617,12 @@ with tab_dep:
         )
 
         st.dataframe(
-            descartados.sort_values(
-                ["tag_telefono", "intentos_totales"],
-                ascending=[True, False],
+            por_dataset(
+                "dep_descartados_ordenados",
+                lambda: descartados.sort_values(
+                    ["tag_telefono", "intentos_totales"],
+                    ascending=[True, False],
+                ),
             ),
             use_container_width=True,
         )
@@ -1241,12 +1630,15 @@ with tab_dep:
         # Detalle de un ANI específico
         ani_sel = st.selectbox(
             "Ver detalle de llamados para un ANI descartado:",
-            options=descartados["ANI"].sort_values().tolist(),
+            options=por_dataset(
+                "dep_anis_descartados", lambda: descartados["ANI"].sort_values().tolist()
+            ),
         )
 
-        detalle_ani = data[
-            data[col_ani].astype(str).str.strip() == str(ani_sel)
-        ].copy()
+        ani_norm = por_dataset(
+            "ani_norm", lambda: data[col_ani].astype(str).str.strip()
+        )
+        detalle_ani = data[ani_norm == str(ani_sel)]
 
         st.markdown(
             f"<h4 class='section-title'>Detalle de llamados para ANI: {ani_sel}</h4>",
@@ -1269,49 +1661,94 @@ with tab_dep:
             unsafe_allow_html=True,
         )
 
-        # Generamos buffers XLSX
-        buf_resumen = io.BytesIO()
-        with pd.ExcelWriter(buf_resumen, engine="xlsxwriter") as writer:
-            resumen_ani.to_excel(writer, index=False, sheet_name="Resumen_ANI")
-        buf_resumen.seek(0)
-
-        buf_base = io.BytesIO()
-        with pd.ExcelWriter(buf_base, engine="xlsxwriter") as writer:
-            base_depurada.to_excel(writer, index=False, sheet_name="Base_depurada")
-        buf_base.seek(0)
-
-        buf_desc = io.BytesIO()
-        with pd.ExcelWriter(buf_desc, engine="xlsxwriter") as writer:
-            descartados.to_excel(writer, index=False, sheet_name="Descartados")
-        buf_desc.seek(0)
-
+        # Los XLSX se generan recién cuando se piden
         d1, d2, d3 = st.columns(3)
         with d1:
-            st.download_button(
+            descarga_diferida(
                 "⬇️ Descargar resumen por ANI (XLSX)",
-                data=buf_resumen,
+                (clave_dataset,),
+                lambda: a_xlsx(resumen_ani, "Resumen_ANI"),
                 file_name="resumen_ani_depuracion.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             )
         with d2:
-            st.download_button(
+            descarga_diferida(
                 "⬇️ Descargar base depurada (XLSX)",
-                data=buf_base,
+                (clave_dataset,),
+                lambda: a_xlsx(base_depurada, "Base_depurada"),
                 file_name="base_depurada_seguir_intentando.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             )
         with d3:
-            st.download_button(
+            descarga_diferida(
                 "⬇️ Descargar ANIs descartados (XLSX)",
-                data=buf_desc,
+                (clave_dataset,),
+                lambda: a_xlsx(descartados, "Descartados"),
                 file_name="anis_descartados.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             )
 
+        # Depuración por campaña: el ámbito sale del índice ANI <-> BASE
+        # (posiciones en el resumen), sin volver a recorrer los llamados.
+        campana_sel = st.selectbox(
+            "Exportar depuración de una campaña / base:",
+            options=list(indice_ani_base["bases"]),
+        )
+
+        if campana_sel is not None:
+            def resumen_campana() -> pd.DataFrame:
+                pos = depurador_bases.anis_de_base(indice_ani_base, [campana_sel])
+                return resumen_ani.iloc[pos]
+
+            resumen_camp = por_dataset(("dep_resumen_campana", campana_sel), resumen_campana)
+            seguir_camp = resumen_camp["tag_telefono"] == "SEGUIR_INTENTANDO"
+            st.write(
+                f"**ANIs en la campaña:** {len(resumen_camp):,}  "
+                f" |  **A depurar:** {int((~seguir_camp).sum()):,}"
+            )
+
+            e1, e2 = st.columns(2)
+            with e1:
+                descarga_diferida(
+                    "⬇️ Base depurada de la campaña (XLSX)",
+                    (clave_dataset, "campana", campana_sel),
+                    lambda: a_xlsx(resumen_camp[seguir_camp], "Base_depurada"),
+                    file_name=f"base_depurada_{campana_sel}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                )
+            with e2:
+                descarga_diferida(
+                    "⬇️ ANIs descartados de la campaña (XLSX)",
+                    (clave_dataset, "campana", campana_sel),
+                    lambda: a_xlsx(resumen_camp[~seguir_camp], "Descartados"),
+                    file_name=f"anis_descartados_{campana_sel}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                )
+
+        # Resumen (BASE, ANI) de todas las campañas en una sola pasada, con el
+        # tag de cada campaña y el tag global del ANI
+        descarga_diferida(
+            "⬇️ Resumen por campaña y ANI (XLSX)",
+            (clave_dataset, "por_campana"),
+            lambda: a_xlsx(
+                depurador_bases.procesar_por_campana(
+                    data,
+                    col_estado=col_estado,
+                    col_subestado=col_subestado,
+                    col_ani=col_ani,
+                    col_base=col_base,
+                    col_fecha=col_fecha,
+                )[0],
+                "Resumen_campana_ANI",
+            ),
+            file_name="resumen_campana_ani.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+
 # =========================================================
 # TAB 3: FILTRO DETALLADO
 # =========================================================
-with tab_filtros:
+if tab_activa == TAB_FILTROS:
     st.markdown(
         '''
         <h2 class="section-title"
@@ -1325,17 +1762,19 @@ with tab_filtros:
     c1, c2, c3 = st.columns(3)
 
     with c1:
-        estados = sorted(data[col_estado].dropna().unique())
+        estados = por_dataset("filtros_estados", lambda: sorted(data[col_estado].dropna().unique()))
         filtro_estado = st.multiselect("Estado", estados, default=estados)
 
     with c2:
-        subestados = sorted(data[col_subestado].dropna().unique())
+        subestados = por_dataset(
+            "filtros_subestados", lambda: sorted(data[col_subestado].dropna().unique())
+        )
         filtro_subestado = st.multiselect(
             "Subestado", subestados, default=subestados
         )
 
     with c3:
-        bases = sorted(data[col_base].dropna().unique())
+        bases = list(indice_ani_base["bases"])
         filtro_base = st.multiselect("Base", bases, default=bases)
 
     c4, c5 = st.columns([2, 1])
@@ -1351,26 +1790,34 @@ with tab_filtros:
             value=(dur_min_global, dur_max_global),
         )
 
-    df = data.copy()
-    df = df[df[col_estado].isin(filtro_estado)]
-    df = df[df[col_subestado].isin(filtro_subestado)]
-    df = df[df[col_base].isin(filtro_base)]
-    df = df[
-        (df[col_duracion] >= dur_min) & (df[col_duracion] <= dur_max)
-    ]
-
+    # Búsqueda de ANI por índice de trigramas (solo sobre ANIs distintos)
+    filas_ani = None
     if filtro_ani.strip():
-        df = df[
-            df[col_ani].astype(str).str.contains(
-                filtro_ani, case=False, na=False
-            )
-        ]
+        indice_ani = calcular_indice_ani(clave_dataset, data[col_ani])
+        filas_ani = depurador_bases.buscar_ani(indice_ani, filtro_ani)
 
-    total_llamados = len(df)
+    # Filtros resueltos con AND/OR de bitmaps y un único gather final.
+    # La base sale del índice ANI <-> BASE del dataset (filas por campaña).
+    indice_filtros = calcular_indice_filtros(
+        clave_dataset,
+        data,
+        (col_estado, col_subestado),
+        col_duracion,
+    )
+    filas_filtradas = depurador_bases.filtrar_por_indice(
+        indice_filtros,
+        {
+            col_estado: filtro_estado,
+            col_subestado: filtro_subestado,
+        },
+        rango_duracion=(dur_min, dur_max),
+        filas=(filas_ani, depurador_bases.filas_de_base(indice_ani_base, filtro_base)),
+    )
+    total_llamados = len(filas_filtradas)
 
     if total_llamados > 0:
         estados_norm = (
-            df[col_estado].astype(str).str.upper().str.replace(" ", "")
+            data[col_estado].iloc[filas_filtradas].astype(str).str.upper().str.replace(" ", "")
         )
         tot_answer = (estados_norm == "ANSWER").sum()
         tot_noanswer = (estados_norm == "NOANSWER").sum()
@@ -1408,16 +1855,14 @@ with tab_filtros:
         '<h2 class="section-title"><span class="emoji">📋</span>Resultados filtrados</h2>',
         unsafe_allow_html=True,
     )
-    st.write(f"Filas resultantes: **{len(df)}**")
-
-    if len(df) > 0:
-        csv_bytes = df.to_csv(index=False).encode("utf-8-sig")
-        txt_bytes = df.to_csv(index=False, sep="\t").encode("utf-8-sig")
+    st.write(f"Filas resultantes: **{total_llamados}**")
 
-        xlsx_buffer = io.BytesIO()
-        with pd.ExcelWriter(xlsx_buffer, engine="xlsxwriter") as writer:
-            df.to_excel(writer, index=False, sheet_name="Filtrado")
-        xlsx_buffer.seek(0)
+    if total_llamados > 0:
+        # Los archivos se arman recién cuando se piden (gather de todas las filas)
+        firma_filtro = (
+            clave_dataset,
+            hashlib.sha1(filas_filtradas.tobytes()).hexdigest(),
+        )
 
         st.markdown(
             '<h3 class="section-title"><span class="emoji">📥</span>Descarga de resultados filtrados</h3>',
@@ -1426,23 +1871,28 @@ with tab_filtros:
 
         d1, d2, d3 = st.columns(3)
         with d1:
-            st.download_button(
+            descarga_diferida(
                 "⬇️ Descargar CSV",
-                data=csv_bytes,
+                firma_filtro,
+                lambda: data.iloc[filas_filtradas].to_csv(index=False).encode("utf-8-sig"),
                 file_name="depuracion_filtrada.csv",
                 mime="text/csv",
             )
         with d2:
-            st.download_button(
+            descarga_diferida(
                 "⬇️ Descargar TXT",
-                data=txt_bytes,
+                firma_filtro,
+                lambda: data.iloc[filas_filtradas]
+                .to_csv(index=False, sep="\t")
+                .encode("utf-8-sig"),
                 file_name="depuracion_filtrada.txt",
                 mime="text/plain",
             )
         with d3:
-            st.download_button(
+            descarga_diferida(
                 "⬇️ Descargar XLSX",
-                data=xlsx_buffer,
+                firma_filtro,
+                lambda: a_xlsx(data.iloc[filas_filtradas], "Filtrado"),
                 file_name="depuracion_filtrada.xlsx",
                 mime=(
                     "application/vnd.openxmlformats-officedocument."
@@ -1479,32 +1929,85 @@ with tab_filtros:
         normalizar_columna(c) for c in columnas_ocultas_raw
     ]
 
-    gb = GridOptionsBuilder.from_dataframe(df)
+    # ---------- Grilla paginada (orden, filtros y página se resuelven en Python) ----------
+    columnas_visibles = [c for c in data.columns if c not in columnas_ocultas_norm]
+
+    g1, g2, g3, g4 = st.columns([2, 1, 1, 1])
+    with g1:
+        col_orden = st.selectbox(
+            "Ordenar por",
+            options=["(sin orden)"] + columnas_visibles,
+            format_func=lambda c: mapa_headers.get(c, c),
+        )
+    with g2:
+        orden_desc = st.checkbox("Descendente", value=False)
+    with g3:
+        tam_pagina = st.selectbox("Filas por página", [50, 100, 250, 500], index=1)
+
+    filas_grilla = filas_filtradas
+    with st.expander("Filtros por columna (contiene)"):
+        cols_filtro = st.multiselect(
+            "Columnas a filtrar",
+            options=columnas_visibles,
+            format_func=lambda c: mapa_headers.get(c, c),
+        )
+        for col in cols_filtro:
+            texto_col = st.text_input(
+                f"{mapa_headers.get(col, col)} contiene:",
+                key=f"filtro_col_{col}",
+            )
+            if texto_col.strip() and len(filas_grilla) > 0:
+                coincide = (
+                    data[col]
+                    .iloc[filas_grilla]
+                    .astype(str)
+                    .str.contains(texto_col, case=False, regex=False, na=False)
+                    .to_numpy(dtype=bool)
+                )
+                filas_grilla = filas_grilla[coincide]
+
+    if col_orden != "(sin orden)":
+        orden_col, n_validos = calcular_orden_columna(
+            clave_dataset, data[col_orden], col_orden
+        )
+        filas_grilla = ordenar_filas(
+            filas_grilla, orden_col, n_validos, len(data), ascendente=not orden_desc
+        )
+
+    n_paginas = max(1, -(-len(filas_grilla) // tam_pagina))
+    with g4:
+        pagina = st.number_input("Página", min_value=1, max_value=n_paginas, value=1)
+
+    inicio_pag = (int(pagina) - 1) * tam_pagina
+    df_pagina = data.iloc[filas_grilla[inicio_pag:inicio_pag + tam_pagina]]
+
+    st.caption(
+        f"Mostrando filas {min(inicio_pag + 1, len(filas_grilla)):,}–"
+        f"{min(inicio_pag + tam_pagina, len(filas_grilla)):,} de {len(filas_grilla):,} "
+        f"(página {int(pagina)} de {n_paginas})"
+    )
+
+    # Solo la página visible viaja al navegador; orden y filtros ya vienen resueltos
+    gb = GridOptionsBuilder.from_dataframe(df_pagina)
     gb.configure_default_column(
         editable=False,
-        filter=True,
-        sortable=True,
+        filter=False,
+        sortable=False,
         resizable=True,
-        floatingFilter=True,
-        menuTabs=["filterMenuTab", "generalMenuTab", "columnsMenuTab"],
+        menuTabs=["generalMenuTab", "columnsMenuTab"],
     )
 
-    for col in df.columns:
+    for col in df_pagina.columns:
         header_name = mapa_headers.get(col, col)
         if col in columnas_ocultas_norm:
             gb.configure_column(col, headerName=header_name, hide=True)
         else:
-            if col == col_estado:
-                gb.configure_column(
-                    col, headerName=header_name, filter="agSetColumnFilter"
-                )
-            else:
-                gb.configure_column(col, headerName=header_name)
+            gb.configure_column(col, headerName=header_name)
 
     grid_options = gb.build()
 
     AgGrid(
-        df,
+        df_pagina,
         gridOptions=grid_options,
         enable_enterprise_modules=True,
         update_mode=GridUpdateMode.NO_UPDATE,
@@ -1516,7 +2019,7 @@ with tab_filtros:
 # =========================================================
 # TAB 4: CATÁLOGO DE PREFIJOS
 # =========================================================
-with tab_prefijos_info:
+if tab_activa == TAB_PREFIJOS_INFO:
     st.markdown(
         '''
         <h2 class="section-title"
@@ -1556,7 +2059,7 @@ with tab_prefijos_info:
 # =======================
 # 5) Simulador de cortes por intentos
 # =======================
-with tab_simulador:
+if tab_activa == TAB_SIMULADOR:
     st.markdown("### ⚙️ Simulador de corte de intentos por ANI")
 
     if resumen_ani.empty:
@@ -1564,14 +2067,7 @@ with tab_simulador:
     else:
         # --- Selección de campaña (base/origen) opcional ---
         if col_base:
-            bases_disponibles = (
-                data[col_base]
-                .dropna()
-                .astype(str)
-                .unique()
-                .tolist()
-            )
-            bases_disponibles = sorted(bases_disponibles)
+            bases_disponibles = list(indice_ani_base["bases"])
             base_sel = st.selectbox(
                 "Filtrar por campaña / base (opcional):",
                 options=["(Todas)"] + bases_disponibles,
@@ -1580,33 +2076,27 @@ with tab_simulador:
         else:
             base_sel = "(Todas)"
 
-        # Construimos el resumen en el ámbito elegido (todas o una base)
-        resumen_scope = resumen_ani.copy()
+        # Histogramas acumulados por ámbito (todas / cada base), una vez por dataset:
+        # mover el slider es solo una lectura de array.
+        def histograma_cortes() -> dict:
+            return depurador_bases.construir_histograma_cortes(resumen_ani, indice_ani_base)
 
-        if base_sel != "(Todas)" and col_base:
-            # Cruzamos ANI con base para quedarnos solo con esa campaña
-            ani_base = (
-                data[[col_ani, col_base]]
-                .drop_duplicates()
-                .astype({col_ani: str})
-            )
-            ani_camp = ani_base[ani_base[col_base].astype(str) == str(base_sel)]
-            resumen_scope = resumen_scope.merge(
-                ani_camp[[col_ani]],
-                left_on="ANI",
-                right_on=col_ani,
-                how="inner",
-            )
+        histograma = por_dataset("sim_histograma_cortes", histograma_cortes)
+        base_ambito = None if base_sel == "(Todas)" else base_sel
+        if base_ambito is not None and str(base_ambito) not in histograma["bases"]:
+            escenario_base = {"total": 0}
+        else:
+            escenario_base = depurador_bases.simular_corte(histograma, 0, base_ambito)
 
-        if resumen_scope.empty:
+        if escenario_base["total"] == 0:
             st.warning("No hay ANIs para esa campaña con los datos actuales.")
         else:
             st.markdown(
-                f"**ANIs en el ámbito seleccionado:** {resumen_scope['ANI'].nunique():,}"
+                f"**ANIs en el ámbito seleccionado:** {escenario_base['total']:,}"
             )
 
             # --- Parámetros del simulador ---
-            max_intentos_real = int(resumen_scope["intentos_totales"].max())
+            max_intentos_real = escenario_base["max_intentos"]
             nuevo_corte = st.slider(
                 "Elegí el nuevo corte máximo de intentos por ANI (solo ANIs sin ANSWER-AGENT se cortarían):",
                 min_value=1,
@@ -1614,23 +2104,16 @@ with tab_simulador:
                 value=min(6, max_intentos_real),
             )
 
-            # --- Escenario actual (real) ---
-            total_anis_scope = resumen_scope["ANI"].nunique()
-            # ANIs sin contacto (nunca tuvieron ANSWER-AGENT) con la regla actual
-            anis_sin_contacto = resumen_scope[
-                resumen_scope["intentos_answer_agent"] == 0
-            ].copy()
-
             # --- Escenario simulado con nuevo corte ---
-            # Se cortan: sin contacto y con intentos_totales > nuevo_corte
-            mask_corte = (
-                (anis_sin_contacto["intentos_totales"] > nuevo_corte)
-            )
-            anis_cortados_sim = anis_sin_contacto[mask_corte]["ANI"].nunique()
-            anis_sin_contacto_tot = anis_sin_contacto["ANI"].nunique()
+            # Se cortan: sin contacto (nunca tuvieron ANSWER-AGENT) y con
+            # intentos_totales > nuevo_corte
+            escenario = depurador_bases.simular_corte(histograma, nuevo_corte, base_ambito)
+            total_anis_scope = escenario["total"]
+            anis_sin_contacto_tot = escenario["sin_contacto"]
+            anis_cortados_sim = escenario["cortados"]
 
             # ANIs que seguirían en la base bajo la nueva regla
-            anis_seguir_sim = total_anis_scope - anis_cortados_sim
+            anis_seguir_sim = escenario["seguir"]
 
             pct_cortados = (
                 anis_cortados_sim * 100 / total_anis_scope
@@ -1697,5 +2180,201 @@ with tab_simulador:
                 </p>
                 """,
                 unsafe_allow_html=True,
-            )          
-    
\ No newline at end of file
+            )
+
+        # --- Simulador de reglas de depuración (umbrales de cada TAG) ---
+        st.markdown("### 🏷️ Simulador de reglas de depuración")
+        st.write(
+            "Mové los umbrales de cada regla y mirá cómo quedarían los TAGs. "
+            "Se evalúa sobre un cubo de contadores armado una vez por dataset "
+            "(sobre todos los ANIs), sin re-etiquetar ANI por ANI."
+        )
+
+        cubo = por_dataset(
+            "sim_cubo_contadores",
+            lambda: depurador_bases.construir_cubo_contadores(resumen_ani),
+        )
+        defecto = depurador_bases.UMBRALES_TAG
+
+        u1, u2, u3, u4 = st.columns(4)
+        with u1:
+            umbral_unalloc = st.slider(
+                "INVALIDO: unallocated ≥", 1, cubo["tope"], defecto["unallocated"]
+            )
+        with u2:
+            umbral_machine = st.slider(
+                "SOLO_BUZON: contestador ≥", 1, cubo["tope"], defecto["answering_machine"]
+            )
+        with u3:
+            umbral_no_answer = st.slider(
+                "NO_ATIENDE: no answer ≥", 1, cubo["tope"], defecto["no_answer"]
+            )
+        with u4:
+            umbral_rejected = st.slider(
+                "RECHAZA: rejected ≥", 1, cubo["tope"], defecto["rejected"]
+            )
+
+        actual = depurador_bases.evaluar_umbrales(cubo, defecto)
+        simulado = depurador_bases.evaluar_umbrales(
+            cubo,
+            {
+                "unallocated": umbral_unalloc,
+                "answering_machine": umbral_machine,
+                "no_answer": umbral_no_answer,
+                "rejected": umbral_rejected,
+            },
+        )
+
+        df_reglas = pd.DataFrame(
+            {
+                "TAG": list(depurador_bases.TAGS),
+                "ANIs (reglas actuales)": [actual[t][0] for t in depurador_bases.TAGS],
+                "ANIs (simulado)": [simulado[t][0] for t in depurador_bases.TAGS],
+                "Intentos (simulado)": [simulado[t][1] for t in depurador_bases.TAGS],
+            }
+        )
+        df_reglas["Diferencia"] = (
+            df_reglas["ANIs (simulado)"] - df_reglas["ANIs (reglas actuales)"]
+        )
+        st.dataframe(df_reglas, use_container_width=True, hide_index=True)
+
+        depurar_actual = sum(v[0] for v in actual.values()) - actual["SEGUIR_INTENTANDO"][0]
+        depurar_sim = sum(v[0] for v in simulado.values()) - simulado["SEGUIR_INTENTANDO"][0]
+        st.metric(
+            "ANIs a depurar con estas reglas",
+            f"{depurar_sim:,}",
+            f"{depurar_sim - depurar_actual:+,} vs reglas actuales",
+        )
+
+# =========================================================
+# PANEL DE RENDIMIENTO (opcional)
+# =========================================================
+def memoria_frames() -> pd.DataFrame:
+    """Tamaño en memoria de las tablas de trabajo del dataset (una vez por dataset)."""
+    tablas = {
+        "data": data,
+        "resumen_ani": resumen_ani,
+        "base_depurada": base_depurada,
+        "descartados": descartados,
+    }
+    filas = [
+        {
+            "tabla": nombre,
+            "filas": len(df),
+            "columnas": df.shape[1],
+            "MB": df.memory_usage(deep=True).sum() / 2**20,
+        }
+        for nombre, df in tablas.items()
+    ]
+    filas.append(
+        {
+            "tabla": "indice_ani_base",
+            "filas": len(indice_ani_base["anis"]),
+            "columnas": None,
+            "MB": sum(
+                v.nbytes for v in indice_ani_base.values() if isinstance(v, np.ndarray)
+            ) / 2**20,
+        }
+    )
+    return pd.DataFrame(filas)
+
+def cerrar_rerun() -> dict:
+    """Tiempos del rerun actual; se acumulan en la sesión (últimos 50 reruns y caché)."""
+    fin = time.perf_counter()
+    rerun = {
+        "pestaña": tab_activa,
+        "total_s": fin - INICIO_RERUN,
+        "carga_s": INICIO_PESTANA - INICIO_RERUN,
+        "pestaña_s": fin - INICIO_PESTANA,
+        "fallos_cache": sum(o["tipo"] == "fallo" for o in OPERACIONES),
+    }
+    historial = st.session_state.setdefault("rendimiento_reruns", [])
+    historial.append(rerun)
+    del historial[:-50]
+
+    cache = st.session_state.setdefault("rendimiento_cache", {})
+    for o in OPERACIONES:
+        if o["tipo"] in ("acierto", "fallo"):
+            aciertos, fallos = cache.get(o["operacion"], (0, 0))
+            cache[o["operacion"]] = (
+                aciertos + (o["tipo"] == "acierto"),
+                fallos + (o["tipo"] == "fallo"),
+            )
+    return rerun
+
+rerun_actual = cerrar_rerun()
+
+if st.sidebar.checkbox("⏱ Panel de rendimiento", key="panel_rendimiento"):
+    st.markdown("---")
+    st.markdown("### ⏱ Rendimiento")
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Este rerun", f"{rerun_actual['total_s']:.2f} s")
+    c2.metric("Carga / caché del dataset", f"{rerun_actual['carga_s']:.2f} s")
+    c3.metric(f"Pestaña: {tab_activa}", f"{rerun_actual['pestaña_s']:.2f} s")
+
+    historial = pd.DataFrame(st.session_state["rendimiento_reruns"])
+    col_izq, col_der = st.columns(2)
+    with col_izq:
+        st.markdown("**Por pestaña (reruns de esta sesión)**")
+        st.dataframe(
+            historial.groupby("pestaña")
+            .agg(
+                reruns=("total_s", "size"),
+                promedio_s=("pestaña_s", "mean"),
+                maximo_s=("pestaña_s", "max"),
+                carga_promedio_s=("carga_s", "mean"),
+            )
+            .round(3),
+            use_container_width=True,
+        )
+    with col_der:
+        st.markdown("**Operaciones más lentas de este rerun**")
+        if OPERACIONES:
+            st.dataframe(
+                pd.DataFrame(OPERACIONES)
+                .sort_values("segundos", ascending=False)
+                .head(10)
+                .round({"segundos": 3}),
+                use_container_width=True,
+                hide_index=True,
+            )
+        else:
+            st.caption("Sin operaciones medidas.")
+
+    col_izq, col_der = st.columns(2)
+    with col_izq:
+        st.markdown("**Caché (aciertos / fallos en la sesión)**")
+        cache = pd.DataFrame(
+            [
+                {"operacion": nombre, "aciertos": a, "fallos": f}
+                for nombre, (a, f) in st.session_state["rendimiento_cache"].items()
+            ]
+        )
+        if not cache.empty:
+            cache["tasa_aciertos_%"] = (
+                cache["aciertos"] * 100 / (cache["aciertos"] + cache["fallos"])
+            ).round(1)
+            st.dataframe(
+                cache.sort_values("fallos", ascending=False),
+                use_container_width=True,
+                hide_index=True,
+            )
+    with col_der:
+        st.markdown("**Memoria de las tablas de trabajo**")
+        memoria = por_dataset("rendimiento_memoria", memoria_frames)
+        st.dataframe(memoria.round({"MB": 1}), use_container_width=True, hide_index=True)
+        st.caption(f"Total: {memoria['MB'].sum():,.1f} MB")
+
+    st.markdown("**Compactación de tipos (al cargar)**")
+    reporte_tipos = dataset["reporte_tipos"]
+    por_tabla = reporte_tipos.groupby("tabla", sort=False)[["MB_antes", "MB_despues"]].sum()
+    por_tabla["ahorro_x"] = por_tabla["MB_antes"] / por_tabla["MB_despues"].clip(lower=1e-9)
+    st.dataframe(por_tabla.round(2), use_container_width=True)
+    with st.expander("Detalle por columna"):
+        st.dataframe(
+            reporte_tipos[["tabla", "columna", "tipo_antes", "tipo_despues", "MB_antes", "MB_despues"]]
+            .round({"MB_antes": 2, "MB_despues": 2}),
+            use_container_width=True,
+            hide_index=True,
+        )
@@ -0,0 +1,518 @@
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import numpy as np
+import pandas as pd
+import generar_tickets
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+
+try:
+    import resource  # no existe en Windows
+except ImportError:
+    resource = None
+
+# ============================
+# CONFIGURACIÓN BÁSICA
+# ============================
+
+SESIONES = [1, 5, 10, 15]
+FILAS_POR_TICKET = 200_000
+
+# Mismos textos que main.py (pestañas y etiquetas de los widgets que se mueven)
+TAB_DASHBOARD = "📊 Tablero visual"
+TAB_TURNOS = "📈 Turnos y prefijos"
+TAB_DEP = "🧹 Depuración sugerida"
+TAB_FILTROS = "🎛 Filtro detallado"
+TAB_SIMULADOR = "⚙️ Simulador de cortes"
+
+SLIDER_CORTE = "Elegí el nuevo corte máximo de intentos"
+SLIDER_UMBRAL = "INVALIDO: unallocated"
+SLIDER_DURACION = "Duración (segundos)"
+
+# ============================
+# TICKETS
+# ============================
+
+def ticket_para_app(filas: int, semilla: int) -> bytes:
+    """
+    CSV de Neotel listo para subir: ticket sintético que termina hoy (la app
+    solo mira las últimas 2 semanas hábiles) con columna de duración.
+    """
+    df = generar_tickets.generar_ticket(filas, hasta=date.today(), semilla=semilla)
+    rng = np.random.default_rng(semilla)
+    atendido = (df[generar_tickets.COL_ESTADO] == "ANSWER").to_numpy()
+    df["Duración"] = np.where(atendido, rng.gamma(2.0, 45.0, size=len(df)).round(), 0).astype(int)
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = generar_tickets.escribir_ticket(df, Path(carpeta) / "ticket.csv")
+        return ruta.read_bytes()
+
+# ============================
+# STREAMLIT (AppTest)
+# ============================
+
+_BYTECODE: dict[str, object] = {}
+_COMPILACION = threading.Lock()
+
+def preparar_streamlit() -> None:
+    """
+    AppTest está pensado para una sola app por proceso; para correr varias
+    sesiones en threads, como el servidor real, hacen falta dos ajustes:
+
+    - Compila el script en cada run con un ScriptCache nuevo, y compile()
+      no es seguro entre threads: algunas corridas terminan en "compile
+      error" sin dibujar nada. Como en el servidor, el script se compila una
+      vez por proceso y todas las sesiones comparten ese bytecode.
+    - Cada run instala su Runtime simulado y lo borra al terminar: las
+      sesiones que siguen corriendo fallan con "Runtime hasn't been
+      created!". Runtime.instance() / exists() devuelven el último Runtime
+      instalado cuando otra sesión ya lo borró.
+
+    Si una versión de Streamlit cambia estas clases, falla acá (ImportError
+    / AttributeError) en vez de medir corridas rotas.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    compilar = ScriptCache.get_bytecode
+
+    def get_bytecode(self, script_path):
+        with _COMPILACION:
+            if script_path not in _BYTECODE:
+                _BYTECODE[script_path] = compilar(self, script_path)
+            return _BYTECODE[script_path]
+
+    ScriptCache.get_bytecode = get_bytecode
+
+    instancia = Runtime.instance
+    ultimo = []
+
+    def instance(cls):
+        try:
+            ultimo[:] = [instancia()]
+        except RuntimeError:
+            if not ultimo:
+                raise
+        return ultimo[0]
+
+    def exists(cls):
+        try:
+            instance(cls)
+        except RuntimeError:
+            return False
+        return True
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+
+def widget(elementos, etiqueta: str):
+    """Primer widget cuya etiqueta empieza con `etiqueta` (o None si la pestaña no lo mostró)."""
+    return next((w for w in elementos if w.label.startswith(etiqueta)), None)
+
+def escenario(at, rng: np.random.Generator) -> list:
+    """
+    Interacciones de un supervisor típico, en orden, como (acción, paso,
+    función): la acción agrupa los percentiles; el paso nombra la pantalla
+    o el widget (lo usa benchmark_depurador.py --pantallas).
+    Cada función deja el widget listo y hace el rerun; si el widget no está
+    (ticket sin datos para esa pestaña) se hace el rerun igual.
+    """
+    def pestana(tab):
+        return lambda: at.radio(key="tab_activa").set_value(tab).run()
+
+    def mover(etiqueta, valor):
+        def accion():
+            slider = widget(at.slider, etiqueta)
+            if slider is None:
+                return at.run()
+            return slider.set_value(valor(slider)).run()
+        return accion
+
+    def filtrar_estado():
+        multiselect = widget(at.multiselect, "Estado")
+        if multiselect is None or len(multiselect.options) < 2:
+            return at.run()
+        quitar = multiselect.options[int(rng.integers(len(multiselect.options)))]
+        return multiselect.set_value([o for o in multiselect.options if o != quitar]).run()
+
+    def buscar_ani():
+        caja = widget(at.text_input, "Buscar ANI")
+        if caja is None:
+            return at.run()
+        return caja.input(f"11{int(rng.integers(10, 100))}").run()
+
+    return [
+        ("pestaña", TAB_DASHBOARD, pestana(TAB_DASHBOARD)),
+        ("pestaña", TAB_TURNOS, pestana(TAB_TURNOS)),
+        ("pestaña", TAB_DEP, pestana(TAB_DEP)),
+        ("pestaña", TAB_FILTROS, pestana(TAB_FILTROS)),
+        ("filtro", "filtro por Estado", filtrar_estado),
+        ("filtro", "filtro por duración", mover(SLIDER_DURACION, lambda s: (s.min, max(s.min, (s.min + s.max) // 2)))),
+        ("filtro", "búsqueda de ANI", buscar_ani),
+        ("pestaña", TAB_SIMULADOR, pestana(TAB_SIMULADOR)),
+        ("simulador", "corte de intentos", mover(SLIDER_CORTE, lambda s: int(rng.integers(s.min, s.max + 1)))),
+        ("simulador", "otro corte de intentos", mover(SLIDER_CORTE, lambda s: int(rng.integers(s.min, s.max + 1)))),
+        ("simulador", "umbral de estado", mover(SLIDER_UMBRAL, lambda s: int(rng.integers(s.min, s.max + 1)))),
+        ("pestaña", f"vuelta a {TAB_DASHBOARD}", pestana(TAB_DASHBOARD)),
+    ]
+
+def dibujo_la_app(at) -> bool:
+    """Después de subir el ticket, toda corrida completa dibuja el selector de pestañas."""
+    return any(radio.key == "tab_activa" for radio in at.radio)
+
+def sesion(
+    numero: int,
+    app: Path,
+    archivo: tuple[str, bytes],
+    largada: threading.Barrier,
+    pausa: float,
+    timeout: float,
+    semilla: int,
+    caches: list[dict],
+) -> list[dict]:
+    """
+    Una sesión simulada: sube el ticket (todas a la vez, por `largada`) y
+    recorre el escenario con pausas de "lectura" aleatorias entre acciones.
+    Devuelve una medición por rerun. Una corrida falla si levanta una
+    excepción o si no llega a dibujar la app (ej. se cortó el script); la
+    sesión termina en la primera falla, porque las acciones siguientes ya no
+    miden lo que dicen. Al terminar deja en `caches` los aciertos / fallos
+    de caché que la app acumuló en la sesión (rendimiento_cache).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = np.random.default_rng(semilla + numero)
+    at = AppTest.from_file(str(app), default_timeout=timeout)
+    mediciones = []
+
+    def medir(accion: str, funcion, paso: str | None = None) -> bool:
+        inicio = time.perf_counter()
+        error = None
+        try:
+            funcion()
+            if at.exception:
+                error = at.exception[0].message
+            elif accion != "inicio" and not dibujo_la_app(at):
+                error = "La corrida terminó sin dibujar la app (sin selector de pestañas)"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        mediciones.append(
+            {
+                "sesion": numero,
+                "accion": accion,
+                "paso": paso or accion,
+                "segundos": time.perf_counter() - inicio,
+                "error": error,
+            }
+        )
+        return error is None
+
+    def recorrer() -> None:
+        if not medir("inicio", at.run):
+            largada.abort()
+            return
+        largada.wait()
+        nombre, datos = archivo
+        if not medir("carga", lambda: at.file_uploader[0].set_value([(nombre, datos, "text/csv")]).run()):
+            return
+        for accion, paso, funcion in escenario(at, rng):
+            if pausa:
+                time.sleep(rng.uniform(0, 2 * pausa))
+            if not medir(accion, funcion, paso):
+                return
+
+    recorrer()
+    cache = at.session_state["rendimiento_cache"] if "rendimiento_cache" in at.session_state else {}
+    caches.extend(
+        {"sesion": numero, "operacion": str(operacion), "aciertos": a, "fallos": f}
+        for operacion, (a, f) in cache.items()
+    )
+    return mediciones
+
+def _rss_mb(pico: bool) -> float | None:
+    """RSS actual (Linux, /proc) o pico del proceso (getrusage)."""
+    if not pico:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * 4096 / 2**20
+        except OSError:
+            return None
+    if resource is None:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return maximo / 2**20 if sys.platform == "darwin" else maximo / 2**10
+
+def correr_carga(
+    sesiones: int,
+    app: Path,
+    filas: int,
+    mismo_ticket: bool,
+    pausa: float,
+    timeout: float,
+    semilla: int,
+) -> dict:
+    """
+    `sesiones` sesiones concurrentes (un thread cada una) en este proceso.
+    Corre en un proceso nuevo por cantidad de sesiones, así el pico de RSS
+    es el de esa corrida y la caché arranca vacía.
+    """
+    preparar_streamlit()
+    datos = [
+        ticket_para_app(filas, semilla if mismo_ticket else semilla + i)
+        for i in range(1 if mismo_ticket else sesiones)
+    ]
+    # Cada subida recibe su propio file_id: aunque suban el mismo contenido,
+    # para la app son datasets distintos (como en el servidor real)
+    archivos = [
+        (f"ticket_{i + 1:02d}.csv", datos[0 if mismo_ticket else i]) for i in range(sesiones)
+    ]
+    # Corrida previa (sin archivo): compila el script y deja un Runtime
+    # registrado antes de largar las sesiones
+    from streamlit.testing.v1 import AppTest
+    AppTest.from_file(str(app), default_timeout=timeout).run()
+    rss_base = _rss_mb(pico=False)
+
+    largada = threading.Barrier(sesiones)
+    resultados: list[list[dict]] = [[] for _ in range(sesiones)]
+    caches: list[dict] = []
+
+    def correr(i: int) -> None:
+        try:
+            resultados[i] = sesion(i, app, archivos[i], largada, pausa, timeout, semilla, caches)
+        except Exception:
+            largada.abort()
+            resultados[i] = [
+                {"sesion": i, "accion": "sesion", "paso": "sesion", "segundos": 0.0, "error": traceback.format_exc(limit=3)}
+            ]
+
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=correr, args=(i,), daemon=True) for i in range(sesiones)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    return {
+        "sesiones": sesiones,
+        "segundos_totales": time.perf_counter() - inicio,
+        "rss_base_mb": rss_base,
+        "rss_pico_mb": _rss_mb(pico=True),
+        "mediciones": [
+            {"sesiones": sesiones, **m} for parcial in resultados for m in parcial
+        ],
+        "caches": [{"sesiones": sesiones, **c} for c in caches],
+    }
+
+# ============================
+# REPORTE
+# ============================
+
+def percentiles(mediciones: pd.DataFrame) -> pd.DataFrame:
+    """
+    Latencia de rerun (p50 / p90 / p99 / máx) por cantidad de sesiones y
+    acción, solo sobre los reruns que terminaron bien; los que fallaron se
+    cuentan aparte en `errores`.
+    """
+    medidas = mediciones[mediciones["accion"] != "inicio"].assign(
+        segundos=lambda m: m["segundos"].where(m["error"].isna()),
+        errores=lambda m: m["error"].notna(),
+    )
+    tabla = (
+        pd.concat([medidas, medidas.assign(accion="(todas)")], ignore_index=True)
+        .groupby(["sesiones", "accion"])
+        .agg(
+            reruns=("segundos", "count"),
+            errores=("errores", "sum"),
+            p50=("segundos", lambda s: s.quantile(0.50)),
+            p90=("segundos", lambda s: s.quantile(0.90)),
+            p99=("segundos", lambda s: s.quantile(0.99)),
+            maximo=("segundos", "max"),
+        )
+        .reset_index()
+    )
+    return tabla.round({"p50": 3, "p90": 3, "p99": 3, "maximo": 3})
+
+def aciertos_cache(corridas: list[dict]) -> pd.DataFrame:
+    """
+    Aciertos / fallos de caché por cantidad de sesiones y operación, sumados
+    sobre las sesiones. Lo esperable es un fallo por sesión en lo que se
+    calcula una vez por dataset (preparar_dataset, índices); más fallos
+    quieren decir que las sesiones se desalojan la caché entre ellas.
+    """
+    tabla = pd.DataFrame([c for corrida in corridas for c in corrida["caches"]])
+    if tabla.empty:
+        return pd.DataFrame(columns=["sesiones", "operacion", "aciertos", "fallos", "fallos_por_sesion"])
+    tabla = tabla.groupby(["sesiones", "operacion"], as_index=False)[["aciertos", "fallos"]].sum()
+    tabla["fallos_por_sesion"] = (tabla["fallos"] / tabla["sesiones"]).round(2)
+    return tabla.sort_values(["sesiones", "fallos"], ascending=[True, False], ignore_index=True)
+
+def memoria(corridas: list[dict]) -> pd.DataFrame:
+    """Pico de RSS por cantidad de sesiones y lo que suma cada sesión sobre la base."""
+    tabla = pd.DataFrame(
+        [
+            {
+                "sesiones": c["sesiones"],
+                "rss_base_mb": c["rss_base_mb"],
+                "rss_pico_mb": c["rss_pico_mb"],
+                "segundos_totales": c["segundos_totales"],
+                "errores": sum(m["error"] is not None for m in c["mediciones"]),
+            }
+            for c in corridas
+        ]
+    )
+    tabla["mb_por_sesion"] = (tabla["rss_pico_mb"] - tabla["rss_base_mb"]) / tabla["sesiones"]
+    return tabla.round({"rss_base_mb": 1, "rss_pico_mb": 1, "segundos_totales": 2, "mb_por_sesion": 1})
+
+def comparar(actual: pd.DataFrame, previo_json: Path) -> pd.DataFrame:
+    """p90 de esta corrida contra el de un JSON anterior, por sesiones y acción."""
+    previo = pd.DataFrame(json.loads(previo_json.read_text(encoding="utf-8"))["percentiles"])
+    tabla = actual.merge(previo, on=["sesiones", "accion"], how="inner", suffixes=("", "_previo"))
+    tabla["variacion_p90_%"] = ((tabla["p90"] / tabla["p90_previo"].clip(lower=1e-9) - 1) * 100).round(1)
+    return tabla[["sesiones", "accion", "p90_previo", "p90", "variacion_p90_%"]]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Prueba de carga de la app Streamlit: N sesiones concurrentes (AppTest) que "
+            "suben un ticket y navegan la app. Informa percentiles de latencia de rerun "
+            "y pico de memoria por cantidad de sesiones."
+        )
+    )
+    parser.add_argument(
+        "--sesiones",
+        type=int,
+        nargs="+",
+        default=SESIONES,
+        help="Cantidades de sesiones concurrentes a probar (default: 1 5 10 15)",
+    )
+    parser.add_argument(
+        "--app",
+        type=Path,
+        default=Path(__file__).with_name("main.py"),
+        help="Script de la app (default: main.py junto a este archivo)",
+    )
+    parser.add_argument(
+        "--filas",
+        type=int,
+        default=FILAS_POR_TICKET,
+        help="Llamados por ticket subido (default: 200000)",
+    )
+    parser.add_argument(
+        "--mismo-ticket",
+        action="store_true",
+        help="Todas las sesiones suben el mismo contenido (por defecto, uno distinto cada una)",
+    )
+    parser.add_argument(
+        "--pausa",
+        type=float,
+        default=1.0,
+        help="Pausa media entre acciones de una sesión, en segundos (default: 1; 0 = sin pausa)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=300.0,
+        help="Tiempo máximo de un rerun, en segundos (default: 300)",
+    )
+    parser.add_argument(
+        "--salida",
+        type=Path,
+        default=Path(f"carga_{datetime.now():%Y%m%d_%H%M%S}.json"),
+        help="JSON con los resultados",
+    )
+    parser.add_argument(
+        "--comparar",
+        type=Path,
+        help="JSON de una corrida anterior para comparar el p90",
+    )
+    parser.add_argument(
+        "--etiqueta",
+        default="",
+        help="Versión / rama que se está midiendo (queda en el JSON)",
+    )
+    parser.add_argument(
+        "--semilla",
+        type=int,
+        default=0,
+        help="Semilla de los tickets y de las interacciones",
+    )
+    args = parser.parse_args()
+
+    if not args.app.exists():
+        raise SystemExit(f"No se encuentra la app: {args.app}")
+
+    corridas = []
+    for sesiones in args.sesiones:
+        print(f"\n=== {sesiones} sesiones ===")
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            corrida = pool.submit(
+                correr_carga,
+                sesiones,
+                args.app.resolve(),
+                args.filas,
+                args.mismo_ticket,
+                args.pausa,
+                args.timeout,
+                args.semilla,
+            ).result()
+        corridas.append(corrida)
+        errores = [m for m in corrida["mediciones"] if m["error"]]
+        print(
+            f"  {corrida['segundos_totales']:.1f} s, pico {corrida['rss_pico_mb'] or 0:,.0f} MB, "
+            f"{len(errores)} reruns con error"
+        )
+        for m in errores[:3]:
+            print(f"    ✗ sesión {m['sesion']} ({m['accion']}): {m['error'].strip().splitlines()[-1]}")
+
+    mediciones = pd.DataFrame([m for c in corridas for m in c["mediciones"]])
+    tabla_latencia = percentiles(mediciones)
+    tabla_memoria = memoria(corridas)
+    tabla_cache = aciertos_cache(corridas)
+
+    print("\nLatencia de rerun (s):")
+    print(tabla_latencia.to_string(index=False))
+    print("\nMemoria:")
+    print(tabla_memoria.to_string(index=False))
+    print("\nCaché (suma de las sesiones):")
+    print(tabla_cache.to_string(index=False))
+
+    args.salida.write_text(
+        json.dumps(
+            {
+                "etiqueta": args.etiqueta,
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "pandas": pd.__version__,
+                "numpy": np.__version__,
+                "plataforma": platform.platform(),
+                "filas_por_ticket": args.filas,
+                "mismo_ticket": args.mismo_ticket,
+                "pausa": args.pausa,
+                "semilla": args.semilla,
+                "percentiles": tabla_latencia.to_dict("records"),
+                "memoria": tabla_memoria.to_dict("records"),
+                "cache": tabla_cache.to_dict("records"),
+                "mediciones": mediciones.to_dict("records"),
+            },
+            ensure_ascii=False,
+            indent=2,
+            default=str,
+        ),
+        encoding="utf-8",
+    )
+    print(f"\nResultados guardados en {args.salida}")
+
+    if args.comparar:
+        print(f"\nComparación contra {args.comparar}:")
+        print(comparar(tabla_latencia, args.comparar).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import argparse
+import importlib
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+import depurador_bases  # módulo de lógica
+
+from dataclasses import dataclass, field
+
+# ============================
+# CONFIGURACIÓN BÁSICA
+# ============================
+
+COL_ESTADO = "Estado"
+COL_SUBESTADO = "Sub-Estado"
+COL_ANI = "ANI/Teléfono"
+COL_FECHA = "Inicio"
+COL_BASE = "BASE"
+
+# Variantes que aparecen (o podrían aparecer) en los tickets de Neotel:
+# mayúsculas/minúsculas, espacios sobrantes o internos, vacíos.
+ESTADOS = [
+    "ANSWER", "answer", " Answer ", "NO ANSWER", "NOANSWER", "no answer ",
+    "BUSY", "Busy", "UNALLOCATED", " unallocated", "REJECTED", "rejected",
+    "FAILED", "", None,
+]
+SUBESTADOS = [
+    "", None, "answer agent", "Answer Agent", "agent", " AGENT ", "agente",
+    "Agente", "agent_transfer", "answering machine", "ANSWERING MACHINE",
+    "machine", "answeringmachine", "unallocated", " Unallocated ", "rejected",
+    "REJECTED ", "no answer",
+]
+FECHAS = [
+    "2025-03-18 09:15:00", "2025-03-18 09:15:00", "2025-03-19 20:59:59",
+    "2025-03-20 08:00:00", "", None, "sin fecha",
+]
+
+# ============================
+# MOTORES
+# ============================
+# Un motor recibe (df, col_estado, col_subestado, col_ani, col_fecha) y
+# devuelve el resumen por ANI con 'tag_telefono'. Se comparan las columnas
+# que tienen en común con la referencia.
+
+def motor_referencia(df, col_estado, col_subestado, col_ani, col_fecha) -> pd.DataFrame:
+    """construir_resumen_por_ani + asignar_tag fila por fila (lo de siempre)."""
+    resumen = depurador_bases.construir_resumen_por_ani(
+        df, col_estado, col_subestado, col_ani, col_fecha
+    )
+    return depurador_bases.etiquetar_resumen(resumen)
+
+def motor_por_campana(df, col_estado, col_subestado, col_ani, col_fecha) -> pd.DataFrame:
+    """Resumen por (BASE, ANI) vectorizado, sumado por ANI, con asignar_tags."""
+    _, resumen = depurador_bases.procesar_por_campana(
+        df, col_estado, col_subestado, col_ani, COL_BASE, col_fecha
+    )
+    return resumen
+
+def motor_acumulador(df, col_estado, col_subestado, col_ani, col_fecha) -> pd.DataFrame:
+    """AcumuladorPorANI en bloques chicos (como la lectura por partes)."""
+    acumulador = depurador_bases.AcumuladorPorANI(col_estado, col_subestado, col_ani, col_fecha)
+    for inicio in range(0, len(df), 37):
+        acumulador.agregar(df.iloc[inicio:inicio + 37])
+    resumen = acumulador.resumen()
+    resumen["tag_telefono"] = depurador_bases.asignar_tags(resumen)
+    return resumen
+
+MOTORES = {
+    "referencia": motor_referencia,
+    "por_campana": motor_por_campana,
+    "acumulador": motor_acumulador,
+}
+
+def cargar_motor(nombre: str):
+    """Motor registrado en MOTORES o 'modulo:funcion' importable."""
+    if nombre in MOTORES:
+        return MOTORES[nombre]
+    modulo, _, funcion = nombre.partition(":")
+    if not funcion:
+        raise SystemExit(f"Motor desconocido: {nombre} (usar uno de {list(MOTORES)} o modulo:funcion)")
+    return getattr(importlib.import_module(modulo), funcion)
+
+# ============================
+# TICKETS DE CASOS BORDE
+# ============================
+
+def ticket_borde(rng: np.random.Generator, filas: int) -> pd.DataFrame:
+    """
+    Ticket chico y sucio: pocos ANIs (muchos repetidos), el mismo ANI con y
+    sin espacios, subestados vacíos, "agent" vs "agente", unallocated y
+    rejected en cualquiera de las dos columnas, fechas vacías o inválidas.
+    """
+    n_anis = int(rng.integers(1, max(2, filas // 3) + 1))
+    numeros = np.array([f"11{4000_0000 + i * 97:08d}" for i in range(n_anis)], dtype=object)
+    anis = numeros[rng.integers(0, n_anis, size=filas)]
+    rellenos = [("", ""), (" ", ""), ("", " "), ("  ", "\t")]
+    anis = np.array(
+        [
+            antes + a + despues
+            for a, (antes, despues) in zip(anis, (rellenos[i] for i in rng.integers(0, 4, size=filas)))
+        ],
+        dtype=object,
+    )
+
+    def sortear(valores: list) -> np.ndarray:
+        return np.array(valores, dtype=object)[rng.integers(0, len(valores), size=filas)]
+
+    return pd.DataFrame(
+        {
+            COL_ANI: anis,
+            COL_ESTADO: sortear(ESTADOS),
+            COL_SUBESTADO: sortear(SUBESTADOS),
+            COL_FECHA: sortear(FECHAS),
+            COL_BASE: sortear(["BASE_01", "BASE_02", "BASE_03"]),
+        }
+    )
+
+# ============================
+# COMPARACIÓN
+# ============================
+
+@dataclass
+class Resultado:
+    semilla: int
+    filas: int
+    segundos_referencia: float
+    segundos_candidato: float
+    diferencias: dict = field(default_factory=dict)
+
+    @property
+    def aceleracion(self) -> float:
+        return self.segundos_referencia / max(self.segundos_candidato, 1e-9)
+
+def por_ani(resumen: pd.DataFrame) -> pd.DataFrame:
+    resumen = resumen.copy()
+    resumen["ANI"] = resumen["ANI"].astype(str)
+    return resumen.sort_values("ANI", kind="stable").set_index("ANI")
+
+def iguales(a: pd.Series, b: pd.Series) -> np.ndarray:
+    """Igualdad elemento a elemento, con faltantes (NaN / NaT / NA) iguales entre sí."""
+    if pd.api.types.is_datetime64_any_dtype(a) or pd.api.types.is_datetime64_any_dtype(b):
+        a, b = pd.to_datetime(a), pd.to_datetime(b)
+    faltan_a, faltan_b = a.isna().to_numpy(), b.isna().to_numpy()
+    mismos = (a.astype(object).to_numpy() == b.astype(object).to_numpy())
+    return np.where(faltan_a | faltan_b, faltan_a & faltan_b, mismos)
+
+def comparar_resumenes(referencia: pd.DataFrame, candidato: pd.DataFrame, ejemplos: int = 3) -> dict:
+    """
+    Diferencias campo por campo: {columna: [ejemplos (ANI, referencia, candidato)]}.
+    '_anis' lista los ANIs que están en uno solo de los dos resúmenes.
+    """
+    ref, cand = por_ani(referencia), por_ani(candidato)
+    diferencias = {}
+    solo = ref.index.symmetric_difference(cand.index)
+    if len(solo):
+        diferencias["_anis"] = list(solo[:ejemplos])
+    comunes = ref.index.intersection(cand.index)
+    ref, cand = ref.loc[comunes], cand.loc[comunes]
+    for col in ref.columns.intersection(cand.columns):
+        ok = iguales(ref[col], cand[col])
+        if not ok.all():
+            malos = np.flatnonzero(~ok)[:ejemplos]
+            diferencias[col] = [
+                (ref.index[i], ref[col].iloc[i], cand[col].iloc[i]) for i in malos
+            ]
+    return diferencias
+
+def verificar(
+    candidato,
+    referencia=motor_referencia,
+    casos: int = 200,
+    max_filas: int = 300,
+    semilla: int = 0,
+) -> list[Resultado]:
+    """
+    Corre referencia y candidato sobre `casos` tickets de borde (cada uno con
+    su semilla, para poder reproducir el que falle) y compara los resúmenes.
+    """
+    columnas = (COL_ESTADO, COL_SUBESTADO, COL_ANI, COL_FECHA)
+    resultados = []
+    for caso in range(casos):
+        rng = np.random.default_rng(semilla + caso)
+        df = ticket_borde(rng, int(rng.integers(1, max_filas + 1)))
+
+        inicio = time.perf_counter()
+        esperado = referencia(df.copy(), *columnas)
+        medio = time.perf_counter()
+        obtenido = candidato(df.copy(), *columnas)
+        fin = time.perf_counter()
+
+        resultados.append(
+            Resultado(
+                semilla=semilla + caso,
+                filas=len(df),
+                segundos_referencia=medio - inicio,
+                segundos_candidato=fin - medio,
+                diferencias=comparar_resumenes(esperado, obtenido),
+            )
+        )
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara motores de resumen/etiquetado contra la referencia sobre tickets con casos borde."
+    )
+    parser.add_argument(
+        "candidatos",
+        nargs="*",
+        default=[m for m in MOTORES if m != "referencia"],
+        help=f"Motores a verificar: {list(MOTORES)} o modulo:funcion (default: todos)",
+    )
+    parser.add_argument(
+        "--referencia",
+        default="referencia",
+        help="Motor de referencia (default: construir_resumen_por_ani + asignar_tag)",
+    )
+    parser.add_argument(
+        "--casos",
+        type=int,
+        default=200,
+        help="Tickets aleatorios por motor (default: 200)",
+    )
+    parser.add_argument(
+        "--max-filas",
+        type=int,
+        default=300,
+        help="Filas máximas por ticket (default: 300)",
+    )
+    parser.add_argument(
+        "--semilla",
+        type=int,
+        default=0,
+        help="Semilla del primer caso (default: 0)",
+    )
+    args = parser.parse_args()
+
+    # "sin fecha" hace que pandas avise que no pudo inferir el formato
+    warnings.simplefilter("ignore", UserWarning)
+
+    referencia = cargar_motor(args.referencia)
+    fallas = 0
+    for nombre in args.candidatos:
+        resultados = verificar(
+            cargar_motor(nombre), referencia, args.casos, args.max_filas, args.semilla
+        )
+        con_diferencias = [r for r in resultados if r.diferencias]
+        total_ref = sum(r.segundos_referencia for r in resultados)
+        total_cand = sum(r.segundos_candidato for r in resultados)
+        aceleraciones = np.array([r.aceleracion for r in resultados])
+
+        print(f"\n=== {nombre} ===")
+        print(
+            f"Casos: {len(resultados)} | con diferencias: {len(con_diferencias)} | "
+            f"aceleración total: {total_ref / max(total_cand, 1e-9):.1f}x "
+            f"(por caso: mín {aceleraciones.min():.1f}x, mediana {np.median(aceleraciones):.1f}x, "
+            f"máx {aceleraciones.max():.1f}x)"
+        )
+        for r in con_diferencias[:5]:
+            print(f"  ✗ semilla {r.semilla} ({r.filas} filas):")
+            for col, ejemplos in r.diferencias.items():
+                if col == "_anis":
+                    print(f"      ANIs en un solo resumen: {ejemplos}")
+                    continue
+                detalle = "; ".join(f"{ani}: {esperado} != {obtenido}" for ani, esperado, obtenido in ejemplos)
+                print(f"      {col}: {detalle}")
+        fallas += len(con_diferencias)
+
+    sys.exit(1 if fallas else 0)
+
+if __name__ == "__main__":
+    main()